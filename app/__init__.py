@@ -1,6 +1,9 @@
 from fastapi import FastAPI
+from app.api.metrics.routes import metrics_router
 from app.api.router import api_router
+from app.core.config import Config
 from app.core.exception_handlers import register_exception_handlers
+from app.core.lifespan import lifespan
 from app.core.middlewares import register_middleware
 
 
@@ -20,7 +23,8 @@ app = FastAPI(
     terms_of_service="httpS://example.com/tos",
     openapi_url=f"{version_prefix}/openapi.json",
     docs_url=f"{version_prefix}/docs",
-    redoc_url=f"{version_prefix}/redoc"
+    redoc_url=f"{version_prefix}/redoc",
+    lifespan=lifespan,
 )
 
 register_exception_handlers(app)
@@ -29,4 +33,7 @@ register_exception_handlers(app)
 register_middleware(app)
 
 
-app.include_router(api_router, prefix=f"{version_prefix}")
\ No newline at end of file
+app.include_router(api_router, prefix=f"{version_prefix}")
+
+if Config.METRICS_ENABLED:
+    app.include_router(metrics_router)
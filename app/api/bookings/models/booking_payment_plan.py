@@ -1,22 +1,31 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
 import uuid
 
-from sqlalchemy import Column, DateTime, Numeric
+from sqlalchemy import Column, Date, DateTime, Index, Numeric
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from sqlmodel import Field, SQLModel
 
 
 class BookingPaymentPlan(SQLModel, table=True):
     __tablename__ = "booking_payment_plan"
+    __table_args__ = (
+        Index("uq_booking_payment_plan_booking", "booking_id", unique=True),
+        Index("idx_booking_payment_plan_tour", "tour_id"),
+    )
 
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, nullable=False)
     booking_id: uuid.UUID = Field(nullable=False)
+    tour_id: uuid.UUID | None = Field(default=None, nullable=True)
 
     total_amount: Decimal = Field(sa_column=Column(Numeric(12, 2), nullable=False))
     number_of_installments: int = Field(nullable=False)
+    departure_date: date | None = Field(default=None, sa_column=Column(Date))
+    # InstallmentPlanConfig as JSON; NULL for plans made before configurable plans.
+    plan_config: dict | None = Field(default=None, sa_column=Column(JSONB))
 
     created_at: datetime = Field(
         sa_column=Column(DateTime, nullable=False, server_default=func.now())
@@ -3,8 +3,19 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.bookings.schemas import CreateInstallmentsRequest, CreateInstallmentsResponse
-from app.api.bookings.services import create_booking_payment_schedule_service
+from app.api.bookings.schemas import (
+    BulkCreateInstallmentsRequest,
+    BulkCreateInstallmentsResponse,
+    CreateInstallmentsRequest,
+    CreateInstallmentsResponse,
+    ReplanSchedulesRequest,
+    ReplanSchedulesResponse,
+)
+from app.api.bookings.services import (
+    bulk_create_booking_payment_schedules_service,
+    create_booking_payment_schedule_service,
+    replan_booking_payment_schedules_service,
+)
 from app.db.main import get_session
 
 bookings_router = APIRouter()
@@ -21,3 +32,29 @@ async def create_booking_payment_schedule(
     session: AsyncSession = Depends(get_session),
 ):
     return await create_booking_payment_schedule_service(payload, session)
+
+
+@bookings_router.post(
+    "/payment-schedule/bulk",
+    response_model=BulkCreateInstallmentsResponse,
+    response_model_by_alias=True,
+    status_code=status.HTTP_200_OK,
+)
+async def bulk_create_booking_payment_schedules(
+    payload: BulkCreateInstallmentsRequest,
+    session: AsyncSession = Depends(get_session),
+):
+    return await bulk_create_booking_payment_schedules_service(payload, session)
+
+
+@bookings_router.post(
+    "/payment-schedule/replan",
+    response_model=ReplanSchedulesResponse,
+    response_model_by_alias=True,
+    status_code=status.HTTP_200_OK,
+)
+async def replan_booking_payment_schedules(
+    payload: ReplanSchedulesRequest,
+    session: AsyncSession = Depends(get_session),
+):
+    return await replan_booking_payment_schedules_service(payload, session)
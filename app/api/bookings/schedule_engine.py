@@ -0,0 +1,210 @@
+"""Installment schedules from a plan, in exact paise.
+
+A plan is compiled once into integer weights (basis points, or fixed paise)
+and a due-date calendar. ``compute_schedules`` then applies the compiled plans
+to any number of bookings using integer arithmetic only, so a booking's
+installments always add up to its total to the paisa.
+"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from functools import lru_cache
+from typing import Iterable, NamedTuple
+import uuid
+
+from app.api.bookings.schemas import InstallmentPlanConfig
+
+_PAISA = Decimal("0.01")
+_BASIS = 10_000  # basis points in 100%
+DEPOSIT_BASIS_POINTS = 2_500
+
+
+class ScheduleRequest(NamedTuple):
+    booking_id: uuid.UUID
+    booking_public_id: str
+    total_amount: Decimal
+    plan: InstallmentPlanConfig
+    booked_on: date
+    departure_date: date | None = None
+
+
+class ScheduleLine(NamedTuple):
+    booking_id: uuid.UUID
+    booking_public_id: str
+    installment_no: int
+    due_amount: Decimal
+    due_date: date
+
+
+def to_paise(amount: Decimal | str | int) -> int:
+    return int(Decimal(amount).quantize(_PAISA, rounding=ROUND_HALF_UP) * 100)
+
+
+def from_paise(paise: int) -> Decimal:
+    return Decimal(paise).scaleb(-2)
+
+
+def default_plan(installments: int = 2) -> InstallmentPlanConfig:
+    """25% at booking, the rest in equal parts a week apart (for 2, the original plan)."""
+    return InstallmentPlanConfig(installments=installments)
+
+
+def load_plan(plan_config: dict | None, installments: int) -> InstallmentPlanConfig:
+    if plan_config is None:
+        return default_plan(installments)
+    return InstallmentPlanConfig.model_validate(plan_config)
+
+
+class CompiledPlan:
+    __slots__ = (
+        "installments",
+        "weights",
+        "fixed",
+        "absorber",
+        "spread",
+        "offsets",
+        "before_departure",
+        "skip_weekends",
+        "holidays",
+    )
+
+    def __init__(self, plan: InstallmentPlanConfig) -> None:
+        n = plan.installments
+        self.installments = n
+        self.absorber = 0 if plan.remainder_to == "first" else n - 1
+        self.spread = plan.remainder_to == "spread"
+        self.weights: list[int] | None = None
+        self.fixed: list[int | None] | None = None
+        if plan.split == "fixed":
+            fixed: list[int | None] = [to_paise(value) for value in plan.values]
+            if len(fixed) == n - 1:
+                fixed.insert(self.absorber, None)
+            self.fixed = fixed
+        elif plan.values is not None:
+            self.weights = [int(value * 100) for value in plan.values]
+        else:
+            rest, extra = divmod(_BASIS - DEPOSIT_BASIS_POINTS, n - 1)
+            self.weights = [DEPOSIT_BASIS_POINTS] + [rest] * (n - 1)
+            self.weights[-1] += extra
+
+        self.before_departure = plan.days_before_departure
+        if plan.due_offsets_days is not None:
+            self.offsets = list(plan.due_offsets_days)
+        else:
+            self.offsets = [i * plan.interval_days for i in range(n)]
+        self.skip_weekends = plan.skip_weekends
+        self.holidays = frozenset(plan.holidays)
+
+    def split(self, total: int) -> list[int]:
+        if self.fixed is not None:
+            return self._split_fixed(total)
+        if self.spread:
+            # Largest remainder: floor every share, then hand the leftover
+            # paise to the shares that lost the most to flooring.
+            shares = [total * weight // _BASIS for weight in self.weights]
+            leftover = total - sum(shares)
+            by_loss = sorted(
+                range(self.installments),
+                key=lambda i: (-(total * self.weights[i] % _BASIS), i),
+            )
+            for i in by_loss[:leftover]:
+                shares[i] += 1
+        else:
+            shares = [
+                (total * weight * 2 + _BASIS) // (2 * _BASIS) for weight in self.weights
+            ]
+            shares[self.absorber] = 0
+            shares[self.absorber] = total - sum(shares)
+        if min(shares) <= 0:
+            raise ValueError("Total amount is too small for this many installments")
+        return shares
+
+    def _split_fixed(self, total: int) -> list[int]:
+        if None not in self.fixed:
+            if sum(self.fixed) != total:
+                raise ValueError("Fixed installments must add up to the total amount")
+            return list(self.fixed)
+        shares = [share or 0 for share in self.fixed]
+        shares[self.absorber] = total - sum(shares)
+        if shares[self.absorber] <= 0:
+            raise ValueError("Fixed installments exceed the total amount")
+        return shares
+
+    def _business_day(self, day: date) -> date:
+        while day in self.holidays or (self.skip_weekends and day.weekday() >= 5):
+            day += timedelta(days=1)
+        return day
+
+    def due_dates(self, booked_on: date, departure_date: date | None) -> list[date]:
+        if self.before_departure is not None:
+            if departure_date is None:
+                raise ValueError("departureDate is required for this plan")
+            raw = [
+                booked_on if days is None else departure_date - timedelta(days=days)
+                for days in self.before_departure
+            ]
+        else:
+            raw = [booked_on + timedelta(days=days) for days in self.offsets]
+
+        dates: list[date] = []
+        floor = booked_on
+        for day in raw:
+            # Never due before booking, nor before the previous installment;
+            # anything due at booking stays on the booking date.
+            day = max(day, floor)
+            if day != booked_on:
+                day = self._business_day(day)
+            dates.append(day)
+            floor = day
+        return dates
+
+
+@lru_cache(maxsize=256)
+def _compile(plan_json: str) -> CompiledPlan:
+    return CompiledPlan(InstallmentPlanConfig.model_validate_json(plan_json))
+
+
+def compile_plan(plan: InstallmentPlanConfig) -> CompiledPlan:
+    return _compile(plan.model_dump_json())
+
+
+def compute_schedules(
+    requests: Iterable[ScheduleRequest],
+    errors: dict[uuid.UUID, str] | None = None,
+) -> list[ScheduleLine]:
+    """Schedule lines for every request, in request then installment order.
+
+    With ``errors`` given, a booking that cannot be scheduled is recorded there
+    and skipped; otherwise its ValueError propagates.
+    """
+    lines: list[ScheduleLine] = []
+    # Requests for one tour usually share a plan object; keep it alive so its id is stable.
+    compiled: dict[int, tuple[InstallmentPlanConfig, CompiledPlan]] = {}
+    for request in requests:
+        try:
+            total = to_paise(request.total_amount)
+            if total <= 0:
+                raise ValueError("Invalid total amount")
+            entry = compiled.get(id(request.plan))
+            if entry is None:
+                entry = compiled[id(request.plan)] = (request.plan, compile_plan(request.plan))
+            plan = entry[1]
+            shares = plan.split(total)
+            dates = plan.due_dates(request.booked_on, request.departure_date)
+        except ValueError as exc:
+            if errors is None:
+                raise
+            errors[request.booking_id] = str(exc)
+            continue
+        lines.extend(
+            ScheduleLine(
+                request.booking_id,
+                request.booking_public_id,
+                number,
+                from_paise(share),
+                due,
+            )
+            for number, (share, due) in enumerate(zip(shares, dates), start=1)
+        )
+    return lines
@@ -2,10 +2,65 @@ from __future__ import annotations
 
 from datetime import date
 from decimal import Decimal
-from typing import Annotated
+from typing import Annotated, Literal
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
+
+MAX_INSTALLMENTS = 24
+
+
+class InstallmentPlanConfig(BaseModel):
+    """How a booking total is split into installments and when each is due.
+
+    ``values`` are percentages (summing to 100) or fixed amounts. Fixed
+    amounts may leave out the installment named by ``remainderTo``, which
+    then takes whatever is left. Without ``values`` the plan is 25% at booking
+    and the rest in equal parts. Due dates come from ``daysBeforeDeparture``
+    (``null`` meaning at booking), else ``dueOffsetsDays`` from the booking
+    date, else one every ``intervalDays``.
+    """
+
+    installments: Annotated[int, Field(ge=2, le=MAX_INSTALLMENTS)] = 2
+    split: Literal["percent", "fixed"] = "percent"
+    values: list[Decimal] | None = None
+    remainder_to: Annotated[Literal["last", "first", "spread"], Field(alias="remainderTo")] = "last"
+    interval_days: Annotated[int, Field(alias="intervalDays", ge=0)] = 7
+    due_offsets_days: Annotated[list[int] | None, Field(alias="dueOffsetsDays")] = None
+    days_before_departure: Annotated[
+        list[int | None] | None, Field(alias="daysBeforeDeparture")
+    ] = None
+    skip_weekends: Annotated[bool, Field(alias="skipWeekends")] = False
+    holidays: list[date] = []
+
+    model_config = {"populate_by_name": True}
+
+    @model_validator(mode="after")
+    def validate_plan(self):
+        n = self.installments
+        if self.values is not None:
+            if any(value <= 0 for value in self.values):
+                raise ValueError("Installment values must be positive")
+            if self.split == "percent":
+                if len(self.values) != n:
+                    raise ValueError("Percent plans need one value per installment")
+                if sum(self.values) != 100:
+                    raise ValueError("Installment percentages must add up to 100")
+                if any(value != value.quantize(Decimal("0.01")) for value in self.values):
+                    raise ValueError("Percentages allow at most two decimals")
+            elif len(self.values) not in (n - 1, n):
+                raise ValueError("Fixed plans need one value per installment, or one less")
+        elif self.split == "fixed":
+            raise ValueError("Fixed plans need values")
+        if self.split == "fixed" and self.remainder_to == "spread":
+            raise ValueError("remainderTo 'spread' only applies to percent plans")
+        for name, offsets in (
+            ("dueOffsetsDays", self.due_offsets_days),
+            ("daysBeforeDeparture", self.days_before_departure),
+        ):
+            if offsets is not None and len(offsets) != n:
+                raise ValueError(f"{name} needs one entry per installment")
+        return self
 
 
 class CreateInstallmentsRequest(BaseModel):
@@ -13,9 +68,22 @@ class CreateInstallmentsRequest(BaseModel):
     booking_public_id: Annotated[str, Field(alias="bookingPublicId")]
     total_amount: Annotated[Decimal, Field(alias="totalAmount")]
     number_of_installments: Annotated[int, Field(alias="numberOfInstallments")] = 2
+    plan: InstallmentPlanConfig | None = None
+    tour_id: Annotated[UUID | None, Field(alias="tourId")] = None
+    departure_date: Annotated[date | None, Field(alias="departureDate")] = None
 
     model_config = {"populate_by_name": True}
 
+    @model_validator(mode="after")
+    def validate_installments(self):
+        if (
+            self.plan is not None
+            and "number_of_installments" in self.model_fields_set
+            and self.number_of_installments != self.plan.installments
+        ):
+            raise ValueError("numberOfInstallments does not match the plan's installments")
+        return self
+
 
 class InstallmentScheduleItem(BaseModel):
     booking_id: Annotated[UUID, Field(alias="bookingId")]
@@ -32,3 +100,48 @@ class CreateInstallmentsResponse(BaseModel):
     schedules: list[InstallmentScheduleItem]
 
     model_config = {"populate_by_name": True}
+
+
+class BulkCreateInstallmentsRequest(BaseModel):
+    items: list[CreateInstallmentsRequest]
+    # Used for items that carry no plan of their own.
+    plan: InstallmentPlanConfig | None = None
+
+    model_config = {"populate_by_name": True}
+
+
+class BulkScheduleResult(BaseModel):
+    booking_id: Annotated[UUID, Field(alias="bookingId")]
+    created: bool = False
+    schedules: list[InstallmentScheduleItem] = []
+    error: str | None = None
+
+    model_config = {"populate_by_name": True}
+
+
+class BulkCreateInstallmentsResponse(BaseModel):
+    results: list[BulkScheduleResult]
+
+    model_config = {"populate_by_name": True}
+
+
+class ReplanSchedulesRequest(BaseModel):
+    departure_date: Annotated[date, Field(alias="departureDate")]
+    tour_id: Annotated[UUID | None, Field(alias="tourId")] = None
+    booking_ids: Annotated[list[UUID] | None, Field(alias="bookingIds")] = None
+
+    model_config = {"populate_by_name": True}
+
+    @model_validator(mode="after")
+    def validate_target(self):
+        if (self.tour_id is None) == (self.booking_ids is None):
+            raise ValueError("Provide exactly one of tourId or bookingIds")
+        return self
+
+
+class ReplanSchedulesResponse(BaseModel):
+    bookings: int
+    installments_updated: Annotated[int, Field(alias="installmentsUpdated")]
+    failed: dict[str, str] = {}
+
+    model_config = {"populate_by_name": True}
@@ -1,13 +1,57 @@
 from __future__ import annotations
 
-from datetime import date, timedelta
+from datetime import date
 from decimal import Decimal, ROUND_HALF_UP
+from typing import Iterator
 import uuid
 
+from sqlalchemy import Row, column, exists, false, insert, true, update, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
 from app.api.bookings.models import BookingPaymentPlan, BookingPaymentSchedule
+from app.api.bookings.schedule_engine import (
+    ScheduleLine,
+    ScheduleRequest,
+    compute_schedules,
+    default_plan,
+    load_plan,
+)
+from app.api.bookings.schemas import CreateInstallmentsRequest, InstallmentPlanConfig
+from app.core.config import Config
+
+# asyncpg caps a statement at 32767 bind parameters.
+_MAX_BIND_PARAMS = 30_000
+_PLAN_PARAMS = 7
+_SCHEDULE_PARAMS = 7
+
+
+def schedule_rows(lines: list[ScheduleLine]) -> list[BookingPaymentSchedule]:
+    return [
+        BookingPaymentSchedule(
+            id=uuid.uuid4(),
+            booking_id=line.booking_id,
+            booking_public_id=line.booking_public_id,
+            installment_no=line.installment_no,
+            due_amount=line.due_amount,
+            due_date=line.due_date,
+            status="PENDING",
+        )
+        for line in lines
+    ]
+
+
+async def insert_schedule_rows(
+    db: AsyncSession, rows: list[BookingPaymentSchedule]
+) -> None:
+    """One multi-row INSERT for any number of installments."""
+    if rows:
+        await db.execute(
+            insert(BookingPaymentSchedule).values(
+                [row.model_dump(exclude={"created_at"}) for row in rows]
+            )
+        )
 
 
 async def create_installments(
@@ -16,6 +60,9 @@ async def create_installments(
     booking_public_id: str,
     total_amount: Decimal,
     number_of_installments: int = 2,
+    plan: InstallmentPlanConfig | None = None,
+    tour_id: uuid.UUID | None = None,
+    departure_date: date | None = None,
 ) -> list[BookingPaymentSchedule]:
     plan_stmt = select(BookingPaymentPlan).where(
         BookingPaymentPlan.booking_id == booking_id
@@ -30,65 +77,290 @@ async def create_installments(
     existing = result.scalars().all()
     if existing:
         if not existing_plan:
-            plan = BookingPaymentPlan(
+            plan_row = BookingPaymentPlan(
                 id=uuid.uuid4(),
                 booking_id=booking_id,
+                tour_id=tour_id,
                 total_amount=Decimal(total_amount).quantize(
                     Decimal("0.01"), rounding=ROUND_HALF_UP
                 ),
-                number_of_installments=number_of_installments,
+                number_of_installments=len(existing),
+                departure_date=departure_date,
             )
-            db.add(plan)
+            db.add(plan_row)
             await db.commit()
         return existing
 
-    if number_of_installments < 2:
-        raise ValueError("Installments must be >= 2")
-    if number_of_installments != 2:
-        raise ValueError("Only 2-installment schedule is supported")
+    if plan is None:
+        if number_of_installments < 2:
+            raise ValueError("Installments must be >= 2")
+        plan = default_plan(number_of_installments)
     if total_amount <= 0:
         raise ValueError("Invalid total amount")
 
     total_amount = Decimal(total_amount).quantize(
         Decimal("0.01"), rounding=ROUND_HALF_UP
     )
-    first_amount = (total_amount * Decimal("0.25")).quantize(
-        Decimal("0.01"), rounding=ROUND_HALF_UP
-    )
-    remaining_amount = (total_amount - first_amount).quantize(
-        Decimal("0.01"), rounding=ROUND_HALF_UP
+    lines = compute_schedules(
+        [
+            ScheduleRequest(
+                booking_id, booking_public_id, total_amount, plan, date.today(), departure_date
+            )
+        ]
     )
 
     if not existing_plan:
-        plan = BookingPaymentPlan(
-            id=uuid.uuid4(),
-            booking_id=booking_id,
-            total_amount=total_amount,
-            number_of_installments=number_of_installments,
+        db.add(
+            BookingPaymentPlan(
+                id=uuid.uuid4(),
+                booking_id=booking_id,
+                tour_id=tour_id,
+                total_amount=total_amount,
+                number_of_installments=plan.installments,
+                departure_date=departure_date,
+                plan_config=plan.model_dump(mode="json", by_alias=True),
+            )
         )
-        db.add(plan)
 
-    installments = [
-        BookingPaymentSchedule(
-            id=uuid.uuid4(),
-            booking_id=booking_id,
-            booking_public_id=booking_public_id,
-            installment_no=1,
-            due_amount=first_amount,
-            due_date=date.today(),
-            status="PENDING",
-        ),
-        BookingPaymentSchedule(
-            id=uuid.uuid4(),
-            booking_id=booking_id,
-            booking_public_id=booking_public_id,
-            installment_no=2,
-            due_amount=remaining_amount,
-            due_date=date.today() + timedelta(days=7),
-            status="PENDING",
-        ),
+    installments = schedule_rows(lines)
+    await insert_schedule_rows(db, installments)
+    await db.commit()
+    return installments
+
+
+def _upsert_chunks(requests: list[ScheduleRequest]) -> Iterator[list[ScheduleRequest]]:
+    chunk: list[ScheduleRequest] = []
+    params = 0
+    for request in requests:
+        # Plan row, its installment rows and one IN (...) parameter.
+        cost = _PLAN_PARAMS + _SCHEDULE_PARAMS * request.plan.installments + 1
+        if chunk and (
+            params + cost > _MAX_BIND_PARAMS or len(chunk) >= Config.SCHEDULE_BULK_CHUNK_SIZE
+        ):
+            yield chunk
+            chunk, params = [], 0
+        chunk.append(request)
+        params += cost
+    if chunk:
+        yield chunk
+
+
+def _upsert_statement(plan_rows: list[dict], schedule_rows: list[dict], booking_ids: list):
+    """Insert plans and schedules, returning every schedule row of the bookings.
+
+    Schedules are inserted only for bookings whose plan row this statement
+    inserted and that have no schedule rows yet, so a booking is either
+    scheduled whole or left as it was. ``inserted`` marks rows of bookings
+    scheduled now.
+
+    Sub-statements of one query all see the snapshot taken before it, so the
+    plain SELECT returns only rows that already existed and the RETURNING
+    side only rows this statement added: no duplicates, one round trip.
+    """
+    schedule = BookingPaymentSchedule.__table__
+    new_plans = (
+        pg_insert(BookingPaymentPlan)
+        .values(plan_rows)
+        .on_conflict_do_nothing(index_elements=["booking_id"])
+        .returning(BookingPaymentPlan.booking_id)
+        .cte("new_plans")
+    )
+    names = list(schedule_rows[0])
+    candidates = values(
+        *(column(name, schedule.c[name].type) for name in names), name="candidates"
+    ).data([tuple(row[name] for name in names) for row in schedule_rows])
+    new_schedules = (
+        pg_insert(schedule)
+        .from_select(
+            names,
+            select(*candidates.c).where(
+                candidates.c.booking_id.in_(select(new_plans.c.booking_id)),
+                ~exists().where(schedule.c.booking_id == candidates.c.booking_id),
+            ),
+        )
+        .on_conflict_do_nothing(index_elements=["booking_id", "installment_no"])
+        .returning(*schedule.c)
+        .cte("new_schedules")
+    )
+    return (
+        select(*new_schedules.c, true().label("inserted"))
+        .add_cte(new_plans)
+        .union_all(
+            select(*schedule.c, false().label("inserted")).where(
+                schedule.c.booking_id.in_(booking_ids)
+            )
+        )
+    )
+
+
+async def bulk_create_installments(
+    db: AsyncSession,
+    items: list[CreateInstallmentsRequest],
+    plan: InstallmentPlanConfig | None = None,
+) -> tuple[dict[uuid.UUID, list[Row]], set[uuid.UUID], dict[uuid.UUID, str]]:
+    """Schedules for many bookings in one transaction, chunked upserts.
+
+    Bookings that already have a plan or a schedule keep what they have.
+    Returns (schedule rows by booking ordered by installment, bookings
+    scheduled now, failures).
+    """
+    errors: dict[uuid.UUID, str] = {}
+    seen: set[uuid.UUID] = set()
+    requests: list[ScheduleRequest] = []
+    extras: dict[uuid.UUID, CreateInstallmentsRequest] = {}
+    today = date.today()
+    for item in items:
+        if item.booking_id in seen:
+            errors.setdefault(item.booking_id, "Duplicate bookingId in request")
+            continue
+        seen.add(item.booking_id)
+        try:
+            item_plan = item.plan or plan
+            if item_plan is None:
+                if item.number_of_installments < 2:
+                    raise ValueError("Installments must be >= 2")
+                item_plan = default_plan(item.number_of_installments)
+            elif (
+                "number_of_installments" in item.model_fields_set
+                and item.number_of_installments != item_plan.installments
+            ):
+                raise ValueError("numberOfInstallments does not match the plan's installments")
+        except ValueError as exc:
+            errors[item.booking_id] = str(exc)
+            continue
+        extras[item.booking_id] = item
+        requests.append(
+            ScheduleRequest(
+                item.booking_id,
+                item.booking_public_id,
+                item.total_amount,
+                item_plan,
+                today,
+                item.departure_date,
+            )
+        )
+
+    lines = compute_schedules(requests, errors)
+    lines_by_booking: dict[uuid.UUID, list[ScheduleLine]] = {}
+    for line in lines:
+        lines_by_booking.setdefault(line.booking_id, []).append(line)
+
+    schedules: dict[uuid.UUID, list[Row]] = {}
+    created: set[uuid.UUID] = set()
+    scheduled = [request for request in requests if request.booking_id in lines_by_booking]
+    for chunk in _upsert_chunks(scheduled):
+        plan_rows = []
+        schedule_row_values = []
+        for request in chunk:
+            item = extras[request.booking_id]
+            plan_rows.append(
+                {
+                    "id": uuid.uuid4(),
+                    "booking_id": request.booking_id,
+                    "tour_id": item.tour_id,
+                    "total_amount": Decimal(request.total_amount).quantize(
+                        Decimal("0.01"), rounding=ROUND_HALF_UP
+                    ),
+                    "number_of_installments": request.plan.installments,
+                    "departure_date": request.departure_date,
+                    "plan_config": request.plan.model_dump(mode="json", by_alias=True),
+                }
+            )
+            schedule_row_values.extend(
+                row.model_dump(exclude={"created_at"})
+                for row in schedule_rows(lines_by_booking[request.booking_id])
+            )
+        result = await db.execute(
+            _upsert_statement(
+                plan_rows, schedule_row_values, [request.booking_id for request in chunk]
+            )
+        )
+        for row in result:
+            schedules.setdefault(row.booking_id, []).append(row)
+            if row.inserted:
+                created.add(row.booking_id)
+    await db.commit()
+
+    for rows in schedules.values():
+        rows.sort(key=lambda row: row.installment_no)
+    return schedules, created, errors
+
+
+async def replan_schedules(
+    db: AsyncSession,
+    departure_date: date,
+    tour_id: uuid.UUID | None = None,
+    booking_ids: list[uuid.UUID] | None = None,
+) -> tuple[int, int, dict[uuid.UUID, str]]:
+    """Move unpaid due dates of matching plans to a new departure date.
+
+    Only plans with ``daysBeforeDeparture`` follow the departure; legacy
+    and offset-based plans are left alone and not counted. Amounts and paid
+    installments do not change. Returns (bookings, installments updated,
+    failures by booking id).
+    """
+    plan_stmt = select(BookingPaymentPlan)
+    if tour_id is not None:
+        plan_stmt = plan_stmt.where(BookingPaymentPlan.tour_id == tour_id)
+    else:
+        plan_stmt = plan_stmt.where(BookingPaymentPlan.booking_id.in_(booking_ids))
+    errors: dict[uuid.UUID, str] = {}
+    configs: dict[uuid.UUID, InstallmentPlanConfig] = {}
+    plans = []
+    for plan in (await db.execute(plan_stmt)).scalars().all():
+        try:
+            config = load_plan(plan.plan_config, plan.number_of_installments)
+        except ValueError as exc:
+            errors[plan.booking_id] = str(exc)
+            continue
+        if config.days_before_departure is not None:
+            configs[plan.booking_id] = config
+            plans.append(plan)
+    if not plans:
+        return 0, 0, errors
+
+    schedule_stmt = select(BookingPaymentSchedule).where(
+        BookingPaymentSchedule.booking_id.in_([plan.booking_id for plan in plans])
+    )
+    existing: dict[tuple[uuid.UUID, int], BookingPaymentSchedule] = {
+        (row.booking_id, row.installment_no): row
+        for row in (await db.execute(schedule_stmt)).scalars().all()
+    }
+    public_ids = {booking_id: row.booking_public_id for (booking_id, _), row in existing.items()}
+
+    requests = [
+        ScheduleRequest(
+            plan.booking_id,
+            public_ids[plan.booking_id],
+            plan.total_amount,
+            configs[plan.booking_id],
+            plan.created_at.date(),
+            departure_date,
+        )
+        for plan in plans
+        if plan.booking_id in public_ids
     ]
+    lines = compute_schedules(requests, errors)
 
-    db.add_all(installments)
+    changes = []
+    for line in lines:
+        row = existing.get((line.booking_id, line.installment_no))
+        if row is not None and row.status == "PENDING" and row.due_date != line.due_date:
+            changes.append({"id": row.id, "due_date": line.due_date})
+    if changes:
+        # ORM bulk UPDATE by primary key: one executemany round trip.
+        await db.execute(update(BookingPaymentSchedule), changes)
+
+    replanned = [
+        plan.id
+        for plan in plans
+        if plan.booking_id in public_ids and plan.booking_id not in errors
+    ]
+    if replanned:
+        await db.execute(
+            update(BookingPaymentPlan)
+            .where(BookingPaymentPlan.id.in_(replanned))
+            .values(departure_date=departure_date)
+        )
     await db.commit()
-    return installments
+    return len(replanned), len(changes), errors
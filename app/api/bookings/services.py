@@ -4,8 +4,21 @@ from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.bookings.helpers import to_schedule_response
-from app.api.bookings.schemas import CreateInstallmentsRequest, CreateInstallmentsResponse
-from app.api.bookings.service import create_installments
+from app.api.bookings.schemas import (
+    BulkCreateInstallmentsRequest,
+    BulkCreateInstallmentsResponse,
+    BulkScheduleResult,
+    CreateInstallmentsRequest,
+    CreateInstallmentsResponse,
+    ReplanSchedulesRequest,
+    ReplanSchedulesResponse,
+)
+from app.api.bookings.service import (
+    bulk_create_installments,
+    create_installments,
+    replan_schedules,
+)
+from app.core.config import Config
 
 
 async def create_booking_payment_schedule_service(
@@ -19,6 +32,9 @@ async def create_booking_payment_schedule_service(
             booking_public_id=payload.booking_public_id,
             total_amount=payload.total_amount,
             number_of_installments=payload.number_of_installments,
+            plan=payload.plan,
+            tour_id=payload.tour_id,
+            departure_date=payload.departure_date,
         )
     except ValueError as exc:
         raise HTTPException(
@@ -27,3 +43,55 @@ async def create_booking_payment_schedule_service(
         ) from exc
 
     return to_schedule_response(schedules)
+
+
+async def bulk_create_booking_payment_schedules_service(
+    payload: BulkCreateInstallmentsRequest,
+    session: AsyncSession,
+) -> BulkCreateInstallmentsResponse:
+    if len(payload.items) > Config.SCHEDULE_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {Config.SCHEDULE_BULK_MAX_ITEMS} bookings per request",
+        )
+    schedules, created, errors = await bulk_create_installments(
+        session, payload.items, payload.plan
+    )
+
+    results = []
+    reported: set = set()
+    for item in payload.items:
+        if item.booking_id in reported:
+            continue
+        reported.add(item.booking_id)
+        results.append(
+            BulkScheduleResult(
+                bookingId=item.booking_id,
+                created=item.booking_id in created,
+                schedules=to_schedule_response(schedules.get(item.booking_id, [])).schedules,
+                error=errors.get(item.booking_id),
+            )
+        )
+    return BulkCreateInstallmentsResponse(results=results)
+
+
+async def replan_booking_payment_schedules_service(
+    payload: ReplanSchedulesRequest,
+    session: AsyncSession,
+) -> ReplanSchedulesResponse:
+    if payload.booking_ids is not None and len(payload.booking_ids) > Config.SCHEDULE_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {Config.SCHEDULE_BULK_MAX_ITEMS} bookings per request",
+        )
+    bookings, updated, errors = await replan_schedules(
+        session,
+        payload.departure_date,
+        tour_id=payload.tour_id,
+        booking_ids=payload.booking_ids,
+    )
+    return ReplanSchedulesResponse(
+        bookings=bookings,
+        installmentsUpdated=updated,
+        failed={str(booking_id): reason for booking_id, reason in errors.items()},
+    )
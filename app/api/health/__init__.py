@@ -1,15 +1,22 @@
 from sqlalchemy import text
+from app.core.config import Config
 from app.db.main import async_engine
 from app.core.redis import redis_client
 import psutil
 import shutil
 import asyncio
+import time
 
+from app.core.middlewares import logger
+from app.gateways.razorpay_client import get_razorpay_client
+from app.invoices.lambda_pdf import _lambda_client
+from app.invoices.storage import _get_shared_s3_client
+from app.utils.event_publisher import _get_sqs_client
 
 
-async def check_database():
+async def check_database(timeout: float = Config.HEALTH_CHECK_TIMEOUT_SECONDS):
     try:
-        async with asyncio.timeout(2):
+        async with asyncio.timeout(timeout):
             async with async_engine.connect() as conn:
                 await conn.execute(text("SELECT 1"))
         return "up"
@@ -17,9 +24,9 @@ async def check_database():
         return "down"
 
 
-async def check_redis():
+async def check_redis(timeout: float = Config.HEALTH_CHECK_TIMEOUT_SECONDS):
     try:
-        async with asyncio.timeout(2):
+        async with asyncio.timeout(timeout):
             await redis_client.ping()
         return "up"
     except Exception:
@@ -43,4 +50,109 @@ def check_memory():
         "used_gb": round(mem.used / (1024 ** 3), 2),
         "available_gb": round(mem.available / (1024 ** 3), 2),
         "usage_percent": mem.percent
-    }
\ No newline at end of file
+    }
+
+
+async def _check_blocking(call, timeout: float):
+    # boto3 calls cannot be cancelled; the timeout only stops us waiting on them.
+    try:
+        async with asyncio.timeout(timeout):
+            await asyncio.to_thread(call)
+        return "up"
+    except Exception:
+        return "down"
+
+
+async def check_razorpay(timeout: float = Config.HEALTH_DEEP_TIMEOUT_SECONDS):
+    try:
+        status_code = await get_razorpay_client().ping(timeout=timeout)
+    except Exception:
+        return "down"
+    return "up" if status_code < 500 else "down"
+
+
+async def check_sqs(timeout: float = Config.HEALTH_DEEP_TIMEOUT_SECONDS):
+    if not Config.BOOKING_PAYMENT_QUEUE_URL:
+        return "not_configured"
+    return await _check_blocking(
+        lambda: _get_sqs_client().get_queue_attributes(
+            QueueUrl=Config.BOOKING_PAYMENT_QUEUE_URL,
+            AttributeNames=["ApproximateNumberOfMessages"],
+        ),
+        timeout,
+    )
+
+
+async def check_lambda(timeout: float = Config.HEALTH_DEEP_TIMEOUT_SECONDS):
+    if not Config.PDF_LAMBDA_FUNCTION_NAME:
+        return "not_configured"
+    return await _check_blocking(
+        lambda: _lambda_client().get_function_configuration(
+            FunctionName=Config.PDF_LAMBDA_FUNCTION_NAME
+        ),
+        timeout,
+    )
+
+
+async def check_s3(timeout: float = Config.HEALTH_DEEP_TIMEOUT_SECONDS):
+    if not Config.S3_BUCKET:
+        return "not_configured"
+    return await _check_blocking(
+        lambda: _get_shared_s3_client().head_bucket(Bucket=Config.S3_BUCKET), timeout
+    )
+
+
+async def collect_health():
+    db_status, redis_status, disk, memory = await asyncio.gather(
+        check_database(),
+        check_redis(),
+        asyncio.to_thread(check_disk),
+        asyncio.to_thread(check_memory),
+    )
+
+    status = "ok"
+    if db_status == "down" or redis_status == "down":
+        status = "degraded"
+
+    return {
+        "status": status,
+        "checks": {
+            "database": db_status,
+            "redis": redis_status,
+            "disk": disk,
+            "memory": memory
+        }
+    }
+
+
+_snapshot = None
+_snapshot_at = 0.0
+
+
+async def refresh_health():
+    global _snapshot, _snapshot_at
+    _snapshot = await collect_health()
+    _snapshot_at = time.monotonic()
+    return _snapshot
+
+
+def cached_health():
+    """Last snapshot, or None when the refresher has not run or has stalled."""
+    if _snapshot is None:
+        return None
+    if time.monotonic() - _snapshot_at > 3 * Config.HEALTH_REFRESH_INTERVAL_SECONDS:
+        return None
+    return _snapshot
+
+
+async def run_health_refresher(stop: asyncio.Event):
+    while not stop.is_set():
+        try:
+            await refresh_health()
+        except Exception as exc:
+            # A stale snapshot is reported as not ready.
+            logger.warning(f"Health refresh failed: {exc}")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=Config.HEALTH_REFRESH_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
@@ -1,33 +1,65 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 import asyncio
 from app.api.health import (
-    check_database,
-    check_redis,
-    check_disk,
-    check_memory
+    cached_health,
+    check_lambda,
+    check_razorpay,
+    check_s3,
+    check_sqs,
+    collect_health,
 )
+from app.db.main import get_pool_stats
+from app.utils.booking_service import get_booking_client_stats
 
 health_router = APIRouter()
+
+
 @health_router.get("/")
 async def health_check():
-    db_status, redis_status = await asyncio.gather(
-        check_database(),
-        check_redis()
-    )
+    return cached_health() or {"status": "starting", "checks": {}}
 
-    disk = check_disk()
-    memory = check_memory()
 
-    status = "ok"
-    if db_status == "down" or redis_status == "down":
-        status = "degraded"
+@health_router.get("/live")
+async def liveness():
+    # No I/O: the event loop answering is the signal.
+    return {"status": "ok"}
+
+
+@health_router.get("/ready")
+async def readiness():
+    # Redis outages are tolerated by the request path, so only the database gates traffic.
+    snapshot = cached_health()
+    if snapshot is None or snapshot["checks"]["database"] != "up":
+        return JSONResponse(
+            status_code=503,
+            content=snapshot or {"status": "starting", "checks": {}},
+        )
+    return snapshot
 
+
+@health_router.get("/deep")
+async def deep_health():
+    local, razorpay, sqs, lambda_status, s3 = await asyncio.gather(
+        collect_health(),
+        check_razorpay(),
+        check_sqs(),
+        check_lambda(),
+        check_s3(),
+    )
+    dependencies = {"razorpay": razorpay, "sqs": sqs, "lambda": lambda_status, "s3": s3}
+    status = local["status"]
+    if "down" in dependencies.values():
+        status = "degraded"
     return {
         "status": status,
-        "checks": {
-            "database": db_status,
-            "redis": redis_status,
-            "disk": disk,
-            "memory": memory
-        }
-    }
\ No newline at end of file
+        "checks": {**local["checks"], **dependencies},
+    }
+
+
+@health_router.get("/stats")
+async def runtime_stats():
+    return {
+        "dbPool": get_pool_stats(),
+        "bookingClient": get_booking_client_stats(),
+    }
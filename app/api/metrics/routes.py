@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from app.core.metrics import refresh_webhook_backlog
+from app.core.middlewares import logger
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def metrics():
+    try:
+        await refresh_webhook_backlog()
+    except Exception as exc:
+        logger.warning(f"Webhook backlog refresh failed: {exc}")
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -7,7 +7,7 @@ from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
-from app.api.bookings.models import BookingPaymentSchedule
+from app.api.bookings.models import BookingPaymentPlan, BookingPaymentSchedule
 
 
 def generate_transaction_id() -> str:
@@ -39,3 +39,11 @@ async def get_installment(
     if installment.status == "PAID":
         raise HTTPException(status_code=409, detail="Installment already paid")
     return installment
+
+
+async def get_installment_total(db: AsyncSession, booking_id: str) -> int | None:
+    stmt = select(BookingPaymentPlan.number_of_installments).where(
+        BookingPaymentPlan.booking_id == booking_id
+    )
+    result = await db.execute(stmt)
+    return result.scalars().first()
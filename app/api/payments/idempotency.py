@@ -0,0 +1,228 @@
+"""Idempotency-Key handling for mutating payment routes.
+
+Keys are scoped to the authenticated user. Redis holds a short
+``processing`` lock (``SET NX``) while the first request runs and the
+finished response afterwards, so retries are answered without touching
+Postgres. ``idempotency_records`` keeps the response durably in case
+the Redis entry is gone.
+
+Streaming routes have no response body to store; they are marked with
+``self_managed_idempotency`` and keep their own durable record.
+"""
+from __future__ import annotations
+
+from datetime import timedelta
+import hashlib
+import json
+from typing import Awaitable, Callable
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from app.api.payments.models import IdempotencyRecord
+from app.core.config import Config
+from app.core.middlewares import logger
+from app.core.redis import redis_client
+from app.core.request_context import get_idempotency_key
+from app.db.main import async_session_factory
+
+MUTATING_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+REPLAY_HEADER = "Idempotent-Replayed"
+
+_PROCESSING = "processing"
+_COMPLETED = "completed"
+
+
+def _redis_key(key: str) -> str:
+    return f"idempotency:{key}"
+
+
+def request_user_id(request: Request) -> str:
+    user_context = getattr(request.state, "user_context", None)
+    return (user_context.user_id if user_context is not None else None) or "anonymous"
+
+
+def scoped_key(user_id: str, key: str) -> str:
+    """Keys are per user: one user's key can never replay another user's response."""
+    return f"{user_id}:{key}"
+
+
+def compute_request_hash(request: Request, body: bytes, user_id: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(user_id.encode())
+    digest.update(b" ")
+    digest.update(request.method.encode())
+    digest.update(b" ")
+    digest.update(request.url.path.encode())
+    digest.update(b"\n")
+    digest.update(body)
+    return digest.hexdigest()
+
+
+def _replay(record: dict) -> Response:
+    return JSONResponse(
+        status_code=record["statusCode"],
+        content=record["body"],
+        headers={REPLAY_HEADER: "true"},
+    )
+
+
+def idempotency_mismatch() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail="Idempotency-Key was already used with a different request",
+    )
+
+
+async def _acquire(key: str, request_hash: str) -> tuple[bool, dict | None]:
+    """Try to take the processing lock. Returns (acquired, existing_record)."""
+    value = json.dumps({"state": _PROCESSING, "hash": request_hash})
+    acquired = await redis_client.set(
+        _redis_key(key), value, nx=True, ex=Config.IDEMPOTENCY_LOCK_TTL_SECONDS
+    )
+    if acquired:
+        return True, None
+    cached = await redis_client.get(_redis_key(key))
+    return False, json.loads(cached) if cached else None
+
+
+async def _release(key: str) -> None:
+    try:
+        await redis_client.delete(_redis_key(key))
+    except Exception as exc:
+        logger.warning(f"Idempotency lock release failed for key={key}: {exc}")
+
+
+async def _load_record(key: str) -> IdempotencyRecord | None:
+    async with async_session_factory() as session:
+        return await session.get(IdempotencyRecord, key)
+
+
+async def _cache_completed(key: str, request_hash: str, record: dict) -> None:
+    try:
+        await redis_client.set(
+            _redis_key(key),
+            json.dumps({"state": _COMPLETED, "hash": request_hash, **record}),
+            ex=Config.IDEMPOTENCY_TTL_SECONDS,
+        )
+    except Exception as exc:
+        logger.warning(f"Idempotency cache write failed for key={key}: {exc}")
+
+
+async def _store(key: str, request_hash: str, record: dict) -> None:
+    async with async_session_factory() as session:
+        await session.execute(
+            insert(IdempotencyRecord.__table__)
+            .values(key=key, request_hash=request_hash, response=record)
+            .on_conflict_do_nothing(index_elements=["key"])
+        )
+        await session.commit()
+    await _cache_completed(key, request_hash, record)
+
+
+async def run_idempotent(
+    request: Request,
+    key: str,
+    call_next: Callable[[Request], Awaitable[Response]],
+) -> Response:
+    body = await request.body()
+    user_id = request_user_id(request)
+    key = scoped_key(user_id, key)
+    request_hash = compute_request_hash(request, body, user_id)
+
+    locked = False
+    try:
+        locked, cached = await _acquire(key, request_hash)
+    except Exception as exc:
+        # Redis is an accelerator here; Postgres still stops duplicate replays.
+        logger.warning(f"Idempotency lock unavailable for key={key}: {exc}")
+        cached = None
+
+    if cached is not None:
+        if cached.get("hash") != request_hash:
+            raise idempotency_mismatch()
+        if cached.get("state") == _COMPLETED:
+            return _replay(cached)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is already in progress",
+        )
+
+    try:
+        stored = await _load_record(key)
+        if stored is not None:
+            if stored.request_hash != request_hash:
+                raise idempotency_mismatch()
+            if stored.response:
+                await _cache_completed(key, request_hash, stored.response)
+                return _replay(stored.response)
+
+        response = await call_next(request)
+    except BaseException:
+        if locked:
+            await _release(key)
+        raise
+
+    if 200 <= response.status_code < 300 and hasattr(response, "body"):
+        try:
+            record = {"statusCode": response.status_code, "body": json.loads(response.body)}
+            await _store(key, request_hash, record)
+            return response
+        except Exception as exc:
+            logger.error(f"Idempotency record write failed for key={key}: {exc}")
+    if locked:
+        await _release(key)
+    return response
+
+
+_self_managed: set[Callable] = set()
+
+
+def self_managed_idempotency(endpoint: Callable) -> Callable:
+    """Exempts an endpoint that enforces Idempotency-Key itself from IdempotentRoute."""
+    _self_managed.add(endpoint)
+    return endpoint
+
+
+class IdempotentRoute(APIRoute):
+    """Applies Idempotency-Key semantics to mutating requests that send one."""
+
+    def get_route_handler(self) -> Callable[[Request], Awaitable[Response]]:
+        handler = super().get_route_handler()
+        if self.endpoint in _self_managed:
+            return handler
+
+        async def idempotent_handler(request: Request) -> Response:
+            key = get_idempotency_key(request)
+            if request.method not in MUTATING_METHODS or not key:
+                return await handler(request)
+            return await run_idempotent(request, key, handler)
+
+        return idempotent_handler
+
+
+async def purge_expired_idempotency_records(
+    session: AsyncSession, batch_size: int = 5000
+) -> int:
+    """Delete records older than IDEMPOTENCY_TTL_SECONDS in bounded batches."""
+    cutoff = func.now() - timedelta(seconds=Config.IDEMPOTENCY_TTL_SECONDS)
+    deleted = 0
+    while True:
+        expired = (
+            select(IdempotencyRecord.key)
+            .where(IdempotencyRecord.created_at < cutoff)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        result = await session.execute(
+            delete(IdempotencyRecord).where(IdempotencyRecord.key.in_(expired))
+        )
+        await session.commit()
+        deleted += result.rowcount or 0
+        if (result.rowcount or 0) < batch_size:
+            return deleted
@@ -1,5 +1,8 @@
 from app.api.payments.models.payment_transaction import PaymentTransaction
+from app.api.payments.models.bulk_refund_job import BulkRefundJob
 from app.api.payments.models.credit_note import CreditNote
+from app.api.payments.models.document_number_counter import DocumentNumberCounter
+from app.api.payments.models.event_outbox import OutboxEvent
 from app.api.payments.models.idempotency_record import IdempotencyRecord
 from app.api.payments.models.invoice import Invoice
 from app.api.payments.models.payment_webhook import PaymentWebhook
@@ -7,10 +10,13 @@ from app.api.payments.models.refund import RefundTransaction
 
 
 __all__ = [
+    "BulkRefundJob",
     "CreditNote",
+    "DocumentNumberCounter",
     "PaymentTransaction",
     "IdempotencyRecord",
     "Invoice",
+    "OutboxEvent",
     "PaymentWebhook",
     "RefundTransaction",
 ]
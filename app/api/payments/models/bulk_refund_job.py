@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, String, Text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from sqlmodel import Field, SQLModel
+
+
+class BulkRefundJob(SQLModel, table=True):
+    """One POST /refunds/bulk run, keyed like idempotency_records."""
+
+    __tablename__ = "bulk_refund_jobs"
+
+    # "<user id>:<Idempotency-Key>"
+    key: str = Field(sa_column=Column("key", String(150), primary_key=True))
+    request_hash: str = Field(sa_column=Column(Text, nullable=False))
+    # RUNNING until every item has settled, then COMPLETED.
+    status: str = Field(sa_column=Column(String(20), nullable=False))
+    results: list | None = Field(default=None, sa_column=Column(JSONB))
+    summary: dict | None = Field(default=None, sa_column=Column(JSONB))
+    created_at: datetime = Field(
+        sa_column=Column(DateTime, nullable=False, server_default=func.now())
+    )
+    completed_at: datetime | None = Field(default=None, sa_column=Column(DateTime))
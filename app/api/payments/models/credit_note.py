@@ -4,13 +4,22 @@ from datetime import datetime
 from decimal import Decimal
 import uuid
 
-from sqlalchemy import Column, DateTime, ForeignKey, Numeric, String, Text
+from sqlalchemy import Column, DateTime, Integer, ForeignKey, Index, Numeric, String, Text, text
 from sqlalchemy.sql import func
 from sqlmodel import Field, SQLModel
 
 
 class CreditNote(SQLModel, table=True):
     __tablename__ = "credit_notes"
+    __table_args__ = (
+        Index("idx_credit_note_invoice_id", "invoice_id"),
+        Index(
+            "idx_credit_note_pdf_pending",
+            "pdf_attempts",
+            "created_at",
+            postgresql_where=text("pdf_url IS NULL"),
+        ),
+    )
 
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, nullable=False)
     credit_note_number: str = Field(
@@ -29,6 +38,11 @@ class CreditNote(SQLModel, table=True):
     )
     amount: Decimal = Field(sa_column=Column(Numeric(12, 2), nullable=False))
     pdf_url: str | None = Field(default=None, sa_column=Column(Text))
+    pdf_attempts: int = Field(
+        default=0, sa_column=Column(Integer, nullable=False, server_default="0")
+    )
+    pdf_next_attempt_at: datetime | None = Field(default=None, sa_column=Column(DateTime))
+    pdf_last_error: str | None = Field(default=None, sa_column=Column(Text))
     created_at: datetime = Field(
         sa_column=Column(DateTime, nullable=False, server_default=func.now())
     )
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+from sqlalchemy.sql import func
+from sqlmodel import Field, SQLModel
+
+
+class DocumentNumberCounter(SQLModel, table=True):
+    __tablename__ = "document_number_counters"
+
+    series: str = Field(sa_column=Column("series", String(10), primary_key=True))
+    year: int = Field(sa_column=Column("year", Integer, primary_key=True))
+    next_value: int = Field(sa_column=Column(BigInteger, nullable=False))
+    updated_at: datetime = Field(
+        sa_column=Column(
+            DateTime,
+            nullable=False,
+            server_default=func.now(),
+            onupdate=func.now(),
+        )
+    )
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from datetime import datetime
+import uuid
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from sqlmodel import Field, SQLModel
+
+
+class OutboxEvent(SQLModel, table=True):
+    __tablename__ = "event_outbox"
+    __table_args__ = (
+        Index(
+            "idx_event_outbox_pending",
+            "created_at",
+            postgresql_where=text("delivered_at IS NULL"),
+        ),
+    )
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, nullable=False)
+    event_type: str = Field(sa_column=Column(String(50), nullable=False))
+    # SQS FIFO message group: the payment transaction the event belongs to.
+    message_group_id: str | None = Field(default=None, sa_column=Column(String(128)))
+    payload: dict = Field(sa_column=Column(JSONB, nullable=False))
+    attempts: int = Field(
+        default=0, sa_column=Column(Integer, nullable=False, server_default="0")
+    )
+    last_error: str | None = Field(default=None, sa_column=Column(Text))
+    next_attempt_at: datetime | None = Field(default=None, sa_column=Column(DateTime))
+    created_at: datetime = Field(
+        sa_column=Column(DateTime, nullable=False, server_default=func.now())
+    )
+    delivered_at: datetime | None = Field(default=None, sa_column=Column(DateTime))
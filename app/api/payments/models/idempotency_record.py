@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, String, Text
+from sqlalchemy import Column, DateTime, Index, String, Text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from sqlmodel import Field, SQLModel
@@ -10,8 +10,12 @@ from sqlmodel import Field, SQLModel
 
 class IdempotencyRecord(SQLModel, table=True):
     __tablename__ = "idempotency_records"
+    __table_args__ = (
+        Index("idx_idempotency_record_created_at", "created_at"),
+    )
 
-    key: str = Field(sa_column=Column("key", String(100), primary_key=True))
+    # "<user id>:<Idempotency-Key>"
+    key: str = Field(sa_column=Column("key", String(150), primary_key=True))
     request_hash: str | None = Field(default=None, sa_column=Column(Text))
     response: dict | None = Field(default=None, sa_column=Column(JSONB))
     created_at: datetime = Field(
@@ -4,13 +4,24 @@ from datetime import datetime
 from decimal import Decimal
 import uuid
 
-from sqlalchemy import Column, DateTime, Numeric, String, Text
+from sqlalchemy import Column, DateTime, Integer, Index, Numeric, String, Text, text
 from sqlalchemy.sql import func
 from sqlmodel import Field, SQLModel
 
 
 class Invoice(SQLModel, table=True):
     __tablename__ = "invoices"
+    __table_args__ = (
+        Index("idx_invoice_transaction_id", "transaction_id"),
+        Index(
+            "idx_invoice_pdf_pending",
+            "pdf_attempts",
+            "issued_at",
+            postgresql_where=text("pdf_url IS NULL"),
+        ),
+        Index("idx_invoice_booking_issued", "booking_id", "issued_at", "id"),
+        Index("idx_invoice_issued", "issued_at", "id"),
+    )
 
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, nullable=False)
     invoice_no: str = Field(
@@ -30,6 +41,11 @@ class Invoice(SQLModel, table=True):
     amount: Decimal = Field(sa_column=Column(Numeric(12, 2), nullable=False))
     tax_amount: Decimal | None = Field(default=None, sa_column=Column(Numeric(12, 2)))
     pdf_url: str | None = Field(default=None, sa_column=Column(Text))
+    pdf_attempts: int = Field(
+        default=0, sa_column=Column(Integer, nullable=False, server_default="0")
+    )
+    pdf_next_attempt_at: datetime | None = Field(default=None, sa_column=Column(DateTime))
+    pdf_last_error: str | None = Field(default=None, sa_column=Column(Text))
     currency: str | None = Field(
         default="INR", sa_column=Column(String(10), server_default="INR")
     )
@@ -13,8 +13,12 @@ class PaymentTransaction(SQLModel, table=True):
     __tablename__ = "payment_transactions"
     __table_args__ = (
         Index("idx_payment_transaction_id", "transaction_id"),
-        Index("idx_payment_booking_id", "booking_id"),
+        Index("idx_payment_booking_created", "booking_id", "created_at", "id"),
+        Index("idx_payment_user_created", "user_id", "created_at", "id"),
+        Index("idx_payment_created", "created_at", "id"),
         Index("idx_payment_gateway", "gateway"),
+        Index("idx_payment_gateway_order_id", "gateway_order_id"),
+        Index("idx_payment_booking_public_status", "booking_public_id", "status"),
     )
 
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, nullable=False)
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 import uuid
 
-from sqlalchemy import Boolean, Column, DateTime, Index, String
+from sqlalchemy import Boolean, Column, DateTime, Index, Integer, String, Text, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from sqlmodel import Field, SQLModel
@@ -13,6 +13,12 @@ class PaymentWebhook(SQLModel, table=True):
     __tablename__ = "payment_webhooks"
     __table_args__ = (
         Index("idx_payment_webhook_gateway", "gateway"),
+        Index("uq_payment_webhook_event", "event_id", "event_type", unique=True),
+        Index(
+            "idx_payment_webhook_unprocessed",
+            "created_at",
+            postgresql_where=text("processed = false"),
+        ),
     )
 
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, nullable=False)
@@ -25,6 +31,13 @@ class PaymentWebhook(SQLModel, table=True):
     processed: bool = Field(
         default=False, sa_column=Column(Boolean, nullable=False, server_default="false")
     )
+    ordering_key: str | None = Field(default=None, sa_column=Column(String(100)))
+    attempts: int = Field(
+        default=0, sa_column=Column(Integer, nullable=False, server_default="0")
+    )
+    locked_until: datetime | None = Field(default=None, sa_column=Column(DateTime))
+    last_error: str | None = Field(default=None, sa_column=Column(Text))
+    processed_at: datetime | None = Field(default=None, sa_column=Column(DateTime))
     created_at: datetime = Field(
         sa_column=Column(DateTime, nullable=False, server_default=func.now())
     )
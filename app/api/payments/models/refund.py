@@ -4,13 +4,17 @@ from datetime import datetime
 from decimal import Decimal
 import uuid
 
-from sqlalchemy import Column, DateTime, ForeignKey, Numeric, String, Text
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Numeric, String, Text
 from sqlalchemy.sql import func
 from sqlmodel import Field, SQLModel
 
 
 class RefundTransaction(SQLModel, table=True):
     __tablename__ = "refund_transactions"
+    __table_args__ = (
+        Index("idx_refund_payment_transaction_id", "payment_transaction_id"),
+        Index("idx_refund_created", "created_at", "id"),
+    )
 
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True, nullable=False)
     payment_transaction_id: uuid.UUID = Field(
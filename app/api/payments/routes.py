@@ -1,9 +1,18 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Request, status, HTTPException
+from datetime import date, datetime
+from typing import Literal
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Query, Request, status, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.payments.idempotency import IdempotentRoute, self_managed_idempotency
 from app.api.payments.schemas import (
+    BulkRefundRequest,
+    InvoiceSignedUrlBatchRequest,
+    InvoiceSignedUrlBatchResponse,
     InvoiceSignedUrlResponse,
     PaymentInitiateRequest,
     PaymentInitiateResponse,
@@ -12,15 +21,51 @@ from app.api.payments.schemas import (
     RefundRequest,
     RefundResponse,
 )
+from app.api.payments.services.bulk_refund_service import bulk_refund_service
+from app.api.payments.services.export_service import export_finance_table_service
+from app.api.payments.services.history_service import (
+    HistoryQuery,
+    list_history_service,
+    prepare_history_stream,
+)
 from app.api.payments.services.payment_service import (
     generate_invoice_signed_url_service,
+    generate_invoice_signed_urls_service,
     initiate_payment_service,
     initiate_refund_service,
     verify_payment_service,
 )
 from app.api.payments.services.webhook_service import process_webhook_service
-from app.db.main import get_session
-payments_router = APIRouter()
+from app.core.config import Config
+from app.db.main import get_read_session, get_session
+
+payments_router = APIRouter(route_class=IdempotentRoute)
+
+
+def history_query(
+    user_id: UUID | None = Query(None, alias="userId"),
+    booking_id: UUID | None = Query(None, alias="bookingId"),
+    created_from: datetime | None = Query(None, alias="from"),
+    created_to: datetime | None = Query(None, alias="to"),
+    cursor: str | None = None,
+    limit: int = Query(Config.HISTORY_PAGE_DEFAULT_SIZE, ge=1, le=Config.HISTORY_PAGE_MAX_SIZE),
+) -> HistoryQuery:
+    return HistoryQuery(user_id, booking_id, created_from, created_to, cursor, limit)
+
+
+async def _history_response(
+    resource: str,
+    request: Request,
+    query: HistoryQuery,
+    output: str,
+    session: AsyncSession,
+):
+    if output == "ndjson":
+        return StreamingResponse(
+            prepare_history_stream(resource, request, query),
+            media_type="application/x-ndjson",
+        )
+    return await list_history_service(resource, request, query, session)
 
 
 @payments_router.post(
@@ -50,6 +95,12 @@ async def initiate_refund(
     return await initiate_refund_service(payload, session)
 
 
+@payments_router.post("/refunds/bulk", status_code=status.HTTP_200_OK)
+@self_managed_idempotency
+async def initiate_bulk_refund(request: Request, payload: BulkRefundRequest):
+    return await bulk_refund_service(request, payload)
+
+
 @payments_router.post(
     "/verify",
     response_model=PaymentVerifyResponse,
@@ -79,10 +130,65 @@ async def razorpay_webhook(
 async def generate_invoice_signed_url(
     invoice_no: str,
     expires_in: int = 3600,
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
 ):
     return await generate_invoice_signed_url_service(
         invoice_no=invoice_no,
         session=session,
         expires_in=expires_in,
     )
+
+
+@payments_router.post(
+    "/invoices/signed-urls",
+    response_model=InvoiceSignedUrlBatchResponse,
+    response_model_by_alias=True,
+    status_code=status.HTTP_200_OK,
+)
+async def generate_invoice_signed_urls(
+    payload: InvoiceSignedUrlBatchRequest,
+    session: AsyncSession = Depends(get_read_session),
+):
+    return await generate_invoice_signed_urls_service(payload, session)
+
+
+@payments_router.get("/transactions", status_code=status.HTTP_200_OK)
+async def list_transactions(
+    request: Request,
+    query: HistoryQuery = Depends(history_query),
+    output: Literal["json", "ndjson"] = Query("json", alias="format"),
+    session: AsyncSession = Depends(get_read_session),
+):
+    return await _history_response("transactions", request, query, output, session)
+
+
+@payments_router.get("/refunds", status_code=status.HTTP_200_OK)
+async def list_refunds(
+    request: Request,
+    query: HistoryQuery = Depends(history_query),
+    output: Literal["json", "ndjson"] = Query("json", alias="format"),
+    session: AsyncSession = Depends(get_read_session),
+):
+    return await _history_response("refunds", request, query, output, session)
+
+
+@payments_router.get("/invoices", status_code=status.HTTP_200_OK)
+async def list_invoices(
+    request: Request,
+    query: HistoryQuery = Depends(history_query),
+    output: Literal["json", "ndjson"] = Query("json", alias="format"),
+    session: AsyncSession = Depends(get_read_session),
+):
+    return await _history_response("invoices", request, query, output, session)
+
+
+@payments_router.get("/exports/{table}", status_code=status.HTTP_200_OK)
+async def export_finance_table(
+    request: Request,
+    table: Literal["transactions", "refunds", "invoices", "credit_notes"],
+    start: date = Query(..., alias="from"),
+    end: date = Query(..., alias="to"),
+    fmt: Literal["csv", "parquet"] = Query("csv", alias="format"),
+    compress: bool = Query(False, alias="gzip"),
+):
+    return export_finance_table_service(request, table, start, end, fmt, compress)
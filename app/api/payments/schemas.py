@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from datetime import datetime
 from decimal import Decimal
 from typing import Annotated, Literal
 from uuid import UUID
@@ -62,9 +63,15 @@ class RefundRequest(BaseModel):
     model_config = {"populate_by_name": True}
 
 
+class BulkRefundRequest(BaseModel):
+    items: Annotated[list[RefundRequest], Field(min_length=1)]
+
+
 class RefundResponse(BaseModel):
     status: str
     refunded_amount: Annotated[Decimal, Field(alias="refundedAmount")]
+    # Sent to the gateway without a definite answer; settled by the sweeper.
+    pending_amount: Annotated[Decimal, Field(alias="pendingAmount")] = Decimal("0.00")
 
     model_config = {"populate_by_name": True}
 
@@ -75,3 +82,67 @@ class InvoiceSignedUrlResponse(BaseModel):
     expires_in: Annotated[int, Field(alias="expiresIn")]
 
     model_config = {"populate_by_name": True}
+
+
+class InvoiceSignedUrlBatchRequest(BaseModel):
+    invoice_nos: Annotated[list[str], Field(alias="invoiceNos", min_length=1)]
+    expires_in: Annotated[int, Field(alias="expiresIn")] = 3600
+
+    model_config = {"populate_by_name": True}
+
+
+class InvoiceSignedUrlBatchResponse(BaseModel):
+    items: list[InvoiceSignedUrlResponse]
+    not_found: Annotated[list[str], Field(alias="notFound")]
+
+    model_config = {"populate_by_name": True}
+
+
+class TransactionHistoryItem(BaseModel):
+    id: UUID
+    transaction_id: Annotated[str, Field(alias="transactionId")]
+    booking_id: Annotated[UUID, Field(alias="bookingId")]
+    booking_public_id: Annotated[str, Field(alias="bookingPublicId")]
+    user_id: Annotated[UUID, Field(alias="userId")]
+    amount: Decimal
+    currency: str
+    payment_type: Annotated[str, Field(alias="paymentType")]
+    installment_no: Annotated[int | None, Field(alias="installmentNo")] = None
+    installment_total: Annotated[int | None, Field(alias="installmentTotal")] = None
+    status: str
+    refund_amount: Annotated[Decimal | None, Field(alias="refundAmount")] = None
+    refund_status: Annotated[str, Field(alias="refundStatus")]
+    gateway_order_id: Annotated[str | None, Field(alias="gatewayOrderId")] = None
+    gateway_payment_id: Annotated[str | None, Field(alias="gatewayPaymentId")] = None
+    created_at: Annotated[datetime, Field(alias="createdAt")]
+
+    model_config = {"populate_by_name": True, "from_attributes": True}
+
+
+class RefundHistoryItem(BaseModel):
+    id: UUID
+    refund_id: Annotated[str, Field(alias="refundId")]
+    payment_transaction_id: Annotated[UUID, Field(alias="paymentTransactionId")]
+    amount: Decimal
+    status: str
+    reason: str | None = None
+    created_at: Annotated[datetime, Field(alias="createdAt")]
+
+    model_config = {"populate_by_name": True, "from_attributes": True}
+
+
+class InvoiceHistoryItem(BaseModel):
+    id: UUID
+    invoice_no: Annotated[str, Field(alias="invoiceNo")]
+    booking_id: Annotated[UUID, Field(alias="bookingId")]
+    booking_public_id: Annotated[str, Field(alias="bookingPublicId")]
+    transaction_id: Annotated[UUID, Field(alias="transactionId")]
+    transaction_public_id: Annotated[str, Field(alias="transactionPublicId")]
+    amount: Decimal
+    tax_amount: Annotated[Decimal | None, Field(alias="taxAmount")] = None
+    currency: str | None = None
+    status: str | None = None
+    pdf_available: Annotated[bool, Field(alias="pdfAvailable")]
+    issued_at: Annotated[datetime, Field(alias="issuedAt")]
+
+    model_config = {"populate_by_name": True}
@@ -0,0 +1,114 @@
+"""POST /refunds/bulk, made safe to retry.
+
+The refunds stream out as they settle, so there is no response body for
+``IdempotentRoute`` to store. Instead the route requires an Idempotency-Key
+and claims a ``bulk_refund_jobs`` row for it before any refund starts. The
+row stays RUNNING until every item has settled, even if the client has
+gone, then holds the per-item results. A retry with the same key is
+answered from the row and never reaches the gateway. A job cut short by a
+crash stays RUNNING, and its key keeps answering 409.
+"""
+from __future__ import annotations
+
+import json
+from typing import AsyncIterator
+
+from fastapi import HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert
+
+from app.api.payments.idempotency import (
+    REPLAY_HEADER,
+    compute_request_hash,
+    idempotency_mismatch,
+    request_user_id,
+    scoped_key,
+)
+from app.api.payments.models import BulkRefundJob
+from app.api.payments.schemas import BulkRefundRequest
+from app.api.payments.services.refund_service import bulk_summary, stream_bulk_refunds
+from app.core.config import Config
+from app.core.middlewares import logger
+from app.core.request_context import get_idempotency_key, is_admin_user
+from app.db.main import async_session_factory
+
+NDJSON = "application/x-ndjson"
+
+
+async def claim_bulk_refund_job(key: str, request_hash: str) -> BulkRefundJob | None:
+    """Creates the RUNNING row; returns None if this call created it, else the existing job."""
+    async with async_session_factory() as session:
+        created = await session.scalar(
+            insert(BulkRefundJob.__table__)
+            .values(key=key, request_hash=request_hash, status="RUNNING")
+            .on_conflict_do_nothing(index_elements=["key"])
+            .returning(BulkRefundJob.__table__.c.key)
+        )
+        await session.commit()
+        if created is not None:
+            return None
+        return await session.get(BulkRefundJob, key)
+
+
+def _completer(key: str):
+    async def complete(results: list[dict]) -> None:
+        try:
+            async with async_session_factory() as session:
+                await session.execute(
+                    update(BulkRefundJob)
+                    .where(BulkRefundJob.key == key)
+                    .values(
+                        status="COMPLETED",
+                        results=results,
+                        summary=bulk_summary(results),
+                        completed_at=func.now(),
+                    )
+                )
+                await session.commit()
+        except Exception as exc:
+            # The row stays RUNNING, so retries keep getting 409, never a re-run.
+            logger.error(f"Bulk refund job write failed for key={key}: {exc}")
+
+    return complete
+
+
+async def replay_bulk_refund_job(job: BulkRefundJob) -> AsyncIterator[str]:
+    for result in job.results or []:
+        yield json.dumps(result) + "\n"
+    yield json.dumps({"summary": job.summary}) + "\n"
+
+
+async def bulk_refund_service(request: Request, payload: BulkRefundRequest) -> StreamingResponse:
+    is_admin_user(request)
+    idempotency_key = get_idempotency_key(request)
+    if not idempotency_key:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Idempotency-Key header is required for bulk refunds",
+        )
+    if len(payload.items) > Config.REFUND_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {Config.REFUND_BULK_MAX_ITEMS} refunds per request",
+        )
+
+    user_id = request_user_id(request)
+    key = scoped_key(user_id, idempotency_key)
+    request_hash = compute_request_hash(request, await request.body(), user_id)
+    job = await claim_bulk_refund_job(key, request_hash)
+    if job is None:
+        return StreamingResponse(
+            stream_bulk_refunds(payload.items, on_complete=_completer(key)),
+            media_type=NDJSON,
+        )
+    if job.request_hash != request_hash:
+        raise idempotency_mismatch()
+    if job.status != "COMPLETED":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A bulk refund with this Idempotency-Key is still running",
+        )
+    return StreamingResponse(
+        replay_bulk_refund_job(job), media_type=NDJSON, headers={REPLAY_HEADER: "true"}
+    )
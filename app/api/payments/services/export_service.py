@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from datetime import date
+
+from fastapi import HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+
+from app.core.request_context import is_admin_user
+from app.exports.service import export_stream
+from app.exports.writers import content_type, export_filename, parquet_available
+
+
+def export_finance_table_service(
+    request: Request,
+    table: str,
+    start: date,
+    end: date,
+    fmt: str,
+    compress: bool,
+) -> StreamingResponse:
+    is_admin_user(request)
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'from' must be earlier than 'to'",
+        )
+    if fmt == "parquet" and not parquet_available():
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Parquet exports are not available",
+        )
+    filename = export_filename(table, start, end, fmt, compress)
+    return StreamingResponse(
+        export_stream(table, start, end, fmt, compress),
+        media_type=content_type(fmt, compress),
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,228 @@
+"""Read APIs over payment, refund and invoice history.
+
+Pages are keyset-paginated on (created_at, id) — (issued_at, id) for
+invoices — so a deep page costs the same as the first and nothing counts the
+table. ``stream_history`` walks every matching row as NDJSON, one short
+read-replica session per page, so memory stays bounded by the page size.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import AsyncIterator, Callable, NamedTuple
+from uuid import UUID
+
+from fastapi import HTTPException, Request, status
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.payments.models import Invoice, PaymentTransaction, RefundTransaction
+from app.api.payments.schemas import (
+    InvoiceHistoryItem,
+    RefundHistoryItem,
+    TransactionHistoryItem,
+)
+from app.core.common.constants import Roles
+from app.core.config import Config
+from app.core.request_context import _get_user_context, is_valid_user
+from app.db.main import read_session_factory
+from app.db.pagination import (
+    Cursor,
+    decode_cursor,
+    encode_cursor,
+    keyset_pages,
+    keyset_query,
+    naive_utc,
+)
+from app.utils.response import ApiResponse, CursorMeta, MetaData, success_response
+
+
+class HistoryQuery(NamedTuple):
+    user_id: UUID | None
+    booking_id: UUID | None
+    created_from: datetime | None
+    created_to: datetime | None
+    cursor: str | None
+    limit: int
+
+
+class HistorySource(NamedTuple):
+    model: type
+    sort_column: object
+    # Join to payment_transactions for user/booking filters, when not on the row.
+    transaction_join: object | None
+    serialize: Callable[[object], BaseModel]
+
+
+def _invoice_item(invoice: Invoice) -> InvoiceHistoryItem:
+    return InvoiceHistoryItem(
+        id=invoice.id,
+        invoiceNo=invoice.invoice_no,
+        bookingId=invoice.booking_id,
+        bookingPublicId=invoice.booking_public_id,
+        transactionId=invoice.transaction_id,
+        transactionPublicId=invoice.transaction_public_id,
+        amount=invoice.amount,
+        taxAmount=invoice.tax_amount,
+        currency=invoice.currency,
+        status=invoice.status,
+        pdfAvailable=invoice.pdf_url is not None,
+        issuedAt=invoice.issued_at,
+    )
+
+
+HISTORY_SOURCES = {
+    "transactions": HistorySource(
+        PaymentTransaction,
+        PaymentTransaction.created_at,
+        None,
+        TransactionHistoryItem.model_validate,
+    ),
+    "refunds": HistorySource(
+        RefundTransaction,
+        RefundTransaction.created_at,
+        RefundTransaction.payment_transaction_id == PaymentTransaction.id,
+        RefundHistoryItem.model_validate,
+    ),
+    "invoices": HistorySource(
+        Invoice,
+        Invoice.issued_at,
+        Invoice.transaction_id == PaymentTransaction.id,
+        _invoice_item,
+    ),
+}
+
+
+def _scoped_user_id(request: Request, user_id: UUID | None) -> UUID | None:
+    """Admins may query any user (or none); everyone else sees only their own rows."""
+    is_valid_user(request)
+    user_context = _get_user_context(request)
+    if user_context.type == Roles.ADMIN:
+        return user_id
+    try:
+        own_id = UUID(user_context.user_id)
+    except (TypeError, ValueError) as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid user id",
+        ) from exc
+    if user_id is not None and user_id != own_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Cannot list another user's history",
+        )
+    return own_id
+
+
+def _statement_parts(
+    source: HistorySource, query: HistoryQuery, user_id: UUID | None
+) -> tuple[list, tuple | None]:
+    if query.created_from is not None:
+        query = query._replace(created_from=naive_utc(query.created_from))
+    if query.created_to is not None:
+        query = query._replace(created_to=naive_utc(query.created_to))
+    if (
+        query.created_from is not None
+        and query.created_to is not None
+        and query.created_from >= query.created_to
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'from' must be earlier than 'to'",
+        )
+
+    model = source.model
+    conditions = []
+    join = None
+    if source.transaction_join is None:
+        if user_id is not None:
+            conditions.append(model.user_id == user_id)
+        if query.booking_id is not None:
+            conditions.append(model.booking_id == query.booking_id)
+    else:
+        # Invoices carry booking_id themselves; refunds only reach it through the txn.
+        if query.booking_id is not None and hasattr(model, "booking_id"):
+            conditions.append(model.booking_id == query.booking_id)
+        elif query.booking_id is not None:
+            join = (PaymentTransaction, source.transaction_join)
+            conditions.append(PaymentTransaction.booking_id == query.booking_id)
+        if user_id is not None:
+            join = (PaymentTransaction, source.transaction_join)
+            conditions.append(PaymentTransaction.user_id == user_id)
+    if query.created_from is not None:
+        conditions.append(source.sort_column >= query.created_from)
+    if query.created_to is not None:
+        conditions.append(source.sort_column < query.created_to)
+    return conditions, join
+
+
+def _after(cursor: str | None) -> Cursor | None:
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        ) from exc
+
+
+async def list_history_service(
+    resource: str,
+    request: Request,
+    query: HistoryQuery,
+    session: AsyncSession,
+) -> ApiResponse:
+    source = HISTORY_SOURCES[resource]
+    user_id = _scoped_user_id(request, query.user_id)
+    conditions, join = _statement_parts(source, query, user_id)
+    stmt = keyset_query(
+        source.model,
+        conditions,
+        query.limit + 1,
+        sort_column=source.sort_column,
+        after=_after(query.cursor),
+        join=join,
+    )
+    rows = (await session.execute(stmt)).scalars().all()
+    has_more = len(rows) > query.limit
+    rows = rows[: query.limit]
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, source.sort_column.key), last.id)
+
+    return success_response(
+        [source.serialize(row).model_dump(by_alias=True, mode="json") for row in rows],
+        meta=MetaData(
+            cursor=CursorMeta(limit=query.limit, nextCursor=next_cursor, hasMore=has_more)
+        ),
+    )
+
+
+def prepare_history_stream(
+    resource: str, request: Request, query: HistoryQuery
+) -> AsyncIterator[str]:
+    """Validate up front (so errors are still HTTP errors), then return the line stream."""
+    source = HISTORY_SOURCES[resource]
+    user_id = _scoped_user_id(request, query.user_id)
+    conditions, join = _statement_parts(source, query, user_id)
+    return stream_history(source, conditions, join, _after(query.cursor))
+
+
+async def stream_history(
+    source: HistorySource,
+    conditions: list,
+    join: tuple | None,
+    after: Cursor | None,
+) -> AsyncIterator[str]:
+    async for page in keyset_pages(
+        read_session_factory,
+        source.model,
+        conditions,
+        Config.HISTORY_STREAM_PAGE_SIZE,
+        sort_column=source.sort_column,
+        after=after,
+        join=join,
+    ):
+        yield "".join(source.serialize(row).model_dump_json(by_alias=True) + "\n" for row in page)
@@ -5,13 +5,20 @@ from decimal import Decimal
 from fastapi import HTTPException, Request, status
 import hmac
 import hashlib
-import razorpay
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
-from app.api.payments.helpers import amount_to_paise, generate_transaction_id, get_installment, money
-from app.api.payments.models import Invoice, PaymentTransaction, RefundTransaction
+from app.api.payments.helpers import (
+    amount_to_paise,
+    generate_transaction_id,
+    get_installment,
+    get_installment_total,
+)
+from app.api.payments.models import Invoice, PaymentTransaction
 from app.api.payments.schemas import (
+    InvoiceSignedUrlBatchRequest,
+    InvoiceSignedUrlBatchResponse,
     InvoiceSignedUrlResponse,
     PaymentInitiateRequest,
     PaymentInitiateResponse,
@@ -20,10 +27,24 @@ from app.api.payments.schemas import (
     RefundRequest,
     RefundResponse,
 )
+from app.api.payments.services.refund_service import execute_refund
 from app.core.config import Config
 from app.core.request_context import _get_user_context, get_idempotency_key, is_valid_user
-from app.invoices.storage import generate_presigned_url_from_s3_url
-from app.utils.booking_service import extract_booking_public_id, fetch_booking_details
+from app.gateways.razorpay_client import get_razorpay_client
+from app.invoices.signer import cached_invoice_url, sign_invoice_url
+from app.invoices.storage import extract_bucket_key_from_url
+from app.utils.booking_service import (
+    extract_booking_public_id,
+    fetch_booking_details,
+    publish_booking_invalidation,
+)
+
+
+def _idempotency_key_taken() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Idempotency-Key was already used for another payment",
+    )
 
 
 async def initiate_payment_service(
@@ -40,11 +61,17 @@ async def initiate_payment_service(
         )
 
     idempotency_key = get_idempotency_key(request)
-    stmt = select(PaymentTransaction).where(
-        PaymentTransaction.idempotency_key == idempotency_key
-    )
-    existing_payment = (await session.execute(stmt)).scalars().first()
+    existing_payment = None
+    if idempotency_key:
+        stmt = select(PaymentTransaction).where(
+            PaymentTransaction.idempotency_key == idempotency_key
+        )
+        existing_payment = (await session.execute(stmt)).scalars().first()
     if existing_payment:
+        # payment_transactions.idempotency_key is unique across users; only
+        # the payment's own user may replay it.
+        if str(existing_payment.user_id) != str(user_context.user_id).lower():
+            raise _idempotency_key_taken()
         if not existing_payment.gateway_order_id:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
@@ -83,6 +110,7 @@ async def initiate_payment_service(
 
     amount = payload.amount
     installment_no: int | None = None
+    installment_total: int | None = None
     if payload.payment_type == "FULL":
         total_payable_amount = Decimal(str(booking.get("total_payable_amount", "0")))
         total_paid_amount = Decimal(str(booking.get("total_paid_amount", "0")))
@@ -95,12 +123,13 @@ async def initiate_payment_service(
         installment = await get_installment(session, booking.get("id"), payload.installment_no)
         amount = installment.due_amount
         installment_no = payload.installment_no
+        installment_total = await get_installment_total(session, booking.get("id"))
     else:
         raise HTTPException(status_code=400, detail="Invalid payment mode")
 
-    client = razorpay.Client(auth=(Config.RAZORPAY_KEY_ID, Config.RAZORPAY_KEY_SECRET))
+    client = get_razorpay_client()
     try:
-        order = client.order.create(
+        order = await client.create_order(
             {
                 "amount": amount_to_paise(amount),
                 "currency": payload.currency,
@@ -123,14 +152,19 @@ async def initiate_payment_service(
         currency=payload.currency,
         payment_type=payload.payment_type,
         installment_no=installment_no,
-        installment_total=2,
+        installment_total=installment_total,
         gateway="RAZORPAY",
         gateway_order_id=order.get("id"),
         status="INITIATED",
         idempotency_key=idempotency_key,
     )
     session.add(payment)
-    await session.commit()
+    try:
+        await session.commit()
+    except IntegrityError as exc:
+        # Another request claimed the key between the lookup and this insert.
+        await session.rollback()
+        raise _idempotency_key_taken() from exc
 
     return PaymentInitiateResponse(
         razorpayOrderId=payment.gateway_order_id,
@@ -140,6 +174,13 @@ async def initiate_payment_service(
     )
 
 
+REFUND_RESPONSE_STATUS = {
+    "INITIATED": "refund initiated",
+    "PENDING": "refund pending",
+    "PARTIAL": "refund partially initiated",
+}
+
+
 async def initiate_refund_service(
     payload: RefundRequest, session: AsyncSession
 ) -> RefundResponse:
@@ -149,75 +190,21 @@ async def initiate_refund_service(
             detail="Razorpay keys are not configured",
         )
 
-    refundable_stmt = (
-        select(PaymentTransaction)
-        .where(
-            PaymentTransaction.booking_public_id == payload.booking_public_id,
-            PaymentTransaction.status == "SUCCESS",
-        )
-        .with_for_update()
+    outcome = await execute_refund(
+        session, payload.booking_public_id, payload.amount, payload.reason
     )
-    transactions = (await session.execute(refundable_stmt)).scalars().all()
-    if not transactions:
+    if outcome.status == "FAILED":
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="No successful transactions found for booking",
-        )
-
-    remaining_by_txn: list[tuple[PaymentTransaction, Decimal]] = []
-    total_refundable = Decimal("0.00")
-    for txn in transactions:
-        remaining = (money(txn.amount) - money(txn.refund_amount)).quantize(Decimal("0.01"))
-        if remaining > 0:
-            remaining_by_txn.append((txn, remaining))
-            total_refundable += remaining
-
-    request_amount = money(payload.amount)
-    if request_amount <= 0 or request_amount > total_refundable:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid refund amount")
-
-    client = razorpay.Client(auth=(Config.RAZORPAY_KEY_ID, Config.RAZORPAY_KEY_SECRET))
-    pending_amount = request_amount
-    for txn, remaining in remaining_by_txn:
-        if pending_amount <= 0:
-            break
-        if not txn.gateway_payment_id:
-            continue
-
-        refund_for_txn = min(remaining, pending_amount).quantize(Decimal("0.01"))
-        if refund_for_txn <= 0:
-            continue
-        try:
-            refund = client.payment.refund(
-                txn.gateway_payment_id, {"amount": amount_to_paise(refund_for_txn)}
-            )
-        except Exception as exc:
-            raise HTTPException(
-                status_code=status.HTTP_502_BAD_GATEWAY,
-                detail="Failed to initiate refund with gateway",
-            ) from exc
-
-        refund_record = RefundTransaction(
-            payment_transaction_id=txn.id,
-            refund_id=refund["id"],
-            amount=refund_for_txn,
-            status="INITIATED",
-            reason=payload.reason,
-        )
-        txn.refund_amount = (money(txn.refund_amount) + refund_for_txn).quantize(Decimal("0.01"))
-        txn.refund_status = "INITIATED"
-        session.add(refund_record)
-        session.add(txn)
-        pending_amount = (pending_amount - refund_for_txn).quantize(Decimal("0.01"))
-
-    if pending_amount > 0:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Refund amount exceeds gateway-refundable transactions",
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Failed to initiate refund with gateway",
         )
-
-    await session.commit()
-    return RefundResponse(status="refund initiated", refundedAmount=request_amount)
+    # Anything the gateway may have accepted is reported with a 200: a 502
+    # would invite a retry that refunds those parts a second time.
+    return RefundResponse(
+        status=REFUND_RESPONSE_STATUS[outcome.status],
+        refundedAmount=outcome.refunded,
+        pendingAmount=outcome.pending,
+    )
 
 
 async def verify_payment_service(
@@ -254,40 +241,22 @@ async def verify_payment_service(
     # payment.status = "PENDING"
     session.add(payment)
     await session.commit()
+    await publish_booking_invalidation(payment.booking_id)
     return PaymentVerifyResponse(status="VERIFIED")
 
 
-async def generate_invoice_signed_url_service(
-    invoice_no: str,
-    session: AsyncSession,
-    expires_in: int = 3600,
-) -> InvoiceSignedUrlResponse:
+def _validate_expires_in(expires_in: int) -> None:
     if expires_in <= 0 or expires_in > 604800:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="expiresIn must be between 1 and 604800 seconds",
         )
 
-    invoice = (
-        await session.execute(
-            select(Invoice).where(Invoice.invoice_no == invoice_no)
-        )
-    ).scalars().first()
-    if not invoice:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Invoice not found",
-        )
-    if not invoice.pdf_url:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Invoice PDF URL not available",
-        )
 
+def _sign_invoice_pdf(invoice_no: str, pdf_url: str, expires_in: int) -> str:
     try:
-        signed_url = generate_presigned_url_from_s3_url(
-            invoice.pdf_url, expires_in=expires_in
-        )
+        bucket, key = extract_bucket_key_from_url(pdf_url)
+        return sign_invoice_url(invoice_no, bucket, key, expires_in)
     except ValueError as exc:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -299,8 +268,76 @@ async def generate_invoice_signed_url_service(
             detail="Failed to generate signed URL",
         ) from exc
 
+
+async def generate_invoice_signed_url_service(
+    invoice_no: str,
+    session: AsyncSession,
+    expires_in: int = 3600,
+) -> InvoiceSignedUrlResponse:
+    _validate_expires_in(expires_in)
+    signed_url = cached_invoice_url(invoice_no, expires_in)
+    if signed_url is None:
+        invoice = (
+            await session.execute(
+                select(Invoice).where(Invoice.invoice_no == invoice_no)
+            )
+        ).scalars().first()
+        if not invoice:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Invoice not found",
+            )
+        if not invoice.pdf_url:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Invoice PDF URL not available",
+            )
+        signed_url = _sign_invoice_pdf(invoice.invoice_no, invoice.pdf_url, expires_in)
+
     return InvoiceSignedUrlResponse(
-        invoiceNo=invoice.invoice_no,
+        invoiceNo=invoice_no,
         signedUrl=signed_url,
         expiresIn=expires_in,
     )
+
+
+async def generate_invoice_signed_urls_service(
+    payload: InvoiceSignedUrlBatchRequest,
+    session: AsyncSession,
+) -> InvoiceSignedUrlBatchResponse:
+    expires_in = payload.expires_in
+    _validate_expires_in(expires_in)
+    invoice_nos = list(dict.fromkeys(payload.invoice_nos))
+    if len(invoice_nos) > Config.SIGNED_URL_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {Config.SIGNED_URL_BATCH_MAX_ITEMS} invoices per request",
+        )
+
+    signed: dict[str, str] = {}
+    uncached = []
+    for invoice_no in invoice_nos:
+        signed_url = cached_invoice_url(invoice_no, expires_in)
+        if signed_url is None:
+            uncached.append(invoice_no)
+        else:
+            signed[invoice_no] = signed_url
+
+    if uncached:
+        rows = await session.execute(
+            select(Invoice.invoice_no, Invoice.pdf_url).where(Invoice.invoice_no.in_(uncached))
+        )
+        for invoice_no, pdf_url in rows.all():
+            if pdf_url:
+                signed[invoice_no] = _sign_invoice_pdf(invoice_no, pdf_url, expires_in)
+
+    return InvoiceSignedUrlBatchResponse(
+        items=[
+            InvoiceSignedUrlResponse(
+                invoiceNo=invoice_no, signedUrl=signed[invoice_no], expiresIn=expires_in
+            )
+            for invoice_no in invoice_nos
+            if invoice_no in signed
+        ],
+        notFound=[invoice_no for invoice_no in invoice_nos if invoice_no not in signed],
+    )
@@ -0,0 +1,429 @@
+"""Refund planning, reservation and settlement.
+
+A refund runs in three phases so row locks are only held briefly:
+
+1. reserve  - lock the booking's transactions, plan the split, bump
+   ``refund_amount`` and insert PENDING refund rows, commit.
+2. gateway  - issue the Razorpay refunds concurrently, without locks, under a
+   shared rate limiter.
+3. settle   - record the gateway refund ids, or hand back the reserved amount
+   for the parts the gateway rejected with a 4xx. Parts whose outcome is
+   unknown (timeouts, dropped connections) stay PENDING; the stuck sweeper
+   finds them at the gateway through their ``refund_ref`` note.
+"""
+from __future__ import annotations
+
+import asyncio
+from decimal import Decimal
+import json
+from typing import AsyncIterator, Awaitable, Callable, NamedTuple, Sequence
+import uuid
+
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from app.api.payments.helpers import amount_to_paise, money
+from app.api.payments.models import PaymentTransaction, RefundTransaction
+from app.api.payments.schemas import RefundRequest
+from app.core.config import Config
+from app.core.middlewares import logger
+from app.db.main import async_session_factory
+from app.gateways.razorpay_client import RazorpayError, get_razorpay_client
+from app.utils.rate_limiter import TokenBucket
+
+# Placeholder refund_id for rows reserved before the gateway has answered.
+PENDING_REFUND_PREFIX = "pending_"
+REFUND_REF_NOTE = "refund_ref"
+
+_refund_limiter: TokenBucket | None = None
+_background_tasks: set[asyncio.Task] = set()
+
+
+class RefundAllocation(NamedTuple):
+    refund_record_id: uuid.UUID
+    payment_transaction_id: uuid.UUID
+    gateway_payment_id: str
+    amount: Decimal
+
+
+class GatewayRefundResult(NamedTuple):
+    allocation: RefundAllocation
+    gateway_refund_id: str | None
+    error: str | None
+    # The gateway definitely did not refund (4xx); otherwise a missing id
+    # means the outcome is unknown.
+    rejected: bool = False
+
+
+class RefundOutcome(NamedTuple):
+    refunded: Decimal  # accepted by the gateway
+    pending: Decimal  # outcome unknown, left for the sweeper
+    rejected: Decimal  # refused by the gateway and released
+    errors: list[str]
+
+    @property
+    def status(self) -> str:
+        if self.pending <= 0 and self.rejected <= 0:
+            return "INITIATED"
+        if self.refunded <= 0 and self.pending <= 0:
+            return "FAILED"
+        if self.rejected <= 0:
+            return "PENDING"
+        return "PARTIAL"
+
+
+def is_definite_rejection(exc: Exception) -> bool:
+    """A 4xx from the gateway: the refund was not created and will not be."""
+    return (
+        isinstance(exc, RazorpayError)
+        and exc.status_code is not None
+        and 400 <= exc.status_code < 500
+    )
+
+
+def get_refund_rate_limiter() -> TokenBucket:
+    global _refund_limiter
+    if _refund_limiter is None:
+        _refund_limiter = TokenBucket(
+            Config.RAZORPAY_REFUND_RATE_PER_SECOND, Config.RAZORPAY_REFUND_BURST
+        )
+    return _refund_limiter
+
+
+def plan_refund_split(
+    balances: Sequence[tuple[PaymentTransaction, Decimal]],
+    amount: Decimal,
+) -> list[tuple[PaymentTransaction, Decimal]]:
+    """Split ``amount`` across transactions in order, oldest first.
+
+    ``balances`` holds each transaction with its remaining refundable amount.
+    Transactions without a gateway payment id count towards the refundable
+    total but cannot be refunded through the gateway.
+    """
+    request_amount = money(amount)
+    total_refundable = sum((remaining for _, remaining in balances), Decimal("0.00"))
+    if request_amount <= 0 or request_amount > total_refundable:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid refund amount")
+
+    split: list[tuple[PaymentTransaction, Decimal]] = []
+    pending_amount = request_amount
+    for txn, remaining in balances:
+        if pending_amount <= 0:
+            break
+        if not txn.gateway_payment_id:
+            continue
+        share = min(remaining, pending_amount).quantize(Decimal("0.01"))
+        if share <= 0:
+            continue
+        split.append((txn, share))
+        pending_amount = (pending_amount - share).quantize(Decimal("0.01"))
+
+    if pending_amount > 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Refund amount exceeds gateway-refundable transactions",
+        )
+    return split
+
+
+async def reserve_refund(
+    session: AsyncSession,
+    booking_public_id: str,
+    amount: Decimal,
+    reason: str | None,
+) -> list[RefundAllocation]:
+    refundable_stmt = (
+        select(PaymentTransaction)
+        .where(
+            PaymentTransaction.booking_public_id == booking_public_id,
+            PaymentTransaction.status == "SUCCESS",
+        )
+        .order_by(PaymentTransaction.created_at)
+        .with_for_update()
+    )
+    transactions = (await session.execute(refundable_stmt)).scalars().all()
+    if not transactions:
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No successful transactions found for booking",
+        )
+
+    balances = []
+    for txn in transactions:
+        remaining = (money(txn.amount) - money(txn.refund_amount)).quantize(Decimal("0.01"))
+        if remaining > 0:
+            balances.append((txn, remaining))
+
+    try:
+        split = plan_refund_split(balances, amount)
+    except HTTPException:
+        await session.rollback()
+        raise
+
+    allocations: list[RefundAllocation] = []
+    for txn, share in split:
+        record = RefundTransaction(
+            payment_transaction_id=txn.id,
+            refund_id=f"{PENDING_REFUND_PREFIX}{uuid.uuid4().hex}",
+            amount=share,
+            status="PENDING",
+            reason=reason,
+        )
+        txn.refund_amount = (money(txn.refund_amount) + share).quantize(Decimal("0.01"))
+        session.add(record)
+        session.add(txn)
+        allocations.append(
+            RefundAllocation(record.id, txn.id, txn.gateway_payment_id, share)
+        )
+    await session.commit()
+    return allocations
+
+
+async def _issue_gateway_refund(
+    allocation: RefundAllocation, limiter: TokenBucket
+) -> GatewayRefundResult:
+    await limiter.acquire()
+    try:
+        refund = await get_razorpay_client().refund_payment(
+            allocation.gateway_payment_id,
+            {
+                "amount": amount_to_paise(allocation.amount),
+                "notes": {REFUND_REF_NOTE: str(allocation.refund_record_id)},
+            },
+        )
+    except Exception as exc:
+        logger.error(
+            f"Gateway refund failed for payment={allocation.gateway_payment_id}: {exc}"
+        )
+        return GatewayRefundResult(allocation, None, str(exc), is_definite_rejection(exc))
+    return GatewayRefundResult(allocation, refund["id"], None)
+
+
+async def issue_gateway_refunds(
+    allocations: Sequence[RefundAllocation], limiter: TokenBucket
+) -> list[GatewayRefundResult]:
+    return list(
+        await asyncio.gather(
+            *(_issue_gateway_refund(allocation, limiter) for allocation in allocations)
+        )
+    )
+
+
+async def settle_refund(
+    session: AsyncSession, results: Sequence[GatewayRefundResult]
+) -> None:
+    if not results:
+        return
+    record_ids = [result.allocation.refund_record_id for result in results]
+    txn_ids = sorted({result.allocation.payment_transaction_id for result in results})
+    txns = {
+        txn.id: txn
+        for txn in (
+            await session.execute(
+                select(PaymentTransaction)
+                .where(PaymentTransaction.id.in_(txn_ids))
+                .order_by(PaymentTransaction.id)
+                .with_for_update()
+            )
+        ).scalars()
+    }
+    records = {
+        record.id: record
+        for record in (
+            await session.execute(
+                select(RefundTransaction)
+                .where(RefundTransaction.id.in_(record_ids))
+                .with_for_update()
+            )
+        ).scalars()
+    }
+
+    for result in results:
+        record = records.get(result.allocation.refund_record_id)
+        txn = txns.get(result.allocation.payment_transaction_id)
+        if record is None or txn is None or record.status != "PENDING":
+            # A webhook matched the row through its refund_ref note first.
+            continue
+        if result.gateway_refund_id:
+            record.refund_id = result.gateway_refund_id
+            record.status = "INITIATED"
+            txn.refund_status = "INITIATED"
+        elif not result.rejected:
+            # Unknown outcome: keep the reservation until the sweeper knows.
+            continue
+        else:
+            record.status = "FAILED"
+            txn.refund_amount = max(
+                (money(txn.refund_amount) - money(record.amount)).quantize(Decimal("0.01")),
+                Decimal("0.00"),
+            )
+        session.add(record)
+        session.add(txn)
+    await session.commit()
+
+
+async def execute_refund(
+    session: AsyncSession,
+    booking_public_id: str,
+    amount: Decimal,
+    reason: str | None,
+) -> RefundOutcome:
+    """Run all three phases."""
+    allocations = await reserve_refund(session, booking_public_id, amount, reason)
+    results = await issue_gateway_refunds(allocations, get_refund_rate_limiter())
+    await settle_refund(session, results)
+
+    totals = {"refunded": Decimal("0.00"), "pending": Decimal("0.00"), "rejected": Decimal("0.00")}
+    for result in results:
+        if result.gateway_refund_id:
+            totals["refunded"] += result.allocation.amount
+        elif result.rejected:
+            totals["rejected"] += result.allocation.amount
+        else:
+            totals["pending"] += result.allocation.amount
+    errors = [result.error for result in results if result.error]
+    return RefundOutcome(errors=errors, **totals)
+
+
+async def find_refund_for_webhook(
+    session: AsyncSession, refund_entity: dict
+) -> RefundTransaction | None:
+    """Locks the refund row a gateway refund entity refers to.
+
+    Falls back to the ``refund_ref`` note for rows whose gateway id has not
+    been settled yet, and records the gateway id on them.
+    """
+    refund_id = refund_entity.get("id")
+    if not refund_id:
+        return None
+    stmt = (
+        select(RefundTransaction)
+        .where(RefundTransaction.refund_id == refund_id)
+        .with_for_update()
+    )
+    record = (await session.execute(stmt)).scalar_one_or_none()
+    if record is not None:
+        return record
+
+    refund_ref = (refund_entity.get("notes") or {}).get(REFUND_REF_NOTE)
+    if not refund_ref:
+        return None
+    try:
+        record_id = uuid.UUID(str(refund_ref))
+    except ValueError:
+        return None
+    record = (
+        await session.execute(
+            select(RefundTransaction)
+            .where(RefundTransaction.id == record_id)
+            .with_for_update()
+        )
+    ).scalar_one_or_none()
+    if record is None or not record.refund_id.startswith(PENDING_REFUND_PREFIX):
+        return None
+    record.refund_id = refund_id
+    session.add(record)
+    return record
+
+
+def _bulk_item_result(index: int, item: RefundRequest) -> dict:
+    return {
+        "index": index,
+        "bookingPublicId": item.booking_public_id,
+        "requestedAmount": str(money(item.amount)),
+    }
+
+
+def _failed_bulk_item(result: dict, error: str) -> dict:
+    return {
+        **result,
+        "status": "FAILED",
+        "refundedAmount": "0.00",
+        "pendingAmount": "0.00",
+        "errors": [error],
+    }
+
+
+async def _run_bulk_item(
+    index: int, item: RefundRequest, semaphore: asyncio.Semaphore
+) -> dict:
+    result = _bulk_item_result(index, item)
+    async with semaphore:
+        async with async_session_factory() as session:
+            try:
+                outcome = await execute_refund(
+                    session, item.booking_public_id, item.amount, item.reason
+                )
+            except HTTPException as exc:
+                return _failed_bulk_item(result, exc.detail)
+            except Exception as exc:
+                logger.error(f"Bulk refund failed for booking={item.booking_public_id}: {exc}")
+                return _failed_bulk_item(result, "Internal error")
+
+    return {
+        **result,
+        "status": outcome.status,
+        "refundedAmount": str(outcome.refunded),
+        "pendingAmount": str(outcome.pending),
+        "errors": outcome.errors,
+    }
+
+
+def bulk_summary(results: Sequence[dict]) -> dict:
+    counts = {"INITIATED": 0, "PENDING": 0, "PARTIAL": 0, "FAILED": 0}
+    refunded_total = Decimal("0.00")
+    for result in results:
+        counts[result["status"]] += 1
+        refunded_total += Decimal(result["refundedAmount"])
+    return {
+        "total": len(results),
+        "initiated": counts["INITIATED"],
+        "pending": counts["PENDING"],
+        "partial": counts["PARTIAL"],
+        "failed": counts["FAILED"],
+        "refundedAmount": str(refunded_total),
+    }
+
+
+async def _finish_bulk(
+    tasks: list[asyncio.Task], on_complete: Callable[[list[dict]], Awaitable[None]]
+) -> None:
+    results = await asyncio.gather(*tasks)
+    await on_complete(sorted(results, key=lambda result: result["index"]))
+
+
+def _keep_alive(task: asyncio.Task) -> None:
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+async def stream_bulk_refunds(
+    items: Sequence[RefundRequest],
+    on_complete: Callable[[list[dict]], Awaitable[None]] | None = None,
+) -> AsyncIterator[str]:
+    """Yields one NDJSON line per item as it finishes, then a summary line.
+
+    ``on_complete`` gets every item result, in request order, once all have
+    settled, whether or not the stream was read to the end.
+    """
+    semaphore = asyncio.Semaphore(Config.REFUND_BULK_CONCURRENCY)
+    tasks = [
+        asyncio.create_task(_run_bulk_item(index, item, semaphore))
+        for index, item in enumerate(items)
+    ]
+    # Refunds that already reached the gateway must settle even if the
+    # client disconnects, so the tasks are kept alive past the stream.
+    for task in tasks:
+        _keep_alive(task)
+    if on_complete is not None:
+        _keep_alive(asyncio.create_task(_finish_bulk(tasks, on_complete)))
+
+    results = []
+    for next_done in asyncio.as_completed(tasks):
+        result = await next_done
+        results.append(result)
+        yield json.dumps(result) + "\n"
+
+    yield json.dumps({"summary": bulk_summary(results)}) + "\n"
@@ -0,0 +1,219 @@
+"""Resolves payments and refunds whose webhook never arrived.
+
+Stale rows are read in keyset pages, their state is fetched from Razorpay
+concurrently under a rate limit, and the webhook handlers apply the same
+transitions a delivered webhook would have.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Iterable
+
+from sqlmodel import select
+
+from app.api.payments.models import PaymentTransaction, RefundTransaction
+from app.api.payments.services.refund_service import (
+    PENDING_REFUND_PREFIX,
+    REFUND_REF_NOTE,
+    GatewayRefundResult,
+    RefundAllocation,
+    settle_refund,
+)
+from app.api.payments.services.webhook_service import (
+    handle_payment_success,
+    handle_refund_failed,
+    handle_refund_processed,
+)
+from app.core.config import Config
+from app.core.middlewares import logger
+from app.db.main import async_session_factory, read_session_factory
+from app.db.pagination import keyset_pages
+from app.gateways.razorpay_client import LIST_PAGE_SIZE, RazorpayClient, get_razorpay_client
+from app.gateways.razorpay_webhook import WebhookEnvelope
+from app.utils.rate_limiter import TokenBucket
+
+REFUND_HANDLERS = {
+    "processed": handle_refund_processed,
+    "failed": handle_refund_failed,
+}
+
+
+async def _apply(handler, envelope: WebhookEnvelope) -> None:
+    async with async_session_factory() as session:
+        after_commit = await handler(envelope, session)
+        await session.commit()
+    if after_commit is not None:
+        await after_commit()
+
+
+async def sweep_payment(
+    txn: PaymentTransaction, client: RazorpayClient, limiter: TokenBucket
+) -> str:
+    await limiter.acquire()
+    payments = await client.fetch_order_payments(txn.gateway_order_id)
+    captured = next(
+        (item for item in payments.get("items") or [] if item.get("status") == "captured"),
+        None,
+    )
+    if captured is None:
+        return "pending"
+    await _apply(
+        handle_payment_success,
+        WebhookEnvelope(
+            {"event": "payment.captured", "payload": {"payment": {"entity": captured}}}
+        ),
+    )
+    return "captured"
+
+
+async def _settle(
+    refund: RefundTransaction, gateway_payment_id: str, gateway_refund_id: str | None
+) -> None:
+    allocation = RefundAllocation(
+        refund.id, refund.payment_transaction_id, gateway_payment_id, refund.amount
+    )
+    found = gateway_refund_id is not None
+    result = GatewayRefundResult(
+        allocation, gateway_refund_id, None if found else "Refund not found at gateway", not found
+    )
+    async with async_session_factory() as session:
+        await settle_refund(session, [result])
+
+
+async def _find_refund_by_ref(
+    client: RazorpayClient, limiter: TokenBucket, gateway_payment_id: str, refund_ref: str
+) -> dict | None:
+    """Walk every page of the payment's refunds; None only if none carries the ref."""
+    skip = 0
+    while True:
+        page = await client.fetch_payment_refunds(gateway_payment_id, skip=skip)
+        items = page.get("items") or []
+        for item in items:
+            if (item.get("notes") or {}).get(REFUND_REF_NOTE) == refund_ref:
+                return item
+        if len(items) < LIST_PAGE_SIZE:
+            return None
+        skip += len(items)
+        await limiter.acquire()
+
+
+async def sweep_refund(
+    refund: RefundTransaction,
+    gateway_payment_id: str,
+    client: RazorpayClient,
+    limiter: TokenBucket,
+) -> str:
+    await limiter.acquire()
+    pending = refund.refund_id.startswith(PENDING_REFUND_PREFIX)
+    if pending:
+        # The bulk flow crashed between reserving and settling: look the refund
+        # up by the refund_ref note it was created with.
+        entity = await _find_refund_by_ref(client, limiter, gateway_payment_id, str(refund.id))
+        if entity is None:
+            await _settle(refund, gateway_payment_id, None)
+            return "released"
+    else:
+        entity = await client.fetch_refund(gateway_payment_id, refund.refund_id)
+
+    status = entity.get("status")
+    handler = REFUND_HANDLERS.get(status)
+    if handler is None:
+        if pending:
+            await _settle(refund, gateway_payment_id, entity["id"])
+            return "adopted"
+        return "pending"
+    await _apply(
+        handler,
+        WebhookEnvelope({"event": f"refund.{status}", "payload": {"refund": {"entity": entity}}}),
+    )
+    return status
+
+
+async def _run_bounded(
+    items: Iterable, work: Callable[..., Awaitable[str]], concurrency: int, stats: Counter
+) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(args: tuple) -> None:
+        async with semaphore:
+            try:
+                stats[await work(*args)] += 1
+            except Exception as exc:
+                stats["errors"] += 1
+                logger.error(f"Sweeper failed for {args[0].id}: {exc}")
+
+    await asyncio.gather(*(run(args) for args in items))
+
+
+def _window() -> tuple[datetime, datetime]:
+    now = datetime.utcnow()
+    return (
+        now - timedelta(days=Config.SWEEPER_MAX_AGE_DAYS),
+        now - timedelta(seconds=Config.SWEEPER_STALE_AFTER_SECONDS),
+    )
+
+
+async def sweep_payments(client: RazorpayClient, limiter: TokenBucket) -> Counter:
+    stats: Counter = Counter()
+    oldest, newest = _window()
+    async for page in keyset_pages(
+        read_session_factory,
+        PaymentTransaction,
+        [
+            PaymentTransaction.status == "INITIATED",
+            PaymentTransaction.gateway_order_id.is_not(None),
+            PaymentTransaction.created_at >= oldest,
+            PaymentTransaction.created_at < newest,
+        ],
+        Config.SWEEPER_BATCH_SIZE,
+    ):
+        await _run_bounded(
+            ((txn, client, limiter) for txn in page),
+            sweep_payment,
+            Config.SWEEPER_CONCURRENCY,
+            stats,
+        )
+    return stats
+
+
+async def sweep_refunds(client: RazorpayClient, limiter: TokenBucket) -> Counter:
+    stats: Counter = Counter()
+    oldest, newest = _window()
+    async for page in keyset_pages(
+        read_session_factory,
+        RefundTransaction,
+        [
+            RefundTransaction.status.in_(("PENDING", "INITIATED")),
+            RefundTransaction.created_at >= oldest,
+            RefundTransaction.created_at < newest,
+        ],
+        Config.SWEEPER_BATCH_SIZE,
+    ):
+        async with read_session_factory() as session:
+            rows = await session.execute(
+                select(PaymentTransaction.id, PaymentTransaction.gateway_payment_id).where(
+                    PaymentTransaction.id.in_({refund.payment_transaction_id for refund in page})
+                )
+            )
+            payment_ids = dict(rows.all())
+        await _run_bounded(
+            (
+                (refund, payment_ids[refund.payment_transaction_id], client, limiter)
+                for refund in page
+                if payment_ids.get(refund.payment_transaction_id)
+            ),
+            sweep_refund,
+            Config.SWEEPER_CONCURRENCY,
+            stats,
+        )
+    return stats
+
+
+async def sweep_once() -> dict:
+    client = get_razorpay_client()
+    limiter = TokenBucket(Config.SWEEPER_RATE_PER_SECOND)
+    payments = await sweep_payments(client, limiter)
+    refunds = await sweep_refunds(client, limiter)
+    return {"payments": dict(payments), "refunds": dict(refunds)}
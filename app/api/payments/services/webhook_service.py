@@ -1,21 +1,36 @@
 from __future__ import annotations
 
-import json
 from decimal import Decimal
 
 from fastapi import HTTPException, Request, status
-import razorpay
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
 from app.api.bookings.models import BookingPaymentSchedule
 from app.api.payments.helpers import money
-from app.api.payments.models import PaymentTransaction, PaymentWebhook, RefundTransaction
+from app.api.payments.models import PaymentTransaction, PaymentWebhook
+from app.api.payments.services.refund_service import find_refund_for_webhook
+from app.api.payments.webhook_ingest import (
+    get_webhook_ingestor,
+    insert_webhook_rows,
+    webhook_row,
+)
+from app.api.payments.webhook_registry import (
+    AfterCommit,
+    get_webhook_handler,
+    order_lock_key,
+    refund_lock_key,
+    register_webhook_handler,
+)
 from app.core.config import Config
+from app.core.metrics import observe_webhook_lag
 from app.core.middlewares import logger
+from app.core.redis import redis_client
 from app.core.request_context import get_razorpay_signature_key
+from app.gateways.razorpay_webhook import WebhookEnvelope, get_webhook_verifier
 from app.invoices.credit_note_service import generate_credit_note_for_refund
 from app.invoices.invoice_service import generate_invoice_for_payment
+from app.utils.booking_service import publish_booking_invalidation
 from app.utils.event_publisher import (
     publish_payment_failed_event,
     publish_payment_success_event,
@@ -24,6 +39,9 @@ from app.utils.event_publisher import (
 )
 
 
+WEBHOOK_WAKEUP_CHANNEL = "payments:webhooks:wakeup"
+
+
 async def process_webhook_service(request: Request, session: AsyncSession) -> dict:
     x_razorpay_signature = get_razorpay_signature_key(request)
     if not Config.RAZORPAY_WEBHOOK_SECRET:
@@ -33,78 +51,73 @@ async def process_webhook_service(request: Request, session: AsyncSession) -> di
         )
 
     raw_body = await request.body()
-    body_str = raw_body.decode("utf-8")
-    razorpay_client = razorpay.Client(
-        auth=(Config.RAZORPAY_KEY_ID, Config.RAZORPAY_KEY_SECRET)
-    )
-    try:
-        razorpay_client.utility.verify_webhook_signature(
-            body_str,
-            x_razorpay_signature,
-            Config.RAZORPAY_WEBHOOK_SECRET,
-        )
-    except Exception as exc:
+    if not get_webhook_verifier(Config.RAZORPAY_WEBHOOK_SECRET).verify(
+        raw_body, x_razorpay_signature
+    ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid webhook signature",
-        ) from exc
+        )
 
-    raw_payload = json.loads(body_str)
-    payment_payload = (
-        raw_payload.get("payload", {}).get("payment", {}).get("entity", {})
-    )
-    event_id = raw_payload.get("id") or payment_payload.get("id")
-    event_type = raw_payload.get("event")
-    print(event_id, "webhook event_id")
-    print(event_type, "webhook event_type")
+    try:
+        envelope = WebhookEnvelope.from_bytes(raw_body)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid webhook payload",
+        ) from exc
+    event_id = envelope.event_id
+    event_type = envelope.event_type
+    logger.debug("webhook received", extra={"event_id": event_id, "event_type": event_type})
     if not event_id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Webhook event_id missing",
         )
-
-    existing = await session.execute(
-        select(PaymentWebhook).where(PaymentWebhook.event_id == event_id,
-                                     PaymentWebhook.event_type == event_type)
-    )
-    webhook = existing.scalars().first()
-    if webhook and webhook.processed:
+    handler = get_webhook_handler(event_type)
+    if handler is None:
+        return {"status": "ignored"}
+    observe_webhook_lag(event_type, envelope.payload.get("created_at"))
+
+    row = webhook_row(event_id, event_type, envelope.payload, handler.lock_key(envelope))
+    if Config.WEBHOOK_INGEST_MODE == "batched":
+        # The ingestor wakes the worker once per written batch.
+        await get_webhook_ingestor(notify_webhook_worker).submit(row)
         return {"status": "ok"}
-    if not webhook:
-        webhook = PaymentWebhook(
-            gateway="RAZORPAY",
-            event_id=event_id,
-            event_type=event_type,
-            payload=raw_payload,
-            processed=False,
-        )
-        session.add(webhook)
-
-    order_id = payment_payload.get("order_id")
-    payment_id = payment_payload.get("id")
-    amount = Decimal(str(payment_payload.get("amount", "0"))) / Decimal(100)
-
-    if event_type == "payment.captured" and order_id:
-        await handle_payment_success(order_id, payment_id, amount, session)
-    elif event_type == "payment.failed":
-        await handle_payment_failed(raw_payload, session)
-    elif event_type == "refund.processed":
-        await handle_refund_processed(raw_payload, session)
-    elif event_type == "refund.failed":
-        await handle_refund_failed(raw_payload, session)
-
-    webhook.processed = True
-    session.add(webhook)
+
+    inserted = await insert_webhook_rows(session, [row])
     await session.commit()
+    if inserted:
+        await notify_webhook_worker()
     return {"status": "ok"}
 
 
+async def notify_webhook_worker() -> None:
+    # Best effort: the row is already durable, the worker poll picks it up anyway.
+    try:
+        await redis_client.publish(WEBHOOK_WAKEUP_CHANNEL, "1")
+    except Exception as exc:
+        logger.warning(f"Webhook worker wakeup failed: {exc}")
+
+
+async def process_webhook_event(
+    webhook: PaymentWebhook, session: AsyncSession
+) -> AfterCommit | None:
+    """Apply one stored webhook. The caller commits, then runs the returned hook."""
+    handler = get_webhook_handler(webhook.event_type)
+    if handler is None:
+        return None
+    return await handler.handle(WebhookEnvelope(webhook.payload or {}), session)
+
+
+@register_webhook_handler("payment.captured", lock_key=order_lock_key)
 async def handle_payment_success(
-    order_id: str,
-    payment_id: str,
-    amount: Decimal,
-    session: AsyncSession,
-) -> None:
+    envelope: WebhookEnvelope, session: AsyncSession
+) -> AfterCommit | None:
+    order_id = envelope.order_id
+    if not order_id:
+        return None
+
     stmt = (
         select(PaymentTransaction)
         .where(PaymentTransaction.gateway_order_id == order_id)
@@ -112,11 +125,12 @@ async def handle_payment_success(
     )
     txn = (await session.execute(stmt)).scalar_one_or_none()
     if not txn:
-        return
+        return None
 
-    if txn.status != "SUCCESS":
+    transitioned = txn.status != "SUCCESS"
+    if transitioned:
         txn.status = "SUCCESS"
-        txn.gateway_payment_id = payment_id
+        txn.gateway_payment_id = envelope.payment_id
         if txn.installment_no:
             sched_stmt = (
                 select(BookingPaymentSchedule)
@@ -136,23 +150,26 @@ async def handle_payment_success(
         await generate_invoice_for_payment(txn, session)
     except Exception as exc:
         logger.error(f"Invoice generation failed for txn={txn.id}: {exc}")
-    await session.commit()
-
-    await publish_payment_success_event(
+    if not transitioned:
+        # A redelivery or a sweeper race: the event went out with the transition.
+        return None
+    publish_payment_success_event(
+        session,
         {
             "event_type": "PAYMENT_SUCCESS",
             "booking_public_id": txn.booking_public_id,
             "payment_transaction_id": txn.transaction_id,
-            "amount_paid": float(amount),
+            "amount_paid": float(envelope.amount),
             "installment_no": txn.installment_no,
-        }
+        },
     )
+    booking_id = txn.booking_id
+    return lambda: publish_booking_invalidation(booking_id)
 
 
-async def handle_payment_failed(payload: dict, session: AsyncSession) -> None:
-    payment_entity = payload.get("payload", {}).get("payment", {}).get("entity", {})
-    order_id = payment_entity.get("order_id")
-    payment_id = payment_entity.get("id")
+@register_webhook_handler("payment.failed", lock_key=order_lock_key, batchable=True)
+async def handle_payment_failed(envelope: WebhookEnvelope, session: AsyncSession) -> None:
+    order_id = envelope.order_id
     if not order_id:
         return
 
@@ -167,98 +184,84 @@ async def handle_payment_failed(payload: dict, session: AsyncSession) -> None:
     if txn.status == "SUCCESS":
         return
 
-    if txn.status != "FAILED":
-        txn.status = "FAILED"
-        txn.gateway_payment_id = payment_id
-        session.add(txn)
-    await session.commit()
-
-    await publish_payment_failed_event(
+    if txn.status == "FAILED":
+        return
+    txn.status = "FAILED"
+    txn.gateway_payment_id = envelope.payment_id
+    session.add(txn)
+    publish_payment_failed_event(
+        session,
         {
             "event_type": "PAYMENT_FAILED",
             "booking_public_id": txn.booking_public_id,
             "payment_transaction_id": txn.transaction_id,
             "amount_paid": float(txn.amount),
             "installment_no": txn.installment_no,
-        }
+        },
     )
 
 
-async def handle_refund_processed(payload: dict, session: AsyncSession) -> None:
-    try :
-        refund_entity = payload.get("payload", {}).get("refund", {}).get("entity", {})
-        refund_id = refund_entity.get("id")
-        print(payload, "refund payload")
-        print(refund_id, "refund id")
-        if not refund_id:
-            return
-
-        stmt = (
-            select(RefundTransaction)
-            .where(RefundTransaction.refund_id == refund_id)
-            .with_for_update()
-        )
-        refund_record = (await session.execute(stmt)).scalar_one_or_none()
-        if not refund_record:
-            return
-
-        transitioned = refund_record.status != "PROCESSED"
-        if transitioned:
-            refund_record.status = "PROCESSED"
-            session.add(refund_record)
-
-        txn_stmt = (
-            select(PaymentTransaction)
-            .where(PaymentTransaction.id == refund_record.payment_transaction_id)
-            .with_for_update()
-        )
-        txn = (await session.execute(txn_stmt)).scalar_one_or_none()
-        if txn:
-            if transitioned:
-                txn.refund_status = "PROCESSED"
-                session.add(txn)
-
-        if transitioned:
-            try:
-                await generate_credit_note_for_refund(refund_record, session)
-            except Exception as exc:
-                logger.error(
-                    f"Credit note generation failed for refund={refund_record.id}: {exc}"
-                )
-        await session.commit()
-        print("refund successfully processed, publishing event")
-        await publish_refund_processed_event(
-            {
-                "event_type": "REFUND_SUCCESS",
-                "booking_public_id": txn.booking_public_id if txn else None,
-                "refund_transaction_id": refund_record.refund_id if txn else None,
-                "refund_id": refund_record.refund_id,
-                "amount": float(refund_record.amount),
-            }
-        )
-    except Exception as exc:
-        print(exc, "Error processing refund processed webhook")
-
+@register_webhook_handler("refund.processed", lock_key=refund_lock_key)
+async def handle_refund_processed(envelope: WebhookEnvelope, session: AsyncSession) -> None:
+    logger.debug(
+        "refund webhook",
+        extra={"refund_id": envelope.refund_id, "payload": envelope.payload},
+    )
+    refund_record = await find_refund_for_webhook(session, envelope.refund_entity)
+    if not refund_record:
+        return
 
-async def handle_refund_failed(payload: dict, session: AsyncSession) -> None:
-    refund_entity = payload.get("payload", {}).get("refund", {}).get("entity", {})
-    refund_id = refund_entity.get("id")
-    if not refund_id:
+    previous_status = refund_record.status
+    if previous_status == "PROCESSED":
+        # Redelivered: the event went out with the transition.
         return
+    refund_record.status = "PROCESSED"
+    session.add(refund_record)
 
-    stmt = (
-        select(RefundTransaction)
-        .where(RefundTransaction.refund_id == refund_id)
+    txn_stmt = (
+        select(PaymentTransaction)
+        .where(PaymentTransaction.id == refund_record.payment_transaction_id)
         .with_for_update()
     )
-    refund_record = (await session.execute(stmt)).scalar_one_or_none()
+    txn = (await session.execute(txn_stmt)).scalar_one_or_none()
+    if txn:
+        if previous_status == "FAILED":
+            # Failing released the reservation; the refund went through after all.
+            txn.refund_amount = (
+                money(txn.refund_amount) + money(refund_record.amount)
+            ).quantize(Decimal("0.01"))
+        txn.refund_status = "PROCESSED"
+        session.add(txn)
+
+    try:
+        await generate_credit_note_for_refund(refund_record, session)
+    except Exception as exc:
+        logger.error(
+            f"Credit note generation failed for refund={refund_record.id}: {exc}"
+        )
+    publish_refund_processed_event(
+        session,
+        {
+            "event_type": "REFUND_SUCCESS",
+            "booking_public_id": txn.booking_public_id if txn else None,
+            "refund_transaction_id": refund_record.refund_id if txn else None,
+            "refund_id": refund_record.refund_id,
+            "amount": float(refund_record.amount),
+        },
+        txn.transaction_id if txn else None,
+    )
+
+
+@register_webhook_handler("refund.failed", lock_key=refund_lock_key, batchable=True)
+async def handle_refund_failed(envelope: WebhookEnvelope, session: AsyncSession) -> None:
+    refund_record = await find_refund_for_webhook(session, envelope.refund_entity)
     if not refund_record:
         return
 
-    transitioned = refund_record.status != "FAILED"
-    if transitioned:
-        refund_record.status = "FAILED"
-        session.add(refund_record)
+    if refund_record.status == "FAILED":
+        return
+    refund_record.status = "FAILED"
+    session.add(refund_record)
 
     txn_stmt = (
         select(PaymentTransaction)
@@ -267,22 +270,21 @@ async def handle_refund_failed(payload: dict, session: AsyncSession) -> None:
     )
     txn = (await session.execute(txn_stmt)).scalar_one_or_none()
     if txn:
-        if transitioned:
-            txn.refund_amount = (
-                money(txn.refund_amount) - money(refund_record.amount)
-            ).quantize(Decimal("0.01"))
-            if txn.refund_amount < Decimal("0.00"):
-                txn.refund_amount = Decimal("0.00")
-            txn.refund_status = "FAILED"
-            session.add(txn)
-    await session.commit()
-
-    await publish_refund_failed_event(
+        txn.refund_amount = (
+            money(txn.refund_amount) - money(refund_record.amount)
+        ).quantize(Decimal("0.01"))
+        if txn.refund_amount < Decimal("0.00"):
+            txn.refund_amount = Decimal("0.00")
+        txn.refund_status = "FAILED"
+        session.add(txn)
+    publish_refund_failed_event(
+        session,
         {
             "event_type": "REFUND_FAILED",
             "booking_public_id": txn.booking_public_id if txn else None,
             "payment_transaction_id": txn.transaction_id if txn else None,
             "refund_id": refund_record.refund_id,
             "amount": float(refund_record.amount),
-        }
+        },
+        txn.transaction_id if txn else None,
     )
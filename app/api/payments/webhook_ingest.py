@@ -0,0 +1,175 @@
+"""Writes verified webhooks into ``payment_webhooks``.
+
+``insert_webhook_rows`` is a single ``INSERT ... ON CONFLICT (event_id,
+event_type) DO NOTHING RETURNING`` round-trip. In ``batched`` ingest mode the
+``WebhookIngestor`` gathers rows from concurrent requests for a few
+milliseconds and writes them with one such statement, then hands each waiting
+request its own result.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Sequence
+import uuid
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.api.payments.models import PaymentWebhook
+from app.core.config import Config
+from app.db.main import async_engine
+
+logger = logging.getLogger(__name__)
+
+WebhookKey = tuple[str, str | None]
+
+
+def webhook_row(
+    event_id: str,
+    event_type: str | None,
+    payload: dict,
+    ordering_key: str | None,
+    gateway: str = "RAZORPAY",
+) -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "gateway": gateway,
+        "event_id": event_id,
+        "event_type": event_type,
+        "payload": payload,
+        "processed": False,
+        "ordering_key": ordering_key,
+    }
+
+
+async def insert_webhook_rows(
+    connection: AsyncConnection | AsyncSession, rows: Sequence[dict]
+) -> set[WebhookKey]:
+    """Insert rows, skipping known events. Returns the keys actually inserted."""
+    table = PaymentWebhook.__table__
+    stmt = (
+        insert(table)
+        .values(list(rows))
+        .on_conflict_do_nothing(index_elements=["event_id", "event_type"])
+        .returning(table.c.event_id, table.c.event_type)
+    )
+    result = await connection.execute(stmt)
+    return {(event_id, event_type) for event_id, event_type in result.all()}
+
+
+class WebhookIngestor:
+    """Micro-batches webhook inserts across concurrent requests.
+
+    A batch is written once ``max_batch`` rows are waiting or ``window``
+    seconds after its first row arrived, whichever comes first. Writes are
+    serialized, so rows arriving during a write form the next batch.
+    """
+
+    def __init__(
+        self,
+        window: float,
+        max_batch: int,
+        on_inserted: Callable[[], Awaitable[None]] | None = None,
+    ) -> None:
+        self.window = window
+        self.max_batch = max_batch
+        self.on_inserted = on_inserted
+        self._queue: list[tuple[dict, asyncio.Future]] = []
+        self._pending = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._closed = False
+        self.stats = {"batches": 0, "rows": 0, "inserted": 0, "maxBatch": 0}
+
+    async def submit(self, row: dict) -> bool:
+        """Queue a row and wait for its batch. True if it was a new event."""
+        if self._closed:
+            raise RuntimeError("Webhook ingestor is closed")
+        future = asyncio.get_running_loop().create_future()
+        self._queue.append((row, future))
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        self._pending.set()
+        if len(self._queue) >= self.max_batch:
+            self._full.set()
+        return await future
+
+    async def close(self) -> None:
+        self._closed = True
+        self._pending.set()
+        self._full.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await self._pending.wait()
+            if not self._queue:
+                self._pending.clear()
+                if self._closed:
+                    return
+                continue
+            if len(self._queue) < self.max_batch and not self._closed:
+                try:
+                    await asyncio.wait_for(self._full.wait(), timeout=self.window)
+                except asyncio.TimeoutError:
+                    pass
+            self._full.clear()
+            batch = self._queue[:self.max_batch]
+            del self._queue[:self.max_batch]
+            if len(self._queue) >= self.max_batch:
+                self._full.set()
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[tuple[dict, asyncio.Future]]) -> None:
+        # Within one batch only the first copy of an event is written; later
+        # copies are answered as duplicates.
+        first_by_key: dict[WebhookKey, dict] = {}
+        for row, _ in batch:
+            first_by_key.setdefault((row["event_id"], row["event_type"]), row)
+        try:
+            async with async_engine.begin() as connection:
+                inserted = await insert_webhook_rows(connection, list(first_by_key.values()))
+        except Exception as exc:
+            logger.exception(f"Webhook batch insert of {len(batch)} rows failed")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        self.stats["batches"] += 1
+        self.stats["rows"] += len(batch)
+        self.stats["inserted"] += len(inserted)
+        self.stats["maxBatch"] = max(self.stats["maxBatch"], len(batch))
+        for row, future in batch:
+            key = (row["event_id"], row["event_type"])
+            is_new = key in inserted and first_by_key[key] is row
+            if not future.done():
+                future.set_result(is_new)
+        if inserted and self.on_inserted is not None:
+            await self.on_inserted()
+
+
+_ingestor: WebhookIngestor | None = None
+
+
+def get_webhook_ingestor(
+    on_inserted: Callable[[], Awaitable[None]] | None = None,
+) -> WebhookIngestor:
+    global _ingestor
+    if _ingestor is None:
+        _ingestor = WebhookIngestor(
+            Config.WEBHOOK_INGEST_WINDOW_MS / 1000,
+            Config.WEBHOOK_INGEST_MAX_BATCH,
+            on_inserted,
+        )
+    return _ingestor
+
+
+async def close_webhook_ingestor() -> None:
+    global _ingestor
+    if _ingestor is not None:
+        await _ingestor.close()
+        _ingestor = None
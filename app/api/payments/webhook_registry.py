@@ -0,0 +1,98 @@
+"""Registry of Razorpay webhook handlers, keyed by event type.
+
+Each handler declares how it may be scheduled:
+
+- ``lock_key`` picks the entity the event mutates. Payment and refund events
+  both key on the order, so everything that touches one payment is applied
+  one at a time, in arrival order.
+- ``max_concurrency`` caps how many events of the type run at once per process.
+- ``batchable`` handlers may share one transaction with other events of the
+  same type.
+
+Handlers never commit; the dispatcher does. A handler may return a callable
+to run once the transaction has committed (e.g. cache invalidation).
+Event types without a handler are ignored and not persisted.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.gateways.razorpay_webhook import WebhookEnvelope
+
+AfterCommit = Callable[[], Awaitable[None]]
+HandlerFunc = Callable[[WebhookEnvelope, AsyncSession], Awaitable[AfterCommit | None]]
+LockKeyFunc = Callable[[WebhookEnvelope], str | None]
+
+
+class WebhookHandler:
+    __slots__ = ("event_type", "handle", "lock_key", "max_concurrency", "batchable", "_semaphore")
+
+    def __init__(
+        self,
+        event_type: str,
+        handle: HandlerFunc,
+        lock_key: LockKeyFunc,
+        max_concurrency: int,
+        batchable: bool,
+    ) -> None:
+        self.event_type = event_type
+        self.handle = handle
+        self.lock_key = lock_key
+        self.max_concurrency = max_concurrency
+        self.batchable = batchable
+        self._semaphore: asyncio.Semaphore | None = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+
+_handlers: dict[str, WebhookHandler] = {}
+
+
+def register_webhook_handler(
+    event_type: str,
+    *,
+    lock_key: LockKeyFunc,
+    max_concurrency: int = 8,
+    batchable: bool = False,
+) -> Callable[[HandlerFunc], HandlerFunc]:
+    def decorator(func: HandlerFunc) -> HandlerFunc:
+        if event_type in _handlers:
+            raise ValueError(f"Webhook handler already registered for {event_type}")
+        _handlers[event_type] = WebhookHandler(
+            event_type, func, lock_key, max_concurrency, batchable
+        )
+        return func
+
+    return decorator
+
+
+def get_webhook_handler(event_type: str | None) -> WebhookHandler | None:
+    if event_type is None:
+        return None
+    return _handlers.get(event_type)
+
+
+def registered_event_types() -> list[str]:
+    return sorted(_handlers)
+
+
+def order_lock_key(envelope: WebhookEnvelope) -> str | None:
+    return envelope.order_id or envelope.payment_id
+
+
+def refund_lock_key(envelope: WebhookEnvelope) -> str | None:
+    # Refund events carry the payment entity too, so this is the payment's key;
+    # without it, the refunded payment id is what a payment event would fall back to.
+    return (
+        envelope.order_id
+        or envelope.payment_id
+        or envelope.refund_entity.get("payment_id")
+        or envelope.refund_id
+    )
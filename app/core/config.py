@@ -5,21 +5,106 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 class Settings(BaseSettings):
     APP_ENV: str = "dev"
     PORT: int = 8084
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # json | text
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_DEBUG_SAMPLE_RATE: float = 0.01
+    LOG_REQUESTS: bool = True
+    METRICS_ENABLED: bool = True
+    HEALTH_REFRESH_INTERVAL_SECONDS: float = 10.0
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = 2.0
+    HEALTH_DEEP_TIMEOUT_SECONDS: float = 3.0
+    METRICS_WORKER_PORT: int | None = None
     DATABASE_URL: str
+    DATABASE_READ_URL: str | None = None
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 10.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_STATEMENT_TIMEOUT_MS: int = 15000
+    # Reconciliation, exports and migrations; 0 disables the timeout.
+    DB_BATCH_STATEMENT_TIMEOUT_MS: int = 0
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 500
     JWT_SECRET: str
     JWT_ALGORITHM: str
     RAZORPAY_KEY_ID: str | None = None
     RAZORPAY_KEY_SECRET: str | None = None
     RAZORPAY_WEBHOOK_SECRET: str | None = None
+    RAZORPAY_BASE_URL: str = "https://api.razorpay.com/v1"
+    RAZORPAY_HTTP2: bool = True
+    RAZORPAY_TIMEOUT_SECONDS: float = 10.0
+    RAZORPAY_CONNECT_TIMEOUT_SECONDS: float = 3.0
+    RAZORPAY_MAX_CONNECTIONS: int = 200
+    RAZORPAY_MAX_KEEPALIVE_CONNECTIONS: int = 50
+    RAZORPAY_MAX_RETRIES: int = 3
+    RAZORPAY_RETRY_BACKOFF_SECONDS: float = 0.2
+    RAZORPAY_REFUND_RATE_PER_SECOND: float = 10.0
+    RAZORPAY_REFUND_BURST: int = 20
+    REFUND_BULK_CONCURRENCY: int = 16
+    REFUND_BULK_MAX_ITEMS: int = 1000
     BOOKING_SERVICE_URL: str = "http://localhost:8083"
+    BOOKING_SERVICE_TIMEOUT_SECONDS: float = 10.0
+    BOOKING_SERVICE_MAX_CONNECTIONS: int = 100
+    BOOKING_CACHE_TTL_SECONDS: float = 5.0
+    BOOKING_CACHE_MAX_ENTRIES: int = 10000
+    BOOKING_INVALIDATION_RETRY_SECONDS: float = 5.0
     AWS_ACCESS_KEY: str | None = None
     AWS_SECRET_KEY: str | None = None
     AWS_REGION: str | None = None
     S3_BUCKET: str | None = None
+    SIGNED_URL_CACHE_BUCKET_SECONDS: int = 300
+    SIGNED_URL_CACHE_MAX_ENTRIES: int = 10000
+    SIGNED_URL_BATCH_MAX_ITEMS: int = 500
+    HISTORY_PAGE_DEFAULT_SIZE: int = 50
+    HISTORY_PAGE_MAX_SIZE: int = 200
+    HISTORY_STREAM_PAGE_SIZE: int = 1000
     PDF_LAMBDA_FUNCTION_NAME: str = "invoice-pdf-generator"
     INVOICE_PDF_ENABLED: bool = True
+    PDF_RENDERER_BACKEND: str = "lambda"
+    PDF_PIPELINE_BATCH_SIZE: int = 50
+    PDF_PIPELINE_CONCURRENCY: int = 8
+    PDF_PIPELINE_POLL_INTERVAL_SECONDS: float = 2.0
+    PDF_PIPELINE_LEASE_SECONDS: float = 300.0
+    PDF_PIPELINE_MAX_ATTEMPTS: int = 8
+    PDF_PIPELINE_BACKOFF_BASE_SECONDS: float = 30.0
+    PDF_PIPELINE_BACKOFF_MAX_SECONDS: float = 3600.0
+    PDF_OFFLINE_OUTPUT_DIR: str = "/tmp/invoice-pdfs"
+    PDF_RENDER_PROCESSES: int = 2
+    S3_MULTIPART_CHUNK_SIZE_MB: int = 8
+    INVOICE_NUMBER_BLOCK_SIZE: int = 20
     BOOKING_PAYMENT_QUEUE_URL: str | None = None
+    OUTBOX_RELAY_BATCH_SIZE: int = 100
+    OUTBOX_RELAY_POLL_INTERVAL_SECONDS: float = 0.5
+    OUTBOX_RELAY_MAX_ATTEMPTS: int = 20
+    OUTBOX_RELAY_BACKOFF_BASE_SECONDS: float = 1.0
+    OUTBOX_RELAY_BACKOFF_MAX_SECONDS: float = 300.0
     REDIS_URL: str = "redis://localhost:6379/0"
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_LOCK_TTL_SECONDS: int = 60
+    SWEEPER_IN_PROCESS: bool = False
+    SWEEPER_INTERVAL_SECONDS: float = 300.0
+    SWEEPER_STALE_AFTER_SECONDS: int = 900
+    SWEEPER_MAX_AGE_DAYS: int = 7
+    SWEEPER_BATCH_SIZE: int = 200
+    SWEEPER_CONCURRENCY: int = 8
+    SWEEPER_RATE_PER_SECOND: float = 5.0
+    SWEEPER_LEADER_TTL_SECONDS: int = 60
+    RECONCILIATION_CHUNK_SIZE: int = 5000
+    RECONCILIATION_STUCK_AFTER_MINUTES: int = 60
+    RECONCILIATION_WINDOW_DAYS: int = 1
+    EXPORT_CHUNK_SIZE: int = 5000
+    SCHEDULE_BULK_MAX_ITEMS: int = 5000
+    SCHEDULE_BULK_CHUNK_SIZE: int = 1000
+    EXPORT_S3_PREFIX: str = "exports"
+    WEBHOOK_INGEST_MODE: str = "direct"  # direct | batched
+    WEBHOOK_INGEST_WINDOW_MS: float = 5.0
+    WEBHOOK_INGEST_MAX_BATCH: int = 500
+    WEBHOOK_WORKER_CONCURRENCY: int = 16
+    WEBHOOK_WORKER_BATCH_SIZE: int = 100
+    WEBHOOK_WORKER_POLL_INTERVAL_SECONDS: float = 2.0
+    WEBHOOK_WORKER_LEASE_SECONDS: int = 120
+    WEBHOOK_WORKER_MAX_ATTEMPTS: int = 10
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     ANONYMOUS_TOKEN_EXPIRE_MINUTES: int = 60
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
@@ -0,0 +1,62 @@
+"""Redis lease so only one replica runs a periodic job at a time."""
+from __future__ import annotations
+
+import asyncio
+import uuid
+
+from app.core.middlewares import logger
+from app.core.redis import redis_client
+
+# Only the current holder may extend or drop the lease.
+_RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class LeaderLease:
+    def __init__(self, name: str, ttl_seconds: float) -> None:
+        self.key = f"leader:{name}"
+        self.ttl_ms = int(ttl_seconds * 1000)
+        self.token = uuid.uuid4().hex
+        self.is_leader = False
+
+    async def acquire(self) -> bool:
+        """Take the lease, or extend it if this process already holds it."""
+        try:
+            if self.is_leader and await redis_client.eval(
+                _RENEW_SCRIPT, 1, self.key, self.token, self.ttl_ms
+            ):
+                return True
+            self.is_leader = bool(
+                await redis_client.set(self.key, self.token, nx=True, px=self.ttl_ms)
+            )
+        except Exception as exc:
+            logger.warning(f"Leader lease {self.key} unavailable: {exc}")
+            self.is_leader = False
+        return self.is_leader
+
+    async def release(self) -> None:
+        if not self.is_leader:
+            return
+        self.is_leader = False
+        try:
+            await redis_client.eval(_RELEASE_SCRIPT, 1, self.key, self.token)
+        except Exception as exc:
+            logger.warning(f"Leader lease {self.key} release failed: {exc}")
+
+    async def keep_alive(self) -> None:
+        """Renew at a third of the TTL until cancelled or the lease is lost."""
+        while self.is_leader:
+            await asyncio.sleep(self.ttl_ms / 3000)
+            if not await self.acquire():
+                logger.warning(f"Lost leader lease {self.key}")
+                return
@@ -0,0 +1,44 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+
+from app.api.health import run_health_refresher
+from app.api.payments.webhook_ingest import close_webhook_ingestor
+from app.core.config import Config
+from app.db.main import dispose_engines
+from app.gateways.razorpay_client import close_razorpay_client
+from app.utils.booking_service import (
+    close_booking_client,
+    run_booking_invalidation_listener,
+    start_booking_client,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start_booking_client()
+    health_stop = asyncio.Event()
+    health_task = asyncio.create_task(run_health_refresher(health_stop))
+    invalidation_stop = asyncio.Event()
+    invalidation_task = asyncio.create_task(
+        run_booking_invalidation_listener(invalidation_stop)
+    )
+    sweeper_stop = asyncio.Event()
+    sweeper_task = None
+    if Config.SWEEPER_IN_PROCESS:
+        from app.workers.stuck_sweeper import build_lease, run_sweeper
+
+        sweeper_task = asyncio.create_task(run_sweeper(sweeper_stop, build_lease()))
+    yield
+    health_stop.set()
+    invalidation_stop.set()
+    sweeper_stop.set()
+    if sweeper_task is not None:
+        await sweeper_task
+    await health_task
+    await invalidation_task
+    await close_webhook_ingestor()
+    await close_booking_client()
+    await close_razorpay_client()
+    await dispose_engines()
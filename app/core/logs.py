@@ -0,0 +1,205 @@
+"""Structured logging that keeps stdout writes off the event loop.
+
+Records are put on a bounded queue by the calling thread and formatted as
+JSON and written by a ``QueueListener`` thread. The request id of the
+current request (set by ``GatewayAuthContextMiddleware``) is attached at
+enqueue time, DEBUG records are sampled, and known-sensitive header and
+payload fields are masked before anything is written.
+"""
+from __future__ import annotations
+
+import atexit
+import copy
+from contextvars import ContextVar
+import logging
+from logging.handlers import QueueHandler, QueueListener
+import queue
+import random
+import sys
+import traceback
+from typing import Any, Mapping
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+    import json
+
+from app.core.config import Config
+
+logger = logging.getLogger("app")
+
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+REDACTED = "***"
+SENSITIVE_HEADERS = frozenset(
+    {
+        "authorization",
+        "cookie",
+        "set-cookie",
+        "x-razorpay-signature",
+        "x-api-key",
+        "x-session-id",
+    }
+)
+SENSITIVE_FIELDS = frozenset(
+    {
+        "card",
+        "card_id",
+        "cvv",
+        "number",
+        "expiry_month",
+        "expiry_year",
+        "vpa",
+        "bank_account",
+        "account_number",
+        "ifsc",
+        "email",
+        "contact",
+        "token",
+        "token_id",
+        "password",
+        "secret",
+        "signature",
+        "razorpay_signature",
+        "acquirer_data",
+    }
+)
+
+# Attributes every LogRecord has; anything else came in through ``extra=``.
+_RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+
+def redact_headers(headers: Mapping[str, str]) -> dict[str, str]:
+    return {
+        name: REDACTED if name.lower() in SENSITIVE_HEADERS else value
+        for name, value in headers.items()
+    }
+
+
+def redact(value: Any) -> Any:
+    """Copy of ``value`` with sensitive keys masked at any depth."""
+    if isinstance(value, Mapping):
+        return {
+            key: REDACTED if str(key).lower() in SENSITIVE_FIELDS else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    return value
+
+
+def _dumps(data: dict) -> str:
+    if orjson is not None:
+        return orjson.dumps(data, default=str).decode()
+    return json.dumps(data, default=str, separators=(",", ":"))
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            data["request_id"] = request_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                data[key] = redact(value)
+        if record.exc_text:
+            data["exc"] = record.exc_text
+        return _dumps(data)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self) -> None:
+        super().__init__("%(asctime)s | %(levelname)s | %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        request_id = getattr(record, "request_id", None)
+        return f"{line} | request_id={request_id}" if request_id else line
+
+
+class ContextFilter(logging.Filter):
+    """Stamps the request id and samples DEBUG records in the caller's context."""
+
+    def __init__(self, debug_sample_rate: float) -> None:
+        super().__init__()
+        self.debug_sample_rate = debug_sample_rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno <= logging.DEBUG and random.random() >= self.debug_sample_rate:
+            return False
+        record.request_id = request_id_var.get()
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Drops records instead of blocking the event loop when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message and traceback here, where the args and the
+        # traceback still exist, but leave JSON formatting to the listener.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: QueueListener | None = None
+
+
+def configure_logging(
+    level: str | None = None,
+    fmt: str | None = None,
+    stream=None,
+) -> QueueListener:
+    """Route the root logger through the queue; safe to call more than once."""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if (fmt or Config.LOG_FORMAT) == "json" else TextFormatter())
+
+    handler = DroppingQueueHandler(queue.Queue(Config.LOG_QUEUE_SIZE))
+    handler.addFilter(ContextFilter(Config.LOG_DEBUG_SAMPLE_RATE))
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level or Config.LOG_LEVEL)
+    # Requests are logged by our own middleware.
+    logging.getLogger("uvicorn.access").disabled = True
+
+    _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
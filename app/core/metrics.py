@@ -0,0 +1,148 @@
+"""Prometheus metrics for the API process and its downstream calls.
+
+Every label takes values from a fixed set (route templates, operation
+names, outcome and status classes, registered webhook event types), never
+from ids or raw paths, so series counts stay bounded.
+"""
+from __future__ import annotations
+
+import time
+
+from prometheus_client import Counter, Gauge, Histogram, REGISTRY, start_http_server
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import func
+from sqlmodel import select
+
+from app.api.payments.models import PaymentWebhook
+from app.core.config import Config
+from app.db.main import get_pool_stats, read_session_factory
+
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+LAG_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "API request latency by route template.",
+    ["method", "route", "status"],
+)
+RAZORPAY_REQUEST_SECONDS = Histogram(
+    "razorpay_request_duration_seconds",
+    "Razorpay API latency by operation, including retries.",
+    ["operation", "outcome"],
+    buckets=SLOW_BUCKETS,
+)
+RAZORPAY_RETRIES = Counter(
+    "razorpay_retries_total",
+    "Razorpay requests resent after a transport error or retryable status.",
+    ["operation"],
+)
+PDF_LAMBDA_SECONDS = Histogram(
+    "pdf_lambda_duration_seconds",
+    "PDF Lambda invocation latency.",
+    ["outcome"],
+    buckets=SLOW_BUCKETS,
+)
+PDF_LAMBDA_FAILURES = Counter(
+    "pdf_lambda_failures_total",
+    "PDF Lambda failures by stage.",
+    ["stage"],
+)
+SQS_PUBLISH_SECONDS = Histogram(
+    "sqs_publish_duration_seconds",
+    "SendMessageBatch latency.",
+    ["outcome"],
+)
+SQS_MESSAGES = Counter(
+    "sqs_messages_total",
+    "Outbox messages handed to SQS by result.",
+    ["result"],
+)
+BOOKING_SERVICE_SECONDS = Histogram(
+    "booking_service_request_duration_seconds",
+    "Booking service latency by operation.",
+    ["operation", "outcome"],
+)
+WEBHOOK_LAG_SECONDS = Histogram(
+    "webhook_lag_seconds",
+    "Receipt time minus the gateway's event created_at.",
+    ["event_type"],
+    buckets=LAG_BUCKETS,
+)
+WEBHOOK_BACKLOG = Gauge(
+    "webhook_backlog",
+    "Stored webhooks not yet processed by the worker.",
+)
+
+WEBHOOK_BACKLOG_REFRESH_SECONDS = 15.0
+_backlog_refreshed_at = 0.0
+
+
+def serve_worker_metrics() -> None:
+    """Expose this worker's registry on METRICS_WORKER_PORT, when set."""
+    if Config.METRICS_WORKER_PORT:
+        start_http_server(Config.METRICS_WORKER_PORT)
+
+
+def status_class(status_code: int) -> str:
+    return f"{status_code // 100}xx"
+
+
+def observe_webhook_lag(event_type: str, created_at) -> None:
+    if isinstance(created_at, (int, float)) and created_at > 0:
+        WEBHOOK_LAG_SECONDS.labels(event_type).observe(max(time.time() - created_at, 0.0))
+
+
+async def refresh_webhook_backlog() -> None:
+    """Recount the unprocessed webhooks at most every 15s (partial index scan)."""
+    global _backlog_refreshed_at
+    now = time.monotonic()
+    if now - _backlog_refreshed_at < WEBHOOK_BACKLOG_REFRESH_SECONDS:
+        return
+    _backlog_refreshed_at = now
+    async with read_session_factory() as session:
+        backlog = await session.scalar(
+            select(func.count()).select_from(PaymentWebhook).where(
+                PaymentWebhook.processed.is_(False)
+            )
+        )
+    WEBHOOK_BACKLOG.set(backlog or 0)
+
+
+class PoolCollector:
+    """Reads SQLAlchemy pool stats from ``async_engine`` (and the replica) at scrape time."""
+
+    def collect(self):
+        gauges = {
+            "size": GaugeMetricFamily("db_pool_size", "Configured pool size.", labels=["pool"]),
+            "checkedOut": GaugeMetricFamily(
+                "db_pool_checked_out", "Connections in use.", labels=["pool"]
+            ),
+            "checkedIn": GaugeMetricFamily(
+                "db_pool_checked_in", "Idle connections in the pool.", labels=["pool"]
+            ),
+            "overflow": GaugeMetricFamily(
+                "db_pool_overflow", "Connections opened beyond pool_size.", labels=["pool"]
+            ),
+        }
+        counters = {
+            "checkoutCount": CounterMetricFamily(
+                "db_pool_checkouts", "Connection checkouts.", labels=["pool"]
+            ),
+            "waitCount": CounterMetricFamily(
+                "db_pool_waits",
+                "Checkouts that queued for a connection (pool and overflow exhausted).",
+                labels=["pool"],
+            ),
+            "waitSecondsTotal": CounterMetricFamily(
+                "db_pool_wait_seconds", "Time spent waiting for a connection.", labels=["pool"]
+            ),
+        }
+        for pool, stats in get_pool_stats().items():
+            for key, family in (*gauges.items(), *counters.items()):
+                if key in stats:
+                    family.add_metric([pool], stats[key])
+        yield from gauges.values()
+        yield from counters.values()
+
+
+REGISTRY.register(PoolCollector())
@@ -1,32 +1,15 @@
 from fastapi import FastAPI
-from fastapi.requests import Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-import time
-import logging
 
+from app.core.logs import configure_logging, logger
 from app.core.request_context import GatewayAuthContextMiddleware
 
-logger = logging.getLogger("uvicorn.access")
-logger.disabled = True
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s | %(levelname)s | %(message)s"
-)
+__all__ = ["logger", "register_middleware"]
 
-def register_middleware(app: FastAPI):
-
-    @app.middleware("http")
-    async def custom_logging(request: Request, call_next):
-        start_time = time.time()
-
-        response = await call_next(request)
-        processing_time = time.time() - start_time
 
-        message = f"{request.client.host}:{request.client.port} - {request.method} - {request.url.path} - {response.status_code} completed after {processing_time}s"
-
-        print(message)
-        return response
+def register_middleware(app: FastAPI):
+    configure_logging()
 
     # app.add_middleware(
     #     CORSMiddleware,
@@ -40,4 +23,5 @@ def register_middleware(app: FastAPI):
         TrustedHostMiddleware,
         allowed_hosts=["localhost", "127.0.0.1","0.0.0.0", "payment-service"],
     )
+    # Outermost: sets the request id and user context and logs the request.
     app.add_middleware(GatewayAuthContextMiddleware)
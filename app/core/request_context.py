@@ -1,83 +1,170 @@
 from fastapi import Request, status
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.common.constants import Roles
+from app.core.config import Config
 from app.core.exceptions import AccessDenied
 from app.core.messages import ErrorMessage
 from app.utils.response import ApiResponse, ErrorDetail
 from app.core.errors import ErrorCode
 
 from typing import Optional
-from pydantic import BaseModel
+import logging
+import time
+import uuid
 from enum import Enum
 
+from app.core.logs import logger, redact_headers, request_id_var
+from app.core.metrics import HTTP_REQUEST_SECONDS, status_class
+
 class AuthStatus(str, Enum):
     AUTHENTICATED = "AUTHENTICATED"
     ANONYMOUS = "ANONYMOUS"
 
 
-class UserContext(BaseModel):
-    auth_status: AuthStatus
-    user_id: Optional[str] = None
-    type: Optional[str] = None
-    session_id: Optional[str] = None
-
-
-class GatewayAuthContextMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-
-        auth_status = request.headers.get("AuthStatus")
-        user_id = request.headers.get("UserId")
-        roles = request.headers.get("UserRoles")
-        user_type = request.headers.get("UserType")
-        session_id = request.headers.get("X-Session-Id")
-        print(request.headers)
-        # 🔐 Enforce gateway presence
-        if not auth_status:
-            return JSONResponse(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                content=ApiResponse(
-                    success=False,
-                    statusCode=401,
-                    message=ErrorMessage.AUTH_CONTEXT_MISSING,
-                    data=None,
-                    errors=[
-                        ErrorDetail(
-                            code=ErrorCode.ACCESS_TOKEN_REQUIRED,
-                            message="Request must pass through gateway",
-                        )
-                    ],
-                ).model_dump(),
-            )
-
-        # 🔍 Validate auth status
-        if auth_status not in AuthStatus.__members__:
-            return JSONResponse(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                content=ApiResponse(
-                    success=False,
-                    statusCode=401,
-                    message=ErrorMessage.AUTH_CONTEXT_MISSING,
-                    data=None,
-                    errors=[
-                        ErrorDetail(
-                            code=ErrorCode.ACCESS_TOKEN_REQUIRED,
-                            message="Invalid X-Auth-Status header",
-                        )
-                    ],
-                ).model_dump(),
+class UserContext:
+    __slots__ = ("auth_status", "user_id", "type", "session_id")
+
+    def __init__(
+        self,
+        auth_status: AuthStatus,
+        user_id: Optional[str] = None,
+        type: Optional[str] = None,
+        session_id: Optional[str] = None,
+    ) -> None:
+        self.auth_status = auth_status
+        self.user_id = user_id
+        self.type = type
+        self.session_id = session_id
+
+
+def _unauthorized(message: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        content=ApiResponse(
+            success=False,
+            statusCode=401,
+            message=ErrorMessage.AUTH_CONTEXT_MISSING,
+            data=None,
+            errors=[
+                ErrorDetail(
+                    code=ErrorCode.ACCESS_TOKEN_REQUIRED,
+                    message=message,
+                )
+            ],
+        ).model_dump(),
+    )
+
+
+_AUTH_MISSING = _unauthorized("Request must pass through gateway")
+_AUTH_INVALID = _unauthorized("Invalid X-Auth-Status header")
+
+_METRIC_METHODS = frozenset({"GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"})
+# Hit by Prometheus and the kubelet directly, not through the gateway.
+_UNAUTHENTICATED_PATHS = frozenset({"/metrics", "/api/v1/health/live", "/api/v1/health/ready"})
+
+_GATEWAY_HEADERS = {
+    b"authstatus": "auth_status",
+    b"userid": "user_id",
+    b"usertype": "type",
+    b"x-session-id": "session_id",
+    b"x-request-id": "request_id",
+}
+
+
+class GatewayAuthContextMiddleware:
+    """Builds the gateway user context, request id and access log in one ASGI pass.
+
+    Headers are read straight from the scope, the context lands in
+    ``request.state.user_context`` and nothing wraps the response body, so
+    streaming responses pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        values = {}
+        for name, value in scope["headers"]:
+            field = _GATEWAY_HEADERS.get(name)
+            if field is not None:
+                values[field] = value.decode("latin-1")
+        request_id = values.get("request_id") or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [
+                    *message.get("headers", ()),
+                    (b"x-request-id", request_id.encode("latin-1")),
+                ]
+            await send(message)
+
+        try:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "gateway headers",
+                    extra={"headers": redact_headers(dict(_decoded(scope["headers"])))},
+                )
+            if scope["path"] in _UNAUTHENTICATED_PATHS:
+                await self.app(scope, receive, send_wrapper)
+                return
+            auth_status = values.get("auth_status")
+            # 🔐 Enforce gateway presence
+            if not auth_status:
+                await _AUTH_MISSING(scope, receive, send_wrapper)
+                return
+            # 🔍 Validate auth status
+            if auth_status not in AuthStatus.__members__:
+                await _AUTH_INVALID(scope, receive, send_wrapper)
+                return
+
+            # 🧠 Build context
+            scope.setdefault("state", {})["user_context"] = UserContext(
+                AuthStatus[auth_status],
+                values.get("user_id"),
+                values.get("type"),
+                values.get("session_id"),
             )
-
-        # 🧠 Build context
-        request.state.user_context = UserContext(
-            auth_status=AuthStatus[auth_status],
-            user_id=user_id,
-            type=user_type,
-            session_id=session_id,
-        )
-
-        return await call_next(request)
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start_time
+            if Config.METRICS_ENABLED:
+                # Route templates, not raw paths, keep the label set bounded.
+                route = scope.get("route")
+                method = scope["method"]
+                HTTP_REQUEST_SECONDS.labels(
+                    method if method in _METRIC_METHODS else "OTHER",
+                    getattr(route, "path", "unmatched"),
+                    status_class(status_code),
+                ).observe(elapsed)
+            if Config.LOG_REQUESTS:
+                client = scope.get("client")
+                logger.info(
+                    "request completed",
+                    extra={
+                        "client": f"{client[0]}:{client[1]}" if client else None,
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status": status_code,
+                        "duration_ms": round(elapsed * 1000, 3),
+                    },
+                )
+            request_id_var.reset(token)
+
+
+def _decoded(headers):
+    for name, value in headers:
+        yield name.decode("latin-1"), value.decode("latin-1")
 
 def _get_user_context(request: Request) -> UserContext:
     user_ctx = getattr(request.state, "user_context", None)
@@ -1,23 +1,163 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+import time
 from typing import AsyncGenerator
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    AsyncEngine,
+    AsyncSession,
+    create_async_engine,
+    async_sessionmaker,
+)
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlmodel import SQLModel
 
 from app.core.config import Config
 
-async_engine = create_async_engine(
-    url=Config.DATABASE_URL,
-    echo=True,
-    pool_pre_ping=True
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that also records how long checkouts wait for a connection.
+
+    ``checkout_count`` counts every checkout; ``wait_count`` only those that
+    found no idle connection and no overflow room, i.e. had to queue.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_count = 0
+        self.wait_count = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _do_get(self):
+        blocked = (
+            self._pool.empty()
+            and self._max_overflow > -1
+            and self._overflow >= self._max_overflow
+        )
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            self.checkout_count += 1
+            if blocked:
+                self.wait_count += 1
+            self.wait_seconds_total += waited
+            if waited > self.wait_seconds_max:
+                self.wait_seconds_max = waited
+
+
+def _connect_args(url: str) -> dict:
+    if "asyncpg" not in url:
+        return {}
+    connect_args: dict = {
+        "prepared_statement_cache_size": Config.DB_PREPARED_STATEMENT_CACHE_SIZE,
+    }
+    if Config.DB_STATEMENT_TIMEOUT_MS:
+        connect_args["server_settings"] = {
+            "statement_timeout": str(Config.DB_STATEMENT_TIMEOUT_MS)
+        }
+    return connect_args
+
+
+def _create_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url=url,
+        echo=Config.DB_ECHO,
+        pool_pre_ping=True,
+        poolclass=InstrumentedQueuePool,
+        pool_size=Config.DB_POOL_SIZE,
+        max_overflow=Config.DB_MAX_OVERFLOW,
+        pool_timeout=Config.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=Config.DB_POOL_RECYCLE_SECONDS,
+        connect_args=_connect_args(url),
+    )
+
+
+async_engine = _create_engine(Config.DATABASE_URL)
+read_engine = (
+    _create_engine(Config.DATABASE_READ_URL) if Config.DATABASE_READ_URL else async_engine
+)
+
+async_session_factory = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, expire_on_commit=False
+)
+read_session_factory = async_sessionmaker(
+    bind=read_engine, class_=AsyncSession, expire_on_commit=False
+)
+# Replica sessions for long batch reads (reconciliation), which replace
+# DB_STATEMENT_TIMEOUT_MS with DB_BATCH_STATEMENT_TIMEOUT_MS.
+batch_read_session_factory = async_sessionmaker(
+    bind=read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    info={"statement_timeout_ms": Config.DB_BATCH_STATEMENT_TIMEOUT_MS},
 )
 
+
+def statement_timeout_sql(timeout_ms: int) -> str:
+    return f"SET LOCAL statement_timeout = {int(timeout_ms)}"
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_session_statement_timeout(session, transaction, connection) -> None:
+    timeout_ms = session.info.get("statement_timeout_ms")
+    if timeout_ms is not None and connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(statement_timeout_sql(timeout_ms))
+
+
+async def override_statement_timeout(conn: AsyncConnection, timeout_ms: int) -> None:
+    """Replace DB_STATEMENT_TIMEOUT_MS for the rest of ``conn``'s transaction."""
+    if conn.dialect.name == "postgresql":
+        await conn.exec_driver_sql(statement_timeout_sql(timeout_ms))
+
+
 async def initdb():
     async with async_engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
 
+
+async def dispose_engines() -> None:
+    await async_engine.dispose()
+    if read_engine is not async_engine:
+        await read_engine.dispose()
+
+
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
-    async_session = async_sessionmaker(
-        bind=async_engine, class_=AsyncSession, expire_on_commit=False
-    )
+    async with async_session_factory() as session:
+        yield session
+
 
-    async with async_session() as session:
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only endpoints; routed to the replica when configured."""
+    async with read_session_factory() as session:
         yield session
+
+
+def pool_stats(engine: AsyncEngine) -> dict:
+    pool = engine.sync_engine.pool
+    stats = {
+        "size": pool.size(),
+        "checkedOut": pool.checkedout(),
+        "checkedIn": pool.checkedin(),
+        "overflow": pool.overflow(),
+    }
+    if isinstance(pool, InstrumentedQueuePool):
+        stats.update(
+            {
+                "checkoutCount": pool.checkout_count,
+                "waitCount": pool.wait_count,
+                "waitSecondsTotal": round(pool.wait_seconds_total, 6),
+                "waitSecondsMax": round(pool.wait_seconds_max, 6),
+            }
+        )
+    return stats
+
+
+def get_pool_stats() -> dict:
+    stats = {"primary": pool_stats(async_engine)}
+    if read_engine is not async_engine:
+        stats["replica"] = pool_stats(read_engine)
+    return stats
@@ -73,10 +73,17 @@ async def run_async_migrations() -> None:
 
     """
 
+    # Migrations take DB_BATCH_STATEMENT_TIMEOUT_MS, not the request-path timeout.
+    connect_args = {}
+    if "asyncpg" in database_url:
+        connect_args["server_settings"] = {
+            "statement_timeout": str(Config.DB_BATCH_STATEMENT_TIMEOUT_MS)
+        }
     connectable = async_engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
         poolclass=pool.NullPool,
+        connect_args=connect_args,
     )
 
     async with connectable.connect() as connection:
@@ -0,0 +1,39 @@
+"""add webhook queue columns
+
+Revision ID: 3b7c1d9e4a21
+Revises: e2a54731bf0e
+Create Date: 2026-10-17 10:12:31.418223
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7c1d9e4a21'
+down_revision: Union[str, Sequence[str], None] = 'e2a54731bf0e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('payment_webhooks', sa.Column('ordering_key', sa.String(length=100), nullable=True))
+    op.add_column('payment_webhooks', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('payment_webhooks', sa.Column('locked_until', sa.DateTime(), nullable=True))
+    op.add_column('payment_webhooks', sa.Column('last_error', sa.Text(), nullable=True))
+    op.add_column('payment_webhooks', sa.Column('processed_at', sa.DateTime(), nullable=True))
+    op.create_index('idx_payment_webhook_unprocessed', 'payment_webhooks', ['created_at'], unique=False, postgresql_where=sa.text('processed = false'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_payment_webhook_unprocessed', table_name='payment_webhooks', postgresql_where=sa.text('processed = false'))
+    op.drop_column('payment_webhooks', 'processed_at')
+    op.drop_column('payment_webhooks', 'last_error')
+    op.drop_column('payment_webhooks', 'locked_until')
+    op.drop_column('payment_webhooks', 'attempts')
+    op.drop_column('payment_webhooks', 'ordering_key')
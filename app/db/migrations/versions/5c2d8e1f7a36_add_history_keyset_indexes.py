@@ -0,0 +1,58 @@
+"""add history keyset indexes
+
+Revision ID: 5c2d8e1f7a36
+Revises: a6e81c4f9d27
+Create Date: 2026-10-17 21:40:27.118342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2d8e1f7a36'
+down_revision: Union[str, Sequence[str], None] = 'a6e81c4f9d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Each history filter plus the (created_at, id) / (issued_at, id) keyset, so a
+# page is one index range scan that stops at LIMIT with no sort.
+INDEXES = [
+    ('idx_payment_user_created', 'payment_transactions', ['user_id', 'created_at', 'id']),
+    ('idx_payment_booking_created', 'payment_transactions', ['booking_id', 'created_at', 'id']),
+    ('idx_payment_created', 'payment_transactions', ['created_at', 'id']),
+    ('idx_refund_created', 'refund_transactions', ['created_at', 'id']),
+    ('idx_invoice_booking_issued', 'invoices', ['booking_id', 'issued_at', 'id']),
+    ('idx_invoice_issued', 'invoices', ['issued_at', 'id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+        # Its lookups are served by the idx_payment_booking_created prefix.
+        op.drop_index(
+            'idx_payment_booking_id',
+            table_name='payment_transactions',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_payment_booking_id',
+            'payment_transactions',
+            ['booking_id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
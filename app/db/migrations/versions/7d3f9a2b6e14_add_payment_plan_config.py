@@ -0,0 +1,38 @@
+"""add payment plan config
+
+Revision ID: 7d3f9a2b6e14
+Revises: 5c2d8e1f7a36
+Create Date: 2026-10-17 23:05:12.640918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d3f9a2b6e14'
+down_revision: Union[str, Sequence[str], None] = '5c2d8e1f7a36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('booking_payment_plan', sa.Column('tour_id', sa.Uuid(), nullable=True))
+    op.add_column('booking_payment_plan', sa.Column('departure_date', sa.Date(), nullable=True))
+    op.add_column('booking_payment_plan', sa.Column('plan_config', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    with op.get_context().autocommit_block():
+        op.create_index('idx_booking_payment_plan_tour', 'booking_payment_plan', ['tour_id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_booking_payment_plan_tour', table_name='booking_payment_plan', postgresql_concurrently=True)
+    op.drop_column('booking_payment_plan', 'plan_config')
+    op.drop_column('booking_payment_plan', 'departure_date')
+    op.drop_column('booking_payment_plan', 'tour_id')
@@ -0,0 +1,41 @@
+"""add event outbox
+
+Revision ID: 8f4e2a6c1d53
+Revises: 3b7c1d9e4a21
+Create Date: 2026-10-17 11:04:52.206311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '8f4e2a6c1d53'
+down_revision: Union[str, Sequence[str], None] = '3b7c1d9e4a21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('event_outbox',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('event_type', sa.String(length=50), nullable=False),
+    sa.Column('deduplication_id', sa.String(length=128), nullable=True),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('delivered_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_event_outbox_pending', 'event_outbox', ['created_at'], unique=False, postgresql_where=sa.text('delivered_at IS NULL'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_event_outbox_pending', table_name='event_outbox', postgresql_where=sa.text('delivered_at IS NULL'))
+    op.drop_table('event_outbox')
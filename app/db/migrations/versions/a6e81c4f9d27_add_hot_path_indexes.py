@@ -0,0 +1,55 @@
+"""add hot path indexes
+
+Revision ID: a6e81c4f9d27
+Revises: d94b6e3a7f12
+Create Date: 2026-10-17 14:52:10.634981
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6e81c4f9d27'
+down_revision: Union[str, Sequence[str], None] = 'd94b6e3a7f12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# CREATE INDEX CONCURRENTLY cannot run inside a transaction, hence the
+# autocommit blocks. If a build fails it leaves an INVALID index behind; drop
+# it and rerun the upgrade.
+INDEXES = [
+    ('idx_payment_gateway_order_id', 'payment_transactions', ['gateway_order_id'], None),
+    ('idx_payment_booking_public_status', 'payment_transactions', ['booking_public_id', 'status'], None),
+    ('idx_refund_payment_transaction_id', 'refund_transactions', ['payment_transaction_id'], None),
+    ('idx_invoice_transaction_id', 'invoices', ['transaction_id'], None),
+    ('idx_invoice_pdf_pending', 'invoices', ['issued_at'], 'pdf_url IS NULL'),
+    ('idx_credit_note_invoice_id', 'credit_notes', ['invoice_id'], None),
+    ('idx_credit_note_pdf_pending', 'credit_notes', ['created_at'], 'pdf_url IS NULL'),
+    ('idx_idempotency_record_created_at', 'idempotency_records', ['created_at'], None),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,31 @@
+"""outbox message group
+
+Revision ID: a8d2f6c4e1b9
+Revises: f1c6a8e2d4b7
+Create Date: 2026-10-19 09:12:37.418206
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8d2f6c4e1b9'
+down_revision: Union[str, Sequence[str], None] = 'f1c6a8e2d4b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Messages are now deduplicated by the outbox row id; the column only
+    # names the FIFO message group (the payment transaction).
+    op.alter_column('event_outbox', 'deduplication_id', new_column_name='message_group_id')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column('event_outbox', 'message_group_id', new_column_name='deduplication_id')
@@ -0,0 +1,40 @@
+"""add payment plan booking unique index
+
+Revision ID: b4e8c2a7d913
+Revises: 7d3f9a2b6e14
+Create Date: 2026-10-18 00:12:48.305127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e8c2a7d913'
+down_revision: Union[str, Sequence[str], None] = '7d3f9a2b6e14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Racing single-booking calls could add a second plan; keep the first.
+    op.execute(
+        """
+        DELETE FROM booking_payment_plan later
+        USING booking_payment_plan earlier
+        WHERE later.booking_id = earlier.booking_id
+          AND (later.created_at, later.id) > (earlier.created_at, earlier.id)
+        """
+    )
+    with op.get_context().autocommit_block():
+        op.create_index('uq_booking_payment_plan_booking', 'booking_payment_plan', ['booking_id'], unique=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('uq_booking_payment_plan_booking', table_name='booking_payment_plan', postgresql_concurrently=True)
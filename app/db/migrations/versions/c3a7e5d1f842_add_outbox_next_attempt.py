@@ -0,0 +1,29 @@
+"""add outbox next attempt
+
+Revision ID: c3a7e5d1f842
+Revises: b4e8c2a7d913
+Create Date: 2026-10-18 09:20:44.517203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a7e5d1f842'
+down_revision: Union[str, Sequence[str], None] = 'b4e8c2a7d913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('event_outbox', sa.Column('next_attempt_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('event_outbox', 'next_attempt_at')
@@ -0,0 +1,56 @@
+"""add document number counters
+
+Revision ID: c51a9e07b2f8
+Revises: 8f4e2a6c1d53
+Create Date: 2026-10-17 11:48:09.771520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c51a9e07b2f8'
+down_revision: Union[str, Sequence[str], None] = '8f4e2a6c1d53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('document_number_counters',
+    sa.Column('series', sa.String(length=10), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('next_value', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('series', 'year')
+    )
+    # Continue after the highest number already issued so new numbers never collide.
+    op.execute(
+        """
+        INSERT INTO document_number_counters (series, year, next_value)
+        SELECT 'INV', split_part(invoice_no, '-', 2)::int,
+               max(split_part(invoice_no, '-', 3)::bigint) + 1
+        FROM invoices
+        WHERE invoice_no ~ '^INV-[0-9]{4}-[0-9]+$'
+        GROUP BY 2
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO document_number_counters (series, year, next_value)
+        SELECT 'CN', split_part(credit_note_number, '-', 2)::int,
+               max(split_part(credit_note_number, '-', 3)::bigint) + 1
+        FROM credit_notes
+        WHERE credit_note_number ~ '^CN-[0-9]{4}-[0-9]+$'
+        GROUP BY 2
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('document_number_counters')
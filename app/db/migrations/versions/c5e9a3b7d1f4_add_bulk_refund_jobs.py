@@ -0,0 +1,38 @@
+"""add bulk refund jobs
+
+Revision ID: c5e9a3b7d1f4
+Revises: a8d2f6c4e1b9
+Create Date: 2026-10-19 10:27:51.906433
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e9a3b7d1f4'
+down_revision: Union[str, Sequence[str], None] = 'a8d2f6c4e1b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('bulk_refund_jobs',
+    sa.Column('key', sa.String(length=150), nullable=False),
+    sa.Column('request_hash', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('results', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('summary', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('bulk_refund_jobs')
@@ -0,0 +1,63 @@
+"""add webhook event unique index
+
+Revision ID: d94b6e3a7f12
+Revises: c51a9e07b2f8
+Create Date: 2026-10-17 14:05:31.208417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd94b6e3a7f12'
+down_revision: Union[str, Sequence[str], None] = 'c51a9e07b2f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+DEDUPE_SQL = """
+    DELETE FROM payment_webhooks
+    WHERE id IN (
+        SELECT id FROM (
+            SELECT id, row_number() OVER (
+                PARTITION BY event_id, event_type
+                ORDER BY processed DESC, created_at, id
+            ) AS copy_no
+            FROM payment_webhooks
+        ) ranked
+        WHERE copy_no > 1
+    )
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # e2a54731bf0e dropped the event_id constraint without a replacement, so
+    # duplicates may exist. Keep the processed (else oldest) copy of each, in
+    # a transaction of its own that commits before the index build.
+    with op.get_context().autocommit_block():
+        op.execute(DEDUPE_SQL)
+        # A duplicate inserted during the build fails it and leaves an INVALID
+        # index behind; drop that so rerunning the migration starts clean.
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS uq_payment_webhook_event")
+        op.create_index(
+            'uq_payment_webhook_event',
+            'payment_webhooks',
+            ['event_id', 'event_type'],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'uq_payment_webhook_event',
+            table_name='payment_webhooks',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,65 @@
+"""add pdf retry state
+
+Revision ID: e5b9d3c1a7f2
+Revises: c3a7e5d1f842
+Create Date: 2026-10-18 11:05:37.281946
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b9d3c1a7f2'
+down_revision: Union[str, Sequence[str], None] = 'c3a7e5d1f842'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# The pending indexes now lead with pdf_attempts so fresh documents are picked
+# before retries. Built CONCURRENTLY under a temporary name, then swapped in.
+PENDING_INDEXES = [
+    ('idx_invoice_pdf_pending', 'invoices', 'issued_at'),
+    ('idx_credit_note_pdf_pending', 'credit_notes', 'created_at'),
+]
+
+
+def _swap_pending_index(name: str, table: str, columns: list[str]) -> None:
+    op.create_index(
+        f'{name}_new',
+        table,
+        columns,
+        unique=False,
+        postgresql_concurrently=True,
+        postgresql_where=sa.text('pdf_url IS NULL'),
+    )
+    op.drop_index(name, table_name=table, postgresql_concurrently=True)
+    op.execute(f'ALTER INDEX {name}_new RENAME TO {name}')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for _, table, _ in PENDING_INDEXES:
+        op.add_column(
+            table,
+            sa.Column('pdf_attempts', sa.Integer(), server_default='0', nullable=False),
+        )
+        op.add_column(table, sa.Column('pdf_next_attempt_at', sa.DateTime(), nullable=True))
+        op.add_column(table, sa.Column('pdf_last_error', sa.Text(), nullable=True))
+    with op.get_context().autocommit_block():
+        for name, table, column in PENDING_INDEXES:
+            _swap_pending_index(name, table, ['pdf_attempts', column])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, column in PENDING_INDEXES:
+            _swap_pending_index(name, table, [column])
+    for _, table, _ in PENDING_INDEXES:
+        op.drop_column(table, 'pdf_last_error')
+        op.drop_column(table, 'pdf_next_attempt_at')
+        op.drop_column(table, 'pdf_attempts')
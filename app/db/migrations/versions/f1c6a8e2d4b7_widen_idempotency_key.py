@@ -0,0 +1,44 @@
+"""widen idempotency key
+
+Revision ID: f1c6a8e2d4b7
+Revises: e5b9d3c1a7f2
+Create Date: 2026-10-18 12:41:09.553810
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c6a8e2d4b7'
+down_revision: Union[str, Sequence[str], None] = 'e5b9d3c1a7f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keys are now prefixed with the user id. Rows stored under the old
+    # unscoped keys can never match again; the cleanup worker ages them out.
+    op.alter_column(
+        'idempotency_records',
+        'key',
+        existing_type=sa.String(length=100),
+        type_=sa.String(length=150),
+        existing_nullable=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM idempotency_records WHERE length(key) > 100")
+    op.alter_column(
+        'idempotency_records',
+        'key',
+        existing_type=sa.String(length=150),
+        type_=sa.String(length=100),
+        existing_nullable=False,
+    )
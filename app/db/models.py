@@ -1,2 +1,2 @@
-from app.api.payments.models import idempotency_record, invoice, payment_transaction,payment_webhook,refund
+from app.api.payments.models import document_number_counter, event_outbox, idempotency_record, invoice, payment_transaction,payment_webhook,refund
 
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import base64
+from datetime import datetime, timezone
+from typing import AsyncIterator
+import uuid
+
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import select
+
+Cursor = tuple[datetime, uuid.UUID]
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Timestamp columns are naive UTC; convert aware datetimes to match."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def encode_cursor(sort_value: datetime, row_id: uuid.UUID) -> str:
+    raw = f"{sort_value.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """Inverse of ``encode_cursor``; raises ValueError on anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        sort_value, row_id = raw.split("|", 1)
+        return naive_utc(datetime.fromisoformat(sort_value)), uuid.UUID(row_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def keyset_query(
+    model,
+    conditions: list,
+    limit: int,
+    *,
+    sort_column=None,
+    after: Cursor | None = None,
+    join: tuple | None = None,
+):
+    """``model`` rows ordered by (sort_column, id) starting after ``after``."""
+    sort_column = model.created_at if sort_column is None else sort_column
+    stmt = select(model)
+    if join is not None:
+        stmt = stmt.join(*join)
+    stmt = stmt.where(*conditions).order_by(sort_column, model.id).limit(limit)
+    if after is not None:
+        # A row-value comparison, which Postgres matches against the (sort, id) index.
+        stmt = stmt.where(tuple_(sort_column, model.id) > tuple_(after[0], after[1]))
+    return stmt
+
+
+async def keyset_pages(
+    session_factory: async_sessionmaker,
+    model,
+    conditions: list,
+    page_size: int,
+    *,
+    sort_column=None,
+    after: Cursor | None = None,
+    join: tuple | None = None,
+) -> AsyncIterator[list]:
+    """Pages of ``model`` rows ordered by (created_at, id), without OFFSET.
+
+    Each page is read in its own short session, so no transaction stays open
+    while the caller works through a page.
+    """
+    sort_key = (model.created_at if sort_column is None else sort_column).key
+    while True:
+        stmt = keyset_query(
+            model, conditions, page_size, sort_column=sort_column, after=after, join=join
+        )
+        async with session_factory() as session:
+            page = (await session.execute(stmt)).scalars().all()
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        after = (getattr(page[-1], sort_key), page[-1].id)
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from app.core.config import Config
+from app.invoices.storage import _get_shared_s3_client
+
+MIN_PART_SIZE = 5 * 1024 * 1024  # S3 rejects smaller parts except the last
+
+
+class S3MultipartUpload:
+    """Streams bytes into one S3 object, buffering at most one part."""
+
+    def __init__(
+        self,
+        key: str,
+        content_type: str,
+        bucket: str | None = None,
+        part_size: int | None = None,
+        client=None,
+    ) -> None:
+        self.bucket = bucket or Config.S3_BUCKET
+        if not self.bucket:
+            raise ValueError("AWS S3 configuration is incomplete")
+        self.key = key
+        self.content_type = content_type
+        self.part_size = max(part_size or Config.S3_MULTIPART_CHUNK_SIZE_MB * 1024 * 1024, MIN_PART_SIZE)
+        self.bytes_written = 0
+        self._client = client or _get_shared_s3_client()
+        self._buffer = bytearray()
+        self._parts: list[dict] = []
+        self._upload_id: str | None = None
+
+    def _upload_part(self, body: bytes) -> None:
+        if self._upload_id is None:
+            self._upload_id = self._client.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key, ContentType=self.content_type
+            )["UploadId"]
+        number = len(self._parts) + 1
+        response = self._client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            PartNumber=number,
+            Body=body,
+        )
+        self._parts.append({"ETag": response["ETag"], "PartNumber": number})
+
+    def write(self, data: bytes) -> None:
+        self._buffer += data
+        self.bytes_written += len(data)
+        while len(self._buffer) >= self.part_size:
+            body = bytes(self._buffer[: self.part_size])
+            del self._buffer[: self.part_size]
+            self._upload_part(body)
+
+    def complete(self) -> str:
+        if self._upload_id is None:
+            # Small exports never reached a full part; one PUT is enough.
+            self._client.put_object(
+                Bucket=self.bucket,
+                Key=self.key,
+                Body=bytes(self._buffer),
+                ContentType=self.content_type,
+            )
+        else:
+            if self._buffer:
+                self._upload_part(bytes(self._buffer))
+            self._client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self._upload_id,
+                MultipartUpload={"Parts": self._parts},
+            )
+        self._buffer.clear()
+        return f"https://{self.bucket}.s3.amazonaws.com/{self.key}"
+
+    def abort(self) -> None:
+        self._buffer.clear()
+        if self._upload_id is not None:
+            self._client.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self._upload_id
+            )
+            self._upload_id = None
@@ -0,0 +1,87 @@
+"""Finance exports: table rows for a period, encoded and streamed chunk by chunk.
+
+Memory is bounded by ``EXPORT_CHUNK_SIZE`` rows plus their encoding whatever
+the period holds: rows come off a server-side cursor, each chunk is encoded
+in a worker thread, and the bytes are yielded (HTTP download) or handed to an
+S3 multipart upload before the next chunk is fetched.
+"""
+from __future__ import annotations
+
+import asyncio
+from datetime import date
+from typing import AsyncIterator
+
+from sqlalchemy import Column
+
+from app.core.config import Config
+from app.db.main import read_engine
+from app.exports.s3 import S3MultipartUpload
+from app.exports.sources import EXPORT_TABLES, export_statement, stream_chunks
+from app.exports.writers import WRITERS, ChunkBuffer, content_type, export_filename
+
+
+async def encode_export(
+    chunks: AsyncIterator[list[tuple]],
+    columns: list[Column],
+    fmt: str,
+    compress: bool = False,
+    stats: dict | None = None,
+) -> AsyncIterator[bytes]:
+    stats = {} if stats is None else stats
+    stats.setdefault("rows", 0)
+    stats.setdefault("bytes", 0)
+    buffer = ChunkBuffer()
+    writer = WRITERS[fmt](buffer, columns, compress)
+    async for chunk in chunks:
+        await asyncio.to_thread(writer.write_rows, chunk)
+        stats["rows"] += len(chunk)
+        data = buffer.drain()
+        if data:
+            stats["bytes"] += len(data)
+            yield data
+    writer.close()
+    data = buffer.drain()
+    if data:
+        stats["bytes"] += len(data)
+        yield data
+
+
+def export_stream(
+    name: str,
+    start: date,
+    end: date,
+    fmt: str = "csv",
+    compress: bool = False,
+    chunk_size: int | None = None,
+    stats: dict | None = None,
+) -> AsyncIterator[bytes]:
+    chunk_size = chunk_size or Config.EXPORT_CHUNK_SIZE
+    chunks = stream_chunks(read_engine, export_statement(name, start, end), chunk_size)
+    return encode_export(chunks, EXPORT_TABLES[name].columns, fmt, compress, stats)
+
+
+def default_s3_key(name: str, start: date, end: date, fmt: str, compress: bool) -> str:
+    return f"{Config.EXPORT_S3_PREFIX.rstrip('/')}/{export_filename(name, start, end, fmt, compress)}"
+
+
+async def export_to_s3(
+    name: str,
+    start: date,
+    end: date,
+    fmt: str = "csv",
+    compress: bool = False,
+    key: str | None = None,
+    chunk_size: int | None = None,
+    stats: dict | None = None,
+) -> str:
+    upload = S3MultipartUpload(
+        key or default_s3_key(name, start, end, fmt, compress), content_type(fmt, compress)
+    )
+    try:
+        async for data in export_stream(name, start, end, fmt, compress, chunk_size, stats):
+            await asyncio.to_thread(upload.write, data)
+        return await asyncio.to_thread(upload.complete)
+    except BaseException:
+        # Parts of an unfinished upload are billed until aborted.
+        upload.abort()
+        raise
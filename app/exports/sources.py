@@ -0,0 +1,58 @@
+"""Period reads of the finance tables through server-side cursors.
+
+Rows come back as plain tuples in chunks of ``chunk_size`` from an asyncpg
+cursor, so the database connection never hands over more than one chunk at a
+time however large the period is.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import AsyncIterator, NamedTuple
+
+from sqlalchemy import Column, Table, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.api.payments.models import CreditNote, Invoice, PaymentTransaction, RefundTransaction
+from app.core.config import Config
+from app.db.main import override_statement_timeout
+
+
+class ExportTable(NamedTuple):
+    table: Table
+    period_column: Column
+
+    @property
+    def columns(self) -> list[Column]:
+        return list(self.table.c)
+
+
+EXPORT_TABLES = {
+    "transactions": ExportTable(
+        PaymentTransaction.__table__, PaymentTransaction.__table__.c.created_at
+    ),
+    "refunds": ExportTable(RefundTransaction.__table__, RefundTransaction.__table__.c.created_at),
+    "invoices": ExportTable(Invoice.__table__, Invoice.__table__.c.issued_at),
+    "credit_notes": ExportTable(CreditNote.__table__, CreditNote.__table__.c.created_at),
+}
+
+
+def export_statement(name: str, start: date, end: date):
+    """Every row of ``name`` in [start, end), in (period column, id) order."""
+    spec = EXPORT_TABLES[name]
+    window_start = datetime(start.year, start.month, start.day)
+    window_end = datetime(end.year, end.month, end.day)
+    return (
+        select(*spec.columns)
+        .where(spec.period_column >= window_start, spec.period_column < window_end)
+        .order_by(spec.period_column, spec.table.c.id)
+    )
+
+
+async def stream_chunks(
+    engine: AsyncEngine, statement, chunk_size: int
+) -> AsyncIterator[list[tuple]]:
+    async with engine.connect() as conn:
+        await override_statement_timeout(conn, Config.DB_BATCH_STATEMENT_TIMEOUT_MS)
+        result = await conn.stream(statement.execution_options(yield_per=chunk_size))
+        async for partition in result.partitions(chunk_size):
+            yield partition
@@ -0,0 +1,157 @@
+"""Incremental CSV and Parquet encoders for export chunks.
+
+Writers take row chunks and write encoded bytes into a ``ChunkBuffer`` that
+the caller drains after every chunk, so only one chunk of rows and its
+encoding are held at a time. CSV is gzipped as a stream; Parquet writes one
+row group per chunk and uses its own gzip codec when compression is asked
+for, since a gzip wrapper around Parquet would make it unreadable by column.
+"""
+from __future__ import annotations
+
+import csv
+from datetime import date, datetime
+from decimal import Decimal
+import gzip
+import io
+import uuid
+
+from sqlalchemy import Column
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - only needed for parquet exports
+    pa = pq = None
+
+GZIP_LEVEL = 6
+
+
+class ChunkBuffer:
+    """Write-only file object whose contents are taken with ``drain``."""
+
+    def __init__(self) -> None:
+        self._parts: list[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        if data:
+            self._parts.append(data)
+            self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def writable(self) -> bool:
+        return True
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+class CsvExportWriter:
+    extension = "csv"
+
+    def __init__(self, sink: ChunkBuffer, columns: list[Column], compress: bool = False) -> None:
+        self._gzip = (
+            gzip.GzipFile(fileobj=sink, mode="wb", compresslevel=GZIP_LEVEL, mtime=0)
+            if compress
+            else None
+        )
+        self._out = self._gzip or sink
+        self._text = io.StringIO()
+        self._csv = csv.writer(self._text)
+        self._csv.writerow([column.name for column in columns])
+        self._flush()
+
+    def _flush(self) -> None:
+        self._out.write(self._text.getvalue().encode())
+        self._text.seek(0)
+        self._text.truncate()
+
+    def write_rows(self, rows: list[tuple]) -> None:
+        self._csv.writerows(rows)
+        self._flush()
+
+    def close(self) -> None:
+        if self._gzip is not None:
+            self._gzip.close()
+
+
+def parquet_available() -> bool:
+    return pa is not None
+
+
+def _arrow_type(column: Column):
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return pa.string()
+    if python_type is Decimal:
+        return pa.decimal128(column.type.precision or 38, column.type.scale or 0)
+    if python_type is datetime:
+        return pa.timestamp("us")
+    if python_type is date:
+        return pa.date32()
+    if python_type is bool:
+        return pa.bool_()
+    if python_type is int:
+        return pa.int64()
+    return pa.string()
+
+
+def _is_uuid(column: Column) -> bool:
+    try:
+        return column.type.python_type is uuid.UUID
+    except NotImplementedError:
+        return False
+
+
+class ParquetExportWriter:
+    extension = "parquet"
+
+    def __init__(self, sink: ChunkBuffer, columns: list[Column], compress: bool = False) -> None:
+        if pa is None:
+            raise RuntimeError("Parquet exports need pyarrow installed")
+        self._schema = pa.schema([pa.field(column.name, _arrow_type(column)) for column in columns])
+        self._uuid_columns = [_is_uuid(column) for column in columns]
+        self._writer = pq.ParquetWriter(
+            sink, self._schema, compression="gzip" if compress else "snappy"
+        )
+
+    def write_rows(self, rows: list[tuple]) -> None:
+        if not rows:
+            return
+        arrays = []
+        for values, field, is_uuid in zip(zip(*rows), self._schema, self._uuid_columns):
+            if is_uuid:
+                values = [None if value is None else str(value) for value in values]
+            arrays.append(pa.array(values, type=field.type))
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+WRITERS = {"csv": CsvExportWriter, "parquet": ParquetExportWriter}
+
+
+def content_type(fmt: str, compress: bool) -> str:
+    if fmt == "parquet":
+        return "application/vnd.apache.parquet"
+    return "application/gzip" if compress else "text/csv"
+
+
+def export_filename(name: str, start: date, end: date, fmt: str, compress: bool) -> str:
+    suffix = ".gz" if compress and fmt == "csv" else ""
+    return f"{name}_{start.isoformat()}_{end.isoformat()}.{WRITERS[fmt].extension}{suffix}"
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+
+import httpx
+
+from app.core.config import Config
+from app.core.metrics import RAZORPAY_REQUEST_SECONDS, RAZORPAY_RETRIES
+from app.gateways.razorpay_webhook import get_webhook_verifier
+
+
+_IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+_RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+LIST_PAGE_SIZE = 100  # Razorpay's maximum ``count`` for list endpoints
+
+
+class RazorpayError(Exception):
+    def __init__(self, message: str, status_code: int | None = None, error: dict | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.error = error or {}
+
+
+class RazorpayClient:
+    """Async Razorpay REST client backed by one shared keep-alive pool.
+
+    Create it once per process (see ``get_razorpay_client``); every call reuses
+    the pooled HTTP/2 connections instead of opening a new session.
+    """
+
+    def __init__(
+        self,
+        key_id: str,
+        key_secret: str,
+        *,
+        base_url: str = Config.RAZORPAY_BASE_URL,
+        timeout: float = Config.RAZORPAY_TIMEOUT_SECONDS,
+        connect_timeout: float = Config.RAZORPAY_CONNECT_TIMEOUT_SECONDS,
+        max_connections: int = Config.RAZORPAY_MAX_CONNECTIONS,
+        max_keepalive_connections: int = Config.RAZORPAY_MAX_KEEPALIVE_CONNECTIONS,
+        http2: bool = Config.RAZORPAY_HTTP2,
+        max_retries: int = Config.RAZORPAY_MAX_RETRIES,
+        retry_backoff: float = Config.RAZORPAY_RETRY_BACKOFF_SECONDS,
+    ) -> None:
+        self.key_id = key_id
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._http = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            auth=(key_id, key_secret),
+            http2=http2,
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            headers={"Content-Type": "application/json"},
+        )
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    async def ping(self, *, timeout: float | None = None) -> int:
+        """Status code of a GET on the API root, without retries (reachability only)."""
+        response = await self._http.get(
+            "/", timeout=httpx.USE_CLIENT_DEFAULT if timeout is None else timeout
+        )
+        return response.status_code
+
+    async def create_order(self, data: dict, *, timeout: float | None = None) -> dict:
+        return await self._request(
+            "order.create", "POST", "/orders", json=data, timeout=timeout
+        )
+
+    async def fetch_order(self, order_id: str, *, timeout: float | None = None) -> dict:
+        return await self._request(
+            "order.fetch", "GET", f"/orders/{order_id}", timeout=timeout
+        )
+
+    async def fetch_order_payments(
+        self, order_id: str, *, timeout: float | None = None
+    ) -> dict:
+        return await self._request(
+            "order.payments", "GET", f"/orders/{order_id}/payments", timeout=timeout
+        )
+
+    async def fetch_payment(self, payment_id: str, *, timeout: float | None = None) -> dict:
+        return await self._request(
+            "payment.fetch", "GET", f"/payments/{payment_id}", timeout=timeout
+        )
+
+    async def refund_payment(
+        self, payment_id: str, data: dict, *, timeout: float | None = None
+    ) -> dict:
+        return await self._request(
+            "payment.refund", "POST", f"/payments/{payment_id}/refund", json=data, timeout=timeout
+        )
+
+    async def fetch_refund(
+        self, payment_id: str, refund_id: str, *, timeout: float | None = None
+    ) -> dict:
+        return await self._request(
+            "refund.fetch",
+            "GET",
+            f"/payments/{payment_id}/refunds/{refund_id}",
+            timeout=timeout,
+        )
+
+    async def fetch_payment_refunds(
+        self,
+        payment_id: str,
+        *,
+        count: int = LIST_PAGE_SIZE,
+        skip: int = 0,
+        timeout: float | None = None,
+    ) -> dict:
+        """One page of a payment's refunds; page with ``skip`` until a short page."""
+        return await self._request(
+            "payment.refunds",
+            "GET",
+            f"/payments/{payment_id}/refunds",
+            params={"count": count, "skip": skip},
+            timeout=timeout,
+        )
+
+    async def list_payments(self, params: dict, *, timeout: float | None = None) -> dict:
+        return await self._request(
+            "payment.list", "GET", "/payments", params=params, timeout=timeout
+        )
+
+    async def list_refunds(self, params: dict, *, timeout: float | None = None) -> dict:
+        return await self._request(
+            "refund.list", "GET", "/refunds", params=params, timeout=timeout
+        )
+
+    async def fetch_settlement_recon(
+        self, params: dict, *, timeout: float | None = None
+    ) -> dict:
+        return await self._request(
+            "settlement.recon",
+            "GET",
+            "/settlements/recon/combined",
+            params=params,
+            timeout=timeout,
+        )
+
+    async def _request(
+        self,
+        operation: str,
+        method: str,
+        path: str,
+        *,
+        json: dict | None = None,
+        params: dict | None = None,
+        timeout: float | None = None,
+    ) -> dict:
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            body = await self._send(
+                operation, method, path, json=json, params=params, timeout=timeout
+            )
+            outcome = "ok"
+            return body
+        finally:
+            RAZORPAY_REQUEST_SECONDS.labels(operation, outcome).observe(
+                time.perf_counter() - started
+            )
+
+    async def _send(
+        self,
+        operation: str,
+        method: str,
+        path: str,
+        *,
+        json: dict | None = None,
+        params: dict | None = None,
+        timeout: float | None = None,
+    ) -> dict:
+        idempotent = method in _IDEMPOTENT_METHODS
+        request_timeout = httpx.USE_CLIENT_DEFAULT if timeout is None else timeout
+        attempt = 0
+        while True:
+            try:
+                response = await self._http.request(
+                    method, path, json=json, params=params, timeout=request_timeout
+                )
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as exc:
+                # The request never reached Razorpay, so any method is safe to resend.
+                if attempt < self.max_retries:
+                    attempt += 1
+                    await self._sleep_before_retry(operation, attempt)
+                    continue
+                raise RazorpayError(f"Razorpay {method} {path} failed: {exc}") from exc
+            except httpx.TransportError as exc:
+                if idempotent and attempt < self.max_retries:
+                    attempt += 1
+                    await self._sleep_before_retry(operation, attempt)
+                    continue
+                raise RazorpayError(f"Razorpay {method} {path} failed: {exc}") from exc
+
+            if (
+                idempotent
+                and response.status_code in _RETRYABLE_STATUS_CODES
+                and attempt < self.max_retries
+            ):
+                attempt += 1
+                await self._sleep_before_retry(operation, attempt)
+                continue
+
+            return self._parse_response(method, path, response)
+
+    async def _sleep_before_retry(self, operation: str, attempt: int) -> None:
+        RAZORPAY_RETRIES.labels(operation).inc()
+        # Full jitter: spreads retries from many coroutines across the window.
+        await asyncio.sleep(random.uniform(0, self.retry_backoff * (2 ** (attempt - 1))))
+
+    @staticmethod
+    def _parse_response(method: str, path: str, response: httpx.Response) -> dict:
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        if response.status_code >= 400:
+            error = body.get("error", {}) if isinstance(body, dict) else {}
+            raise RazorpayError(
+                error.get("description")
+                or f"Razorpay {method} {path} returned {response.status_code}",
+                status_code=response.status_code,
+                error=error,
+            )
+        return body if isinstance(body, dict) else {"items": body}
+
+
+def verify_webhook_signature(body: bytes, signature: str | None, secret: str) -> None:
+    if not signature:
+        raise RazorpayError("Webhook signature missing")
+    if not get_webhook_verifier(secret).verify(body, signature):
+        raise RazorpayError("Invalid webhook signature")
+
+
+_client: RazorpayClient | None = None
+
+
+def get_razorpay_client() -> RazorpayClient:
+    global _client
+    if _client is None:
+        if not Config.RAZORPAY_KEY_ID or not Config.RAZORPAY_KEY_SECRET:
+            raise ValueError("Razorpay keys are not configured")
+        _client = RazorpayClient(Config.RAZORPAY_KEY_ID, Config.RAZORPAY_KEY_SECRET)
+    return _client
+
+
+async def close_razorpay_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
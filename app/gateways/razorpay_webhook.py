@@ -0,0 +1,88 @@
+"""Razorpay webhook verification and parsing on the raw request bytes.
+
+The HMAC key schedule is computed once per secret and copied per delivery,
+and the body is parsed once (with orjson when it is installed) into a small
+envelope holding only the fields the handlers read.
+"""
+from __future__ import annotations
+
+from decimal import Decimal
+import hashlib
+import hmac
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def loads(data: bytes | str):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class WebhookVerifier:
+    __slots__ = ("_base",)
+
+    def __init__(self, secret: str) -> None:
+        self._base = hmac.new(secret.encode(), digestmod=hashlib.sha256)
+
+    def verify(self, body: bytes, signature: str | None) -> bool:
+        if not signature:
+            return False
+        mac = self._base.copy()
+        mac.update(body)
+        return hmac.compare_digest(mac.hexdigest().encode(), signature.encode())
+
+
+_verifiers: dict[str, WebhookVerifier] = {}
+
+
+def get_webhook_verifier(secret: str) -> WebhookVerifier:
+    verifier = _verifiers.get(secret)
+    if verifier is None:
+        verifier = _verifiers[secret] = WebhookVerifier(secret)
+    return verifier
+
+
+class WebhookEnvelope:
+    """The parts of a Razorpay webhook the payment handlers act on."""
+
+    __slots__ = (
+        "event_id",
+        "event_type",
+        "order_id",
+        "payment_id",
+        "refund_id",
+        "amount_paise",
+        "payload",
+    )
+
+    def __init__(self, payload: dict) -> None:
+        entities = payload.get("payload") or {}
+        payment = (entities.get("payment") or {}).get("entity") or {}
+        refund = (entities.get("refund") or {}).get("entity") or {}
+        self.payload = payload
+        self.event_type = payload.get("event")
+        self.event_id = payload.get("id") or payment.get("id")
+        self.order_id = payment.get("order_id")
+        self.payment_id = payment.get("id")
+        self.refund_id = refund.get("id")
+        self.amount_paise = payment.get("amount") or 0
+
+    @classmethod
+    def from_bytes(cls, body: bytes) -> "WebhookEnvelope":
+        payload = loads(body)
+        if not isinstance(payload, dict):
+            raise ValueError("Webhook body must be a JSON object")
+        return cls(payload)
+
+    @property
+    def amount(self) -> Decimal:
+        return Decimal(str(self.amount_paise)) / Decimal(100)
+
+    @property
+    def refund_entity(self) -> dict:
+        return ((self.payload.get("payload") or {}).get("refund") or {}).get("entity") or {}
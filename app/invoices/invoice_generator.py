@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-from fastapi import Path
+from pathlib import Path
+
 from jinja2 import Environment, FileSystemLoader
 
 
-TEMPLATES_DIR = "app/invoices/templates"
+TEMPLATES_DIR = Path(__file__).resolve().parent / "templates"
 env = Environment(loader=FileSystemLoader(str(TEMPLATES_DIR)))
 
 
@@ -2,20 +2,32 @@ from __future__ import annotations
 
 import asyncio
 import json
+import time
 
 import boto3
+from botocore.config import Config as BotoConfig
 
 from app.core.config import Config
+from app.core.logs import logger
+from app.core.metrics import PDF_LAMBDA_FAILURES, PDF_LAMBDA_SECONDS
+
+_client = None
 
 
 def _lambda_client():
-    client_kwargs: dict[str, str] = {}
-    if Config.AWS_REGION:
-        client_kwargs["region_name"] = Config.AWS_REGION
-    if Config.AWS_ACCESS_KEY and Config.AWS_SECRET_KEY:
-        client_kwargs["aws_access_key_id"] = Config.AWS_ACCESS_KEY
-        client_kwargs["aws_secret_access_key"] = Config.AWS_SECRET_KEY
-    return boto3.client("lambda", **client_kwargs)
+    # One client per process; its urllib3 pool is sized for the pipeline's concurrency.
+    global _client
+    if _client is None:
+        client_kwargs: dict = {
+            "config": BotoConfig(max_pool_connections=Config.PDF_PIPELINE_CONCURRENCY)
+        }
+        if Config.AWS_REGION:
+            client_kwargs["region_name"] = Config.AWS_REGION
+        if Config.AWS_ACCESS_KEY and Config.AWS_SECRET_KEY:
+            client_kwargs["aws_access_key_id"] = Config.AWS_ACCESS_KEY
+            client_kwargs["aws_secret_access_key"] = Config.AWS_SECRET_KEY
+        _client = boto3.client("lambda", **client_kwargs)
+    return _client
 
 
 def build_invoice_lambda_payload(
@@ -70,10 +82,11 @@ def build_credit_note_lambda_payload(
     }
 
 
-def _invoke_lambda(payload: dict) -> str:
+def invoke_pdf_lambda(payload: dict) -> str:
     if not Config.PDF_LAMBDA_FUNCTION_NAME:
         raise ValueError("PDF_LAMBDA_FUNCTION_NAME is not configured")
 
+    started = time.perf_counter()
     try:
         response = _lambda_client().invoke(
             FunctionName=Config.PDF_LAMBDA_FUNCTION_NAME,
@@ -81,13 +94,17 @@ def _invoke_lambda(payload: dict) -> str:
             Payload=json.dumps(payload),
         )
     except Exception as exc:
-        print(f"[lambda_pdf] invoke failed: {exc}")
+        PDF_LAMBDA_SECONDS.labels("error").observe(time.perf_counter() - started)
+        PDF_LAMBDA_FAILURES.labels("invoke").inc()
+        logger.error(f"[lambda_pdf] invoke failed: {exc}")
         raise
+    PDF_LAMBDA_SECONDS.labels("ok").observe(time.perf_counter() - started)
 
     try:
         lambda_payload = json.loads(response["Payload"].read())
     except Exception as exc:
-        print(f"[lambda_pdf] payload parse failed: {exc}")
+        PDF_LAMBDA_FAILURES.labels("parse").inc()
+        logger.error(f"[lambda_pdf] payload parse failed: {exc}")
         raise
 
     try:
@@ -101,9 +118,13 @@ def _invoke_lambda(payload: dict) -> str:
             raise ValueError("Invalid Lambda response for PDF generation")
         return str(pdf_url)
     except Exception as exc:
-        print(f"[lambda_pdf] response validation failed: {exc}, payload={lambda_payload}")
+        PDF_LAMBDA_FAILURES.labels("validate").inc()
+        logger.error(
+            f"[lambda_pdf] response validation failed: {exc}",
+            extra={"payload": lambda_payload},
+        )
         raise
 
 
 async def generate_pdf_via_lambda(payload: dict) -> str:
-    return await asyncio.to_thread(_invoke_lambda, payload)
+    return await asyncio.to_thread(invoke_pdf_lambda, payload)
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+import heapq
+from typing import Awaitable, Callable
+
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.api.payments.models import DocumentNumberCounter
+from app.core.config import Config
+from app.db.main import async_engine
+
+INVOICE_SERIES = "INV"
+CREDIT_NOTE_SERIES = "CN"
+
+ReserveBlock = Callable[[str, int, int], Awaitable[int]]
+
+
+async def reserve_block_from_db(series: str, year: int, size: int) -> int:
+    """Reserve ``size`` numbers for (series, year) and return the first one.
+
+    Runs on its own connection so the counter row lock is held only for this
+    single upsert, not for the caller's whole transaction.
+    """
+    table = DocumentNumberCounter.__table__
+    stmt = (
+        insert(table)
+        .values(series=series, year=year, next_value=1 + size)
+        .on_conflict_do_update(
+            index_elements=[table.c.series, table.c.year],
+            set_={"next_value": table.c.next_value + size},
+        )
+        .returning(table.c.next_value)
+    )
+    async with async_engine.begin() as conn:
+        next_value = (await conn.execute(stmt)).scalar_one()
+    return next_value - size
+
+
+class BlockNumberAllocator:
+    """Hands out per-(series, year) sequence numbers from cached blocks.
+
+    Only one database round-trip is made per ``block_size`` numbers. Numbers
+    whose transaction rolled back are handed back with ``release`` and reissued
+    before the block continues, so a retried webhook does not burn one. What
+    is lost is bounded by the process: when it stops, the unused tail of each
+    block plus any handed-back numbers not yet reissued become gaps. A reissued
+    number can be dated after a higher one issued in the meantime.
+    """
+
+    def __init__(self, reserve_block: ReserveBlock, block_size: int) -> None:
+        if block_size < 1:
+            raise ValueError("block_size must be >= 1")
+        self._reserve_block = reserve_block
+        self._block_size = block_size
+        self._blocks: dict[tuple[str, int], tuple[int, int]] = {}
+        self._locks: dict[tuple[str, int], asyncio.Lock] = {}
+        self._returned: dict[tuple[str, int], list[int]] = {}
+
+    def release(self, series: str, year: int, value: int) -> None:
+        heapq.heappush(self._returned.setdefault((series, year), []), value)
+
+    def _take(self, key: tuple[str, int]) -> int | None:
+        returned = self._returned.get(key)
+        if returned:
+            return heapq.heappop(returned)
+        block = self._blocks.get(key)
+        if block is None or block[0] >= block[1]:
+            return None
+        value, end = block
+        self._blocks[key] = (value + 1, end)
+        return value
+
+    async def allocate(self, series: str, year: int) -> int:
+        key = (series, year)
+        value = self._take(key)
+        if value is not None:
+            return value
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            value = self._take(key)
+            if value is not None:
+                return value
+            start = await self._reserve_block(series, year, self._block_size)
+            self._blocks[key] = (start + 1, start + self._block_size)
+            return start
+
+
+def format_document_number(series: str, year: int, value: int) -> str:
+    return f"{series}-{year}-{str(value).zfill(6)}"
+
+
+document_number_allocator = BlockNumberAllocator(
+    reserve_block_from_db, Config.INVOICE_NUMBER_BLOCK_SIZE
+)
+
+
+_SESSION_NUMBERS = "document_numbers"
+
+
+@event.listens_for(Session, "after_rollback")
+def _release_rolled_back_numbers(session: Session) -> None:
+    for series, year, value in session.info.pop(_SESSION_NUMBERS, ()):
+        document_number_allocator.release(series, year, value)
+
+
+@event.listens_for(Session, "after_commit")
+def _forget_committed_numbers(session: Session) -> None:
+    session.info.pop(_SESSION_NUMBERS, None)
+
+
+async def allocate_document_number(series: str, session: AsyncSession | None = None) -> str:
+    """Next number of ``series``; with ``session``, handed back if it rolls back."""
+    year = datetime.utcnow().year
+    value = await document_number_allocator.allocate(series, year)
+    if session is not None:
+        session.sync_session.info.setdefault(_SESSION_NUMBERS, []).append((series, year, value))
+    return format_document_number(series, year, value)
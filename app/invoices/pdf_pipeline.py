@@ -0,0 +1,199 @@
+"""Backfills ``pdf_url`` for invoices and credit notes in batches.
+
+Documents are created without a PDF on the webhook path; this stage picks them
+up, renders them with bounded concurrency and writes the URLs back. Failed
+renders are retried with exponential backoff up to a fixed number of attempts.
+"""
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+import logging
+
+from sqlalchemy import bindparam, func, or_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select
+
+from app.api.payments.models import CreditNote, Invoice
+from app.core.config import Config
+from app.db.main import async_session_factory
+from app.invoices.lambda_pdf import (
+    build_credit_note_lambda_payload,
+    build_invoice_lambda_payload,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CUSTOMER_NAME = "Customer"
+DEFAULT_PACKAGE_NAME = "Travel Package"
+_MAX_ERROR_LENGTH = 1000
+
+
+def invoice_pdf_payload(invoice: Invoice) -> dict:
+    return build_invoice_lambda_payload(
+        invoice_number=invoice.invoice_no,
+        date=invoice.issued_at.strftime("%Y-%m-%d"),
+        booking_id=invoice.booking_public_id,
+        customer_name=DEFAULT_CUSTOMER_NAME,
+        package_name=DEFAULT_PACKAGE_NAME,
+        total_amount=str(invoice.amount),
+        file_name=invoice.invoice_no,
+    )
+
+
+def credit_note_pdf_payload(credit_note: CreditNote, invoice: Invoice) -> dict:
+    return build_credit_note_lambda_payload(
+        credit_note_number=credit_note.credit_note_number,
+        invoice_number=invoice.invoice_no,
+        date=credit_note.created_at.strftime("%Y-%m-%d"),
+        booking_id=invoice.booking_public_id,
+        customer_name=DEFAULT_CUSTOMER_NAME,
+        package_name=DEFAULT_PACKAGE_NAME,
+        total_amount=str(invoice.amount),
+        refund_amount=str(credit_note.amount),
+        file_name=credit_note.credit_note_number,
+    )
+
+
+def backoff_seconds(attempts: int) -> float:
+    return min(
+        Config.PDF_PIPELINE_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1),
+        Config.PDF_PIPELINE_BACKOFF_MAX_SECONDS,
+    )
+
+
+def _due(model):
+    return (
+        model.pdf_url.is_(None),
+        model.pdf_attempts < Config.PDF_PIPELINE_MAX_ATTEMPTS,
+        or_(model.pdf_next_attempt_at.is_(None), model.pdf_next_attempt_at <= func.now()),
+    )
+
+
+async def _claim_pending(
+    session: AsyncSession, limit: int
+) -> tuple[list[tuple[Invoice, dict]], list[tuple[CreditNote, dict]]]:
+    """Lock due documents, fresh ones before retries, and lease them out.
+
+    The lease (``pdf_next_attempt_at`` pushed into the future) keeps other
+    workers off the rows once the claiming transaction commits; if this worker
+    dies mid-render the rows become due again when it runs out.
+    """
+    invoices = (
+        await session.execute(
+            select(Invoice)
+            .where(*_due(Invoice))
+            .order_by(Invoice.pdf_attempts, Invoice.issued_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+    ).scalars().all()
+    invoice_jobs = [(invoice, invoice_pdf_payload(invoice)) for invoice in invoices]
+
+    credit_note_jobs: list[tuple[CreditNote, dict]] = []
+    remaining = limit - len(invoice_jobs)
+    if remaining > 0:
+        rows = (
+            await session.execute(
+                select(CreditNote, Invoice)
+                .join(Invoice, CreditNote.invoice_id == Invoice.id)
+                .where(*_due(CreditNote))
+                .order_by(CreditNote.pdf_attempts, CreditNote.created_at)
+                .limit(remaining)
+                .with_for_update(skip_locked=True, of=CreditNote)
+            )
+        ).all()
+        credit_note_jobs = [
+            (credit_note, credit_note_pdf_payload(credit_note, invoice))
+            for credit_note, invoice in rows
+        ]
+
+    lease_until = func.now() + timedelta(seconds=Config.PDF_PIPELINE_LEASE_SECONDS)
+    for model, jobs in ((Invoice, invoice_jobs), (CreditNote, credit_note_jobs)):
+        if jobs:
+            await session.execute(
+                update(model)
+                .where(model.id.in_([document.id for document, _ in jobs]))
+                .values(pdf_next_attempt_at=lease_until)
+                .execution_options(synchronize_session=False)
+            )
+    return invoice_jobs, credit_note_jobs
+
+
+async def render_payloads(
+    renderer, payloads: list[dict], concurrency: int
+) -> list[tuple[str | None, str | None]]:
+    """Render every payload; returns (url, error) per payload, in order."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def render(payload: dict) -> tuple[str | None, str | None]:
+        async with semaphore:
+            try:
+                return await renderer.render(payload), None
+            except Exception as exc:
+                logger.error(f"PDF rendering failed for {payload.get('fileName')}: {exc}")
+                return None, f"{type(exc).__name__}: {exc}"[:_MAX_ERROR_LENGTH]
+
+    return await asyncio.gather(*(render(payload) for payload in payloads))
+
+
+async def _record_results(session: AsyncSession, model, jobs: list, results: list) -> int:
+    rendered = [
+        {"id": document.id, "pdf_url": url, "pdf_last_error": None}
+        for (document, _), (url, _) in zip(jobs, results)
+        if url
+    ]
+    failed = [
+        {
+            "_id": document.id,
+            "_error": error or "Renderer returned no URL",
+            "_delay": timedelta(seconds=backoff_seconds(document.pdf_attempts + 1)),
+        }
+        for (document, _), (url, error) in zip(jobs, results)
+        if not url
+    ]
+    if rendered:
+        await session.execute(update(model), rendered)
+    if failed:
+        table = model.__table__
+        await session.execute(
+            update(table)
+            .where(table.c.id == bindparam("_id"))
+            .values(
+                pdf_attempts=table.c.pdf_attempts + 1,
+                pdf_last_error=bindparam("_error"),
+                pdf_next_attempt_at=func.now() + bindparam("_delay"),
+            ),
+            failed,
+        )
+    return len(rendered)
+
+
+async def run_pdf_batch(renderer, batch_size: int, concurrency: int) -> tuple[int, int]:
+    """Render one batch of pending documents. Returns (claimed, rendered).
+
+    Rows are claimed in one short transaction and results written back in
+    another; nothing is locked while the renderer runs. A failed render bumps
+    ``pdf_attempts`` and backs the row off exponentially, and rows that reach
+    ``PDF_PIPELINE_MAX_ATTEMPTS`` are left for an operator (``pdf_last_error``
+    says why), so broken documents cannot crowd out new ones.
+    """
+    async with async_session_factory() as session:
+        async with session.begin():
+            invoice_jobs, credit_note_jobs = await _claim_pending(session, batch_size)
+        jobs = [*invoice_jobs, *credit_note_jobs]
+        if not jobs:
+            return 0, 0
+
+        results = await render_payloads(
+            renderer, [payload for _, payload in jobs], concurrency
+        )
+
+        async with session.begin():
+            rendered = await _record_results(
+                session, Invoice, invoice_jobs, results[:len(invoice_jobs)]
+            )
+            rendered += await _record_results(
+                session, CreditNote, credit_note_jobs, results[len(invoice_jobs):]
+            )
+    return len(jobs), rendered
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import io
+from pathlib import Path
+
+from xhtml2pdf import pisa
+
+from app.core.config import Config
+from app.invoices.invoice_generator import render_template
+from app.invoices.lambda_pdf import invoke_pdf_lambda
+from app.invoices.storage import upload_bytes_to_s3
+
+TEMPLATES_BY_TYPE = {
+    "invoice": "invoice.html",
+    "credit_note": "credit_note.html",
+}
+
+
+def template_context(payload: dict) -> dict:
+    data = dict(payload.get("data", {}))
+    data.setdefault("booking_public_id", data.get("booking_id"))
+    return data
+
+
+def pdf_object_key(payload: dict) -> str:
+    return f"{payload['type']}s/{payload['fileName']}.pdf"
+
+
+def render_pdf_bytes(template_name: str, context: dict) -> bytes:
+    """Render a template to PDF bytes. Runs inside the render process pool."""
+    html = render_template(template_name, context)
+    buffer = io.BytesIO()
+    result = pisa.CreatePDF(html, dest=buffer)
+    if result.err:
+        raise ValueError(f"PDF rendering failed for {template_name}")
+    return buffer.getvalue()
+
+
+class LambdaPdfRenderer:
+    """Renders through the PDF Lambda using the shared, pooled client."""
+
+    def __init__(self, concurrency: int = Config.PDF_PIPELINE_CONCURRENCY) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="pdf-lambda"
+        )
+
+    async def render(self, payload: dict) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, invoke_pdf_lambda, payload)
+
+    async def aclose(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+class LocalPdfRenderer:
+    """Renders PDFs in a process pool and uploads the bytes to S3 from memory.
+
+    Returns the same S3 URL format as the Lambda, so the signed-URL flow is
+    unchanged.
+    """
+
+    def __init__(
+        self,
+        processes: int = Config.PDF_RENDER_PROCESSES,
+        concurrency: int = Config.PDF_PIPELINE_CONCURRENCY,
+    ) -> None:
+        self._processes = ProcessPoolExecutor(max_workers=processes)
+        self._uploads = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="pdf-s3"
+        )
+
+    async def render(self, payload: dict) -> str:
+        loop = asyncio.get_running_loop()
+        pdf = await loop.run_in_executor(
+            self._processes,
+            render_pdf_bytes,
+            TEMPLATES_BY_TYPE[payload["type"]],
+            template_context(payload),
+        )
+        return await loop.run_in_executor(
+            self._uploads, upload_bytes_to_s3, pdf, pdf_object_key(payload)
+        )
+
+    async def aclose(self) -> None:
+        self._processes.shutdown(wait=False, cancel_futures=True)
+        self._uploads.shutdown(wait=False)
+
+
+class OfflinePdfRenderer:
+    """Renders the Jinja2 templates to local HTML files; no AWS calls.
+
+    Meant for load-testing the pipeline offline, not for customer documents.
+    """
+
+    def __init__(self, output_dir: str = Config.PDF_OFFLINE_OUTPUT_DIR) -> None:
+        self._output_dir = Path(output_dir)
+        self._output_dir.mkdir(parents=True, exist_ok=True)
+
+    async def render(self, payload: dict) -> str:
+        html = render_template(TEMPLATES_BY_TYPE[payload["type"]], template_context(payload))
+        path = self._output_dir / f"{payload['fileName']}.html"
+        await asyncio.to_thread(path.write_text, html, "utf-8")
+        return path.resolve().as_uri()
+
+    async def aclose(self) -> None:
+        return None
+
+
+def build_pdf_renderer(backend: str | None = None):
+    backend = (backend or Config.PDF_RENDERER_BACKEND).lower()
+    if backend == "lambda":
+        return LambdaPdfRenderer()
+    if backend == "local":
+        return LocalPdfRenderer()
+    if backend == "offline":
+        return OfflinePdfRenderer()
+    raise ValueError(f"Unsupported PDF renderer backend: {backend}")
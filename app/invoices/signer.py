@@ -0,0 +1,194 @@
+"""SigV4 query-string signing for invoice PDF downloads, without boto3 clients.
+
+``S3UrlSigner`` resolves credentials once (static keys from config, else the
+default botocore chain, which refreshes role credentials on its own) and keeps
+the derived signing key for the current UTC day, so a presigned GET is a few
+HMACs. Signed URLs are memoized per (invoice_no, expires_in) for one
+"expiry bucket": every URL in a bucket is signed from the bucket start and
+with the bucket length added to its lifetime, so a cached URL always has at
+least ``expires_in`` seconds left when it is handed out. Near the 7-day
+ceiling there is less room to backdate, and the URL is only cached for
+whatever room is left. A URL signed with temporary credentials stops working
+when their session token expires, so it is only cached while the token
+outlives the URL's promised lifetime.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from datetime import datetime, timezone
+import hashlib
+import hmac
+import time
+from typing import NamedTuple
+from urllib.parse import quote
+
+import botocore.session
+
+from app.core.config import Config
+
+MAX_EXPIRES_SECONDS = 604800  # SigV4 presigned URL ceiling (7 days)
+_ALGORITHM = "AWS4-HMAC-SHA256"
+
+
+class SigningCredentials(NamedTuple):
+    access_key: str
+    secret_key: str
+    token: str | None
+    # Epoch seconds at which temporary credentials stop working; None if static.
+    expires_at: float | None = None
+
+
+def _hmac(key: bytes, message: str) -> bytes:
+    return hmac.new(key, message.encode(), hashlib.sha256).digest()
+
+
+def _quote(value: str, safe: str = "-_.~") -> str:
+    return quote(value, safe=safe)
+
+
+class S3UrlSigner:
+    def __init__(self, region: str, credentials: SigningCredentials | None = None) -> None:
+        self.region = region
+        self._static = credentials
+        self._provider = None
+        self._signing_key: tuple[tuple[str, str], bytes] | None = None
+
+    def credentials(self) -> SigningCredentials:
+        if self._static is not None:
+            return self._static
+        if self._provider is None:
+            self._provider = botocore.session.get_session().get_credentials()
+            if self._provider is None:
+                raise ValueError("No AWS credentials available for URL signing")
+        frozen = self._provider.get_frozen_credentials()
+        # Refreshable (role) credentials carry their expiry; static ones do not.
+        expiry = getattr(self._provider, "_expiry_time", None)
+        return SigningCredentials(
+            frozen.access_key,
+            frozen.secret_key,
+            frozen.token,
+            expiry.timestamp() if expiry is not None else None,
+        )
+
+    def _key_for(self, secret_key: str, day: str) -> bytes:
+        cache_key = (secret_key, day)
+        if self._signing_key is None or self._signing_key[0] != cache_key:
+            key = _hmac(f"AWS4{secret_key}".encode(), day)
+            key = _hmac(key, self.region)
+            key = _hmac(key, "s3")
+            self._signing_key = (cache_key, _hmac(key, "aws4_request"))
+        return self._signing_key[1]
+
+    def host_and_path(self, bucket: str, key: str) -> tuple[str, str]:
+        path = "/" + _quote(key, safe="-_.~/")
+        if "." in bucket:
+            # Dotted bucket names do not match the wildcard certificate.
+            return f"s3.{self.region}.amazonaws.com", f"/{bucket}{path}"
+        return f"{bucket}.s3.{self.region}.amazonaws.com", path
+
+    def presign_get(
+        self,
+        bucket: str,
+        key: str,
+        expires_in: int,
+        signed_at: float | None = None,
+        host: str | None = None,
+        credentials: SigningCredentials | None = None,
+    ) -> str:
+        credentials = credentials or self.credentials()
+        moment = datetime.fromtimestamp(
+            time.time() if signed_at is None else signed_at, tz=timezone.utc
+        )
+        amz_date = moment.strftime("%Y%m%dT%H%M%SZ")
+        day = amz_date[:8]
+        scope = f"{day}/{self.region}/s3/aws4_request"
+
+        resolved_host, path = self.host_and_path(bucket, key)
+        host = host or resolved_host
+        params = {
+            "X-Amz-Algorithm": _ALGORITHM,
+            "X-Amz-Credential": f"{credentials.access_key}/{scope}",
+            "X-Amz-Date": amz_date,
+            "X-Amz-Expires": str(expires_in),
+            "X-Amz-SignedHeaders": "host",
+        }
+        if credentials.token:
+            params["X-Amz-Security-Token"] = credentials.token
+        query = "&".join(f"{_quote(k)}={_quote(v)}" for k, v in sorted(params.items()))
+
+        canonical_request = f"GET\n{path}\n{query}\nhost:{host}\n\nhost\nUNSIGNED-PAYLOAD"
+        string_to_sign = "\n".join(
+            (_ALGORITHM, amz_date, scope, hashlib.sha256(canonical_request.encode()).hexdigest())
+        )
+        signature = hmac.new(
+            self._key_for(credentials.secret_key, day), string_to_sign.encode(), hashlib.sha256
+        ).hexdigest()
+        return f"https://{host}{path}?{query}&X-Amz-Signature={signature}"
+
+
+_signer: S3UrlSigner | None = None
+
+
+def get_url_signer() -> S3UrlSigner:
+    global _signer
+    if _signer is None:
+        static = None
+        if Config.AWS_ACCESS_KEY and Config.AWS_SECRET_KEY:
+            static = SigningCredentials(Config.AWS_ACCESS_KEY, Config.AWS_SECRET_KEY, None)
+        _signer = S3UrlSigner(Config.AWS_REGION or "us-east-1", static)
+    return _signer
+
+
+def expiry_bucket(expires_in: int, now: float | None = None) -> tuple[int, int]:
+    """(bucket_start, bucket_seconds) for URLs of this lifetime at ``now``."""
+    size = max(1, min(Config.SIGNED_URL_CACHE_BUCKET_SECONDS, expires_in // 2))
+    now = time.time() if now is None else now
+    return int(now // size * size), size
+
+
+# (invoice_no, expires_in) -> (valid_until, url)
+_url_cache: OrderedDict[tuple[str, int], tuple[float, str]] = OrderedDict()
+
+
+def cached_invoice_url(invoice_no: str, expires_in: int) -> str | None:
+    key = (invoice_no, expires_in)
+    entry = _url_cache.get(key)
+    if entry is None:
+        return None
+    if entry[0] <= time.time():
+        _url_cache.pop(key, None)
+        return None
+    _url_cache.move_to_end(key)
+    return entry[1]
+
+
+def sign_invoice_url(invoice_no: str, bucket: str, key: str, expires_in: int) -> str:
+    """Signed GET valid for at least ``expires_in`` seconds from now; memoized per bucket.
+
+    X-Amz-Date has one-second resolution, so "now" is the current whole second.
+    Temporary credentials can make the URL die sooner; see the module docstring.
+    """
+    now = time.time()
+    bucket_start, size = expiry_bucket(expires_in, now)
+    # Backdating by more than this would push the lifetime past the ceiling.
+    slack = MAX_EXPIRES_SECONDS - expires_in
+    signed_at = max(bucket_start, int(now) - slack)
+    lifetime = min(expires_in + size, MAX_EXPIRES_SECONDS)
+    signer = get_url_signer()
+    credentials = signer.credentials()
+    url = signer.presign_get(
+        bucket, key, lifetime, signed_at=signed_at, credentials=credentials
+    )
+    # Handing the URL out after this would leave it less than expires_in.
+    valid_until = signed_at + lifetime - expires_in
+    if credentials.expires_at is not None:
+        valid_until = min(valid_until, credentials.expires_at - expires_in)
+    cache_key = (invoice_no, expires_in)
+    if valid_until <= now:
+        _url_cache.pop(cache_key, None)
+        return url
+    _url_cache[cache_key] = (valid_until, url)
+    _url_cache.move_to_end(cache_key)
+    while len(_url_cache) > Config.SIGNED_URL_CACHE_MAX_ENTRIES:
+        _url_cache.popitem(last=False)
+    return url
@@ -1,9 +1,16 @@
 from __future__ import annotations
 
+from functools import lru_cache
+import io
+
 import boto3
+from boto3.s3.transfer import TransferConfig
 from urllib.parse import urlparse
 
 from app.core.config import Config
+from app.invoices.signer import get_url_signer
+
+_shared_s3_client = None
 
 
 def _build_s3_client():
@@ -16,7 +23,15 @@ def _build_s3_client():
     return boto3.client("s3", **client_kwargs)
 
 
-def _extract_bucket_key_from_url(url: str) -> tuple[str, str]:
+def _get_shared_s3_client():
+    global _shared_s3_client
+    if _shared_s3_client is None:
+        _shared_s3_client = _build_s3_client()
+    return _shared_s3_client
+
+
+@lru_cache(maxsize=4096)
+def extract_bucket_key_from_url(url: str) -> tuple[str, str]:
     parsed = urlparse(url)
     host_parts = parsed.netloc.split(".")
     path = parsed.path.lstrip("/")
@@ -46,10 +61,22 @@ def upload_to_s3(file_path: str, key: str) -> str:
     return f"https://{Config.S3_BUCKET}.s3.amazonaws.com/{key}"
 
 
-def generate_presigned_url_from_s3_url(url: str, expires_in: int = 3600) -> str:
-    bucket, key = _extract_bucket_key_from_url(url)
-    return _build_s3_client().generate_presigned_url(
-        ClientMethod="get_object",
-        Params={"Bucket": bucket, "Key": key},
-        ExpiresIn=expires_in,
+def upload_bytes_to_s3(data: bytes, key: str, content_type: str = "application/pdf") -> str:
+    """Upload in-memory bytes; large payloads go up as a multipart upload."""
+    if not (Config.AWS_REGION and Config.S3_BUCKET):
+        raise ValueError("AWS S3 configuration is incomplete")
+
+    chunk_size = Config.S3_MULTIPART_CHUNK_SIZE_MB * 1024 * 1024
+    _get_shared_s3_client().upload_fileobj(
+        io.BytesIO(data),
+        Config.S3_BUCKET,
+        key,
+        ExtraArgs={"ContentType": content_type},
+        Config=TransferConfig(multipart_threshold=chunk_size, multipart_chunksize=chunk_size),
     )
+    return f"https://{Config.S3_BUCKET}.s3.amazonaws.com/{key}"
+
+
+def generate_presigned_url_from_s3_url(url: str, expires_in: int = 3600) -> str:
+    bucket, key = extract_bucket_key_from_url(url)
+    return get_url_signer().presign_get(bucket, key, expires_in)
@@ -0,0 +1,351 @@
+"""Joins a gateway record stream against our payment and refund rows.
+
+The feed is consumed in chunks. For each chunk the matching rows are loaded
+with one indexed ``IN`` query per entity kind into a dict keyed by gateway
+id, and every gateway record is probed against it, so memory is bounded by
+the chunk size rather than the length of the date range.
+
+The reverse pass walks our SUCCESS payments and PROCESSED refunds and
+reports the ones the feed never mentioned. ``reconcile_windows`` runs both
+passes one window (a day by default) at a time: the gateway ids seen in a
+window are kept only until that window's reverse pass has run, which is as
+soon as the next window's first ``REVERSE_PASS_GRACE`` has been read. So at
+most one window plus that margin of ids is held, however long the range.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import AsyncIterable, AsyncIterator, Callable, NamedTuple, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlmodel import select
+
+from app.api.payments.helpers import amount_to_paise, money
+from app.api.payments.models import PaymentTransaction, RefundTransaction
+from app.db.pagination import keyset_pages
+from app.reconciliation.feeds import GatewayRecord, epoch_seconds
+
+CAPTURED_STATUSES = frozenset({"captured"})
+REFUND_DONE_STATUSES = frozenset({"processed"})
+# Our rows from the last minutes of a window may only reach the gateway
+# after it closes: the reverse pass also accepts ids from the next window's
+# first minutes, and leaves the range's last minutes to the next run.
+REVERSE_PASS_GRACE = timedelta(minutes=30)
+
+
+class Mismatch(NamedTuple):
+    kind: str
+    gateway_id: str | None
+    reference: str | None
+    gateway_value: str | None
+    our_value: str | None
+    detail: str
+
+
+class SeenIds:
+    """Gateway ids the forward pass came across in one window, for the reverse pass.
+
+    Records created before ``carry_until`` (unix seconds) also go to the
+    previous window's ``SeenIds``, whose reverse pass has not run yet.
+    """
+
+    __slots__ = ("order_ids", "refund_ids", "previous", "carry_until")
+
+    def __init__(self, previous: SeenIds | None = None, carry_until: int = 0) -> None:
+        self.order_ids: set[str] = set()
+        self.refund_ids: set[str] = set()
+        self.previous = previous
+        self.carry_until = carry_until
+
+    def add(self, record: GatewayRecord) -> None:
+        if record.kind == "payment":
+            if record.order_id:
+                self.order_ids.add(record.order_id)
+        else:
+            self.refund_ids.add(record.gateway_id)
+        if self.previous is not None and record.created_at < self.carry_until:
+            self.previous.add(record)
+
+
+async def _chunks(
+    feed: AsyncIterable[GatewayRecord], size: int
+) -> AsyncIterator[list[GatewayRecord]]:
+    chunk: list[GatewayRecord] = []
+    async for record in feed:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def _load_transactions(
+    session: AsyncSession, order_ids: set[str]
+) -> dict[str, PaymentTransaction]:
+    if not order_ids:
+        return {}
+    rows = await session.execute(
+        select(PaymentTransaction).where(PaymentTransaction.gateway_order_id.in_(order_ids))
+    )
+    return {txn.gateway_order_id: txn for txn in rows.scalars()}
+
+
+async def _load_refunds(
+    session: AsyncSession, refund_ids: set[str]
+) -> dict[str, RefundTransaction]:
+    if not refund_ids:
+        return {}
+    rows = await session.execute(
+        select(RefundTransaction).where(RefundTransaction.refund_id.in_(refund_ids))
+    )
+    return {refund.refund_id: refund for refund in rows.scalars()}
+
+
+def compare_payment(record: GatewayRecord, txn: PaymentTransaction | None) -> Mismatch | None:
+    if record.status not in CAPTURED_STATUSES:
+        if (
+            txn is not None
+            and txn.status == "SUCCESS"
+            and txn.gateway_payment_id == record.gateway_id
+        ):
+            return Mismatch(
+                "STATUS_DRIFT", record.gateway_id, txn.transaction_id,
+                record.status, txn.status, "Gateway payment not captured but marked SUCCESS",
+            )
+        return None
+    if txn is None:
+        return Mismatch(
+            "MISSING_TRANSACTION", record.gateway_id, record.order_id,
+            str(record.amount_paise), None, "Captured payment has no payment_transactions row",
+        )
+    if txn.status != "SUCCESS":
+        return Mismatch(
+            "MISSING_CAPTURE", record.gateway_id, txn.transaction_id,
+            record.status, txn.status, "Captured at the gateway but not marked SUCCESS",
+        )
+    ours = amount_to_paise(money(txn.amount))
+    if ours != record.amount_paise:
+        return Mismatch(
+            "AMOUNT_DRIFT", record.gateway_id, txn.transaction_id,
+            str(record.amount_paise), str(ours), "Captured amount differs (paise)",
+        )
+    return None
+
+
+def compare_refund(record: GatewayRecord, refund: RefundTransaction | None) -> Mismatch | None:
+    done = record.status in REFUND_DONE_STATUSES
+    if refund is None:
+        if not done:
+            return None
+        return Mismatch(
+            "MISSING_REFUND", record.gateway_id, record.payment_id,
+            str(record.amount_paise), None, "Processed refund has no refund_transactions row",
+        )
+    if done and refund.status != "PROCESSED":
+        return Mismatch(
+            "REFUND_STATUS_DRIFT", record.gateway_id, str(refund.id),
+            record.status, refund.status, "Processed at the gateway but not marked PROCESSED",
+        )
+    if not done and record.status == "failed" and refund.status == "PROCESSED":
+        return Mismatch(
+            "REFUND_STATUS_DRIFT", record.gateway_id, str(refund.id),
+            record.status, refund.status, "Failed at the gateway but marked PROCESSED",
+        )
+    ours = amount_to_paise(money(refund.amount))
+    if ours != record.amount_paise:
+        return Mismatch(
+            "AMOUNT_DRIFT", record.gateway_id, str(refund.id),
+            str(record.amount_paise), str(ours), "Refund amount differs (paise)",
+        )
+    return None
+
+
+def payment_missing_at_gateway(txn: PaymentTransaction, seen: SeenIds) -> Mismatch | None:
+    if txn.gateway_order_id in seen.order_ids:
+        return None
+    return Mismatch(
+        "MISSING_AT_GATEWAY", txn.gateway_payment_id, txn.transaction_id,
+        None, txn.status, "Marked SUCCESS but absent from the gateway feed",
+    )
+
+
+def refund_missing_at_gateway(refund: RefundTransaction, seen: SeenIds) -> Mismatch | None:
+    if refund.refund_id in seen.refund_ids:
+        return None
+    return Mismatch(
+        "REFUND_MISSING_AT_GATEWAY", refund.refund_id, str(refund.id),
+        None, refund.status, "Marked PROCESSED but absent from the gateway feed",
+    )
+
+
+async def reconcile_feed(
+    feed: AsyncIterable[GatewayRecord],
+    session_factory: async_sessionmaker,
+    chunk_size: int = 5000,
+    stats: dict | None = None,
+    seen: SeenIds | None = None,
+) -> AsyncIterator[Mismatch]:
+    """Forward pass: every gateway record against our row for it.
+
+    With ``seen`` given, the gateway ids are recorded there for
+    ``find_missing_at_gateway``.
+    """
+    stats = stats if stats is not None else {}
+    stats.setdefault("gatewayRecords", 0)
+    async for chunk in _chunks(feed, chunk_size):
+        stats["gatewayRecords"] += len(chunk)
+        if seen is not None:
+            for record in chunk:
+                seen.add(record)
+        order_ids = {r.order_id for r in chunk if r.kind == "payment" and r.order_id}
+        refund_ids = {r.gateway_id for r in chunk if r.kind == "refund"}
+        async with session_factory() as session:
+            transactions = await _load_transactions(session, order_ids)
+            refunds = await _load_refunds(session, refund_ids)
+
+        for record in chunk:
+            if record.kind == "payment":
+                if not record.order_id:
+                    continue  # not created through this service
+                mismatch = compare_payment(record, transactions.get(record.order_id))
+            else:
+                mismatch = compare_refund(record, refunds.get(record.gateway_id))
+            if mismatch is not None:
+                yield mismatch
+
+
+async def find_stuck_rows(
+    session_factory: async_sessionmaker,
+    start: date,
+    end: date,
+    stuck_after: timedelta,
+    page_size: int = 1000,
+) -> AsyncIterator[Mismatch]:
+    """Our INITIATED payments and PENDING/INITIATED refunds older than ``stuck_after``."""
+    window_start = datetime(start.year, start.month, start.day)
+    window_end = min(datetime(end.year, end.month, end.day), datetime.utcnow() - stuck_after)
+
+    async for page in keyset_pages(
+        session_factory,
+        PaymentTransaction,
+        [
+            PaymentTransaction.status == "INITIATED",
+            PaymentTransaction.created_at >= window_start,
+            PaymentTransaction.created_at < window_end,
+        ],
+        page_size,
+    ):
+        for txn in page:
+            yield Mismatch(
+                "STUCK_INITIATED", txn.gateway_order_id, txn.transaction_id,
+                None, txn.status, f"INITIATED since {txn.created_at.isoformat()}",
+            )
+
+    async for page in keyset_pages(
+        session_factory,
+        RefundTransaction,
+        [
+            RefundTransaction.status.in_(("PENDING", "INITIATED")),
+            RefundTransaction.created_at >= window_start,
+            RefundTransaction.created_at < window_end,
+        ],
+        page_size,
+    ):
+        for refund in page:
+            yield Mismatch(
+                "STUCK_REFUND", refund.refund_id, str(refund.id),
+                None, refund.status, f"{refund.status} since {refund.created_at.isoformat()}",
+            )
+
+
+async def find_missing_at_gateway(
+    session_factory: async_sessionmaker,
+    start: date,
+    end: date,
+    seen: SeenIds,
+    page_size: int = 1000,
+    grace: bool = True,
+) -> AsyncIterator[Mismatch]:
+    """Reverse pass: our SUCCESS payments and PROCESSED refunds the feed lacked.
+
+    With ``grace``, rows from the last ``REVERSE_PASS_GRACE`` of the window
+    are skipped; pass False once ``seen`` has the next window's first ids.
+    """
+    window_start = datetime(start.year, start.month, start.day)
+    window_end = datetime(end.year, end.month, end.day)
+    if grace:
+        window_end -= REVERSE_PASS_GRACE
+
+    async for page in keyset_pages(
+        session_factory,
+        PaymentTransaction,
+        [
+            PaymentTransaction.status == "SUCCESS",
+            PaymentTransaction.created_at >= window_start,
+            PaymentTransaction.created_at < window_end,
+        ],
+        page_size,
+    ):
+        for txn in page:
+            mismatch = payment_missing_at_gateway(txn, seen)
+            if mismatch is not None:
+                yield mismatch
+
+    async for page in keyset_pages(
+        session_factory,
+        RefundTransaction,
+        [
+            RefundTransaction.status == "PROCESSED",
+            RefundTransaction.created_at >= window_start,
+            RefundTransaction.created_at < window_end,
+        ],
+        page_size,
+    ):
+        for refund in page:
+            mismatch = refund_missing_at_gateway(refund, seen)
+            if mismatch is not None:
+                yield mismatch
+
+
+def day_windows(start: date, end: date, days: int) -> list[tuple[date, date]]:
+    windows = []
+    while start < end:
+        windows.append((start, min(start + timedelta(days=days), end)))
+        start = windows[-1][1]
+    return windows
+
+
+async def reconcile_windows(
+    feed_for: Callable[[date, date], AsyncIterable[GatewayRecord]],
+    windows: Sequence[tuple[date, date]],
+    session_factory: async_sessionmaker,
+    chunk_size: int = 5000,
+    stats: dict | None = None,
+    reverse: bool = False,
+) -> AsyncIterator[Mismatch]:
+    """Forward pass over ``feed_for(start, end)`` per window, each window's
+    reverse pass right after the next window's forward pass.
+    """
+    previous: tuple[date, date, SeenIds] | None = None
+    for start, end in windows:
+        seen = None
+        if reverse:
+            carry_until = epoch_seconds(start) + int(REVERSE_PASS_GRACE.total_seconds())
+            seen = SeenIds(previous[2] if previous else None, carry_until)
+        async for mismatch in reconcile_feed(
+            feed_for(start, end), session_factory, chunk_size, stats, seen
+        ):
+            yield mismatch
+        if previous is not None:
+            seen.previous = None
+            async for mismatch in find_missing_at_gateway(
+                session_factory, previous[0], previous[1], previous[2], grace=False
+            ):
+                yield mismatch
+        previous = (start, end, seen) if reverse else None
+    if previous is not None:
+        async for mismatch in find_missing_at_gateway(
+            session_factory, previous[0], previous[1], previous[2]
+        ):
+            yield mismatch
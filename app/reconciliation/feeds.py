@@ -0,0 +1,228 @@
+"""Gateway-side record streams for reconciliation.
+
+Every feed is an async generator of ``GatewayRecord`` and holds at most one
+page (or CSV row) in memory, so a date range with millions of entities can be
+streamed.
+"""
+from __future__ import annotations
+
+import asyncio
+import csv
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+import random
+from typing import AsyncIterator, Iterator, NamedTuple
+
+from app.gateways.razorpay_client import RazorpayClient
+
+PAGE_SIZE = 100  # Razorpay's maximum ``count`` for list endpoints
+
+
+class GatewayRecord(NamedTuple):
+    kind: str  # "payment" | "refund"
+    gateway_id: str
+    payment_id: str | None
+    order_id: str | None
+    amount_paise: int
+    status: str
+    created_at: int  # unix seconds
+
+
+def epoch_seconds(day: date) -> int:
+    return int(datetime(day.year, day.month, day.day, tzinfo=timezone.utc).timestamp())
+
+
+def payment_record(entity: dict) -> GatewayRecord:
+    return GatewayRecord(
+        "payment",
+        entity["id"],
+        entity["id"],
+        entity.get("order_id"),
+        int(entity.get("amount") or 0),
+        entity.get("status") or "",
+        int(entity.get("created_at") or 0),
+    )
+
+
+def refund_record(entity: dict) -> GatewayRecord:
+    return GatewayRecord(
+        "refund",
+        entity["id"],
+        entity.get("payment_id"),
+        None,
+        int(entity.get("amount") or 0),
+        entity.get("status") or "",
+        int(entity.get("created_at") or 0),
+    )
+
+
+async def _paginate(fetch, params: dict) -> AsyncIterator[dict]:
+    skip = 0
+    while True:
+        page = await fetch({**params, "count": PAGE_SIZE, "skip": skip})
+        items = page.get("items") or []
+        for item in items:
+            yield item
+        if len(items) < PAGE_SIZE:
+            return
+        skip += len(items)
+
+
+async def razorpay_feed(
+    client: RazorpayClient, start: date, end: date
+) -> AsyncIterator[GatewayRecord]:
+    """Payments, then refunds, created in [start, end) per the Razorpay API."""
+    window = {"from": epoch_seconds(start), "to": epoch_seconds(end) - 1}
+    async for entity in _paginate(client.list_payments, window):
+        yield payment_record(entity)
+    async for entity in _paginate(client.list_refunds, window):
+        yield refund_record(entity)
+
+
+def _settlement_record(item: dict) -> GatewayRecord | None:
+    kind = item.get("type")
+    if kind == "payment":
+        return GatewayRecord(
+            "payment",
+            item["entity_id"],
+            item["entity_id"],
+            item.get("order_id"),
+            int(item.get("amount") or 0),
+            "captured",
+            int(item.get("created_at") or 0),
+        )
+    if kind == "refund":
+        return GatewayRecord(
+            "refund",
+            item["entity_id"],
+            item.get("payment_id"),
+            item.get("order_id"),
+            int(item.get("amount") or 0),
+            "processed",
+            int(item.get("created_at") or 0),
+        )
+    return None  # adjustments, transfers, fees
+
+
+async def razorpay_settlement_feed(
+    client: RazorpayClient, start: date, end: date
+) -> AsyncIterator[GatewayRecord]:
+    """Settled payments and refunds, one settlement day at a time."""
+    day = start
+    while day < end:
+        params = {"year": day.year, "month": day.month, "day": day.day}
+        async for item in _paginate(client.fetch_settlement_recon, params):
+            record = _settlement_record(item)
+            if record is not None:
+                yield record
+        day += timedelta(days=1)
+
+
+def _csv_amount_paise(value: str) -> int:
+    # Dashboard exports carry rupees ("1250.00"); API recon carries paise.
+    value = (value or "0").strip()
+    if "." in value:
+        return int((Decimal(value) * 100).to_integral_value())
+    return int(value)
+
+
+def _csv_epoch(value: str) -> int:
+    value = (value or "").strip()
+    if not value:
+        return 0
+    if value.isdigit():
+        return int(value)
+    return int(datetime.fromisoformat(value.replace(" ", "T")).replace(tzinfo=timezone.utc).timestamp())
+
+
+def _iter_csv(path: str) -> Iterator[GatewayRecord]:
+    with open(path, newline="") as handle:
+        for row in csv.DictReader(handle):
+            record = _settlement_record(
+                {
+                    "type": (row.get("type") or "").strip().lower(),
+                    "entity_id": (row.get("entity_id") or "").strip(),
+                    "payment_id": (row.get("payment_id") or "").strip() or None,
+                    "order_id": (row.get("order_id") or "").strip() or None,
+                    "amount": _csv_amount_paise(row.get("amount")),
+                    "created_at": _csv_epoch(row.get("created_at")),
+                }
+            )
+            if record is not None and record.gateway_id:
+                yield record
+
+
+async def settlement_csv_feed(path: str, yield_every: int = 1000) -> AsyncIterator[GatewayRecord]:
+    """Rows of an exported Razorpay settlement recon CSV."""
+    for index, record in enumerate(_iter_csv(path), start=1):
+        yield record
+        if index % yield_every == 0:
+            await asyncio.sleep(0)
+
+
+class FakeGatewayFeed:
+    """Deterministic local stand-in for the Razorpay feeds.
+
+    Produces ``count`` captured payments (``order_{n}`` / ``pay_{n}``) plus a
+    refund for every ``refund_every``-th one, and injects known drift: a share
+    of payments get a different amount, and a share of refunds report failure.
+    ``write_csv`` dumps the same stream as a settlement CSV.
+    """
+
+    def __init__(
+        self,
+        count: int,
+        *,
+        seed: int = 7,
+        refund_every: int = 10,
+        amount_drift_rate: float = 0.001,
+        failed_refund_rate: float = 0.01,
+        start: date | None = None,
+    ) -> None:
+        self.count = count
+        self.seed = seed
+        self.refund_every = refund_every
+        self.amount_drift_rate = amount_drift_rate
+        self.failed_refund_rate = failed_refund_rate
+        self.start = start or date.today()
+
+    def records(self) -> Iterator[GatewayRecord]:
+        rng = random.Random(self.seed)
+        base = epoch_seconds(self.start)
+        for n in range(1, self.count + 1):
+            amount = 100_000 + (n % 50) * 1_000
+            if rng.random() < self.amount_drift_rate:
+                amount += 100
+            created = base + n % 86_400
+            yield GatewayRecord(
+                "payment", f"pay_{n}", f"pay_{n}", f"order_{n}", amount, "captured", created
+            )
+            if n % self.refund_every == 0:
+                status = "failed" if rng.random() < self.failed_refund_rate else "processed"
+                yield GatewayRecord(
+                    "refund", f"rfnd_{n}", f"pay_{n}", None, amount // 2, status, created
+                )
+
+    async def __aiter__(self) -> AsyncIterator[GatewayRecord]:
+        for index, record in enumerate(self.records(), start=1):
+            yield record
+            if index % 1000 == 0:
+                await asyncio.sleep(0)
+
+    def write_csv(self, path: str) -> None:
+        with open(path, "w", newline="") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(["entity_id", "type", "amount", "payment_id", "order_id", "created_at"])
+            for record in self.records():
+                if record.kind == "refund" and record.status != "processed":
+                    continue
+                writer.writerow(
+                    [
+                        record.gateway_id,
+                        record.kind,
+                        record.amount_paise,
+                        record.payment_id or "",
+                        record.order_id or "",
+                        record.created_at,
+                    ]
+                )
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from collections import Counter
+import csv
+import json
+import sys
+from typing import TextIO
+
+from app.reconciliation.engine import Mismatch
+
+
+class ReconciliationReport:
+    """Writes mismatches as they are found (CSV or NDJSON) and counts them."""
+
+    def __init__(self, stream: TextIO, fmt: str = "csv") -> None:
+        if fmt not in {"csv", "ndjson"}:
+            raise ValueError("fmt must be csv or ndjson")
+        self.stream = stream
+        self.fmt = fmt
+        self.counts: Counter[str] = Counter()
+        self._csv = csv.writer(stream) if fmt == "csv" else None
+        if self._csv is not None:
+            self._csv.writerow(Mismatch._fields)
+
+    def add(self, mismatch: Mismatch) -> None:
+        self.counts[mismatch.kind] += 1
+        if self._csv is not None:
+            self._csv.writerow(mismatch)
+        else:
+            self.stream.write(json.dumps(mismatch._asdict()) + "\n")
+
+    def summary(self, stats: dict | None = None) -> dict:
+        return {
+            **(stats or {}),
+            "mismatches": sum(self.counts.values()),
+            "byKind": dict(sorted(self.counts.items())),
+        }
+
+    def print_summary(self, stats: dict | None = None, stream: TextIO = sys.stderr) -> None:
+        stream.write(json.dumps(self.summary(stats), indent=2) + "\n")
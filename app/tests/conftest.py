@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "db: needs a migrated Postgres at DATABASE_URL; set RUN_DB_TESTS=1"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.environ.get("RUN_DB_TESTS"):
+        return
+    skip_db = pytest.mark.skip(reason="set RUN_DB_TESTS=1 to run against DATABASE_URL")
+    for item in items:
+        if "db" in item.keywords:
+            item.add_marker(skip_db)
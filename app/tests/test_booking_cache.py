@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.utils import booking_service
+
+
+def test_invalidation_during_fetch_keeps_the_stale_booking_out_of_the_cache(monkeypatch):
+    versions = iter(["old", "new"])
+
+    async def run():
+        gate = asyncio.Event()
+
+        async def fetch(booking_id: str, user_id: str) -> dict:
+            version = next(versions)
+            if version == "old":
+                await gate.wait()
+            return {"id": booking_id, "version": version}
+
+        monkeypatch.setattr(booking_service, "_fetch_booking_upstream", fetch)
+        stale = asyncio.create_task(booking_service.fetch_booking_details("bk_1", "usr_1"))
+        await asyncio.sleep(0)
+
+        booking_service.invalidate_booking_cache("bk_1")
+        fresh = await booking_service.fetch_booking_details("bk_1", "usr_1")
+        gate.set()
+        return (await stale)["version"], fresh["version"]
+
+    booking_service._cache.clear()
+    assert asyncio.run(run()) == ("old", "new")
+    assert booking_service._cache_get(("bk_1", "usr_1"))["version"] == "new"
+    assert not booking_service._invalidated_at
+    assert not booking_service._fetch_started
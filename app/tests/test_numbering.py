@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.invoices.numbering import BlockNumberAllocator, format_document_number
+
+
+def _counting_reserve():
+    calls = []
+    counters: dict[tuple[str, int], int] = {}
+
+    async def reserve(series: str, year: int, size: int) -> int:
+        calls.append((series, year, size))
+        start = counters.get((series, year), 1)
+        counters[(series, year)] = start + size
+        return start
+
+    return reserve, calls
+
+
+def test_allocator_reserves_one_block_per_block_size():
+    reserve, calls = _counting_reserve()
+    allocator = BlockNumberAllocator(reserve, 5)
+
+    async def allocate_many():
+        return [await allocator.allocate("INV", 2026) for _ in range(12)]
+
+    assert asyncio.run(allocate_many()) == list(range(1, 13))
+    assert len(calls) == 3
+
+
+def test_allocator_is_unique_under_concurrency():
+    reserve, _ = _counting_reserve()
+    allocator = BlockNumberAllocator(reserve, 7)
+
+    async def allocate_concurrently():
+        return await asyncio.gather(*(allocator.allocate("INV", 2026) for _ in range(100)))
+
+    values = asyncio.run(allocate_concurrently())
+    assert sorted(values) == list(range(1, 101))
+
+
+def test_released_numbers_are_reissued_first():
+    reserve, _ = _counting_reserve()
+    allocator = BlockNumberAllocator(reserve, 10)
+
+    async def scenario():
+        first = [await allocator.allocate("CN", 2026) for _ in range(3)]
+        allocator.release("CN", 2026, first[1])
+        return first, [await allocator.allocate("CN", 2026) for _ in range(2)]
+
+    first, after = asyncio.run(scenario())
+    assert first == [1, 2, 3]
+    assert after == [2, 4]
+
+
+def test_series_and_years_are_independent():
+    reserve, _ = _counting_reserve()
+    allocator = BlockNumberAllocator(reserve, 10)
+
+    async def scenario():
+        return (
+            await allocator.allocate("INV", 2026),
+            await allocator.allocate("CN", 2026),
+            await allocator.allocate("INV", 2027),
+        )
+
+    assert asyncio.run(scenario()) == (1, 1, 1)
+
+
+def test_format_document_number():
+    assert format_document_number("INV", 2026, 42) == "INV-2026-000042"
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+import uuid
+
+import pytest
+
+from app.db.pagination import decode_cursor, encode_cursor, naive_utc
+
+ROW_ID = uuid.UUID("6f1c2d3e-4a5b-4c6d-8e9f-0a1b2c3d4e5f")
+
+
+@pytest.mark.parametrize(
+    "sort_value",
+    [
+        datetime(2026, 3, 1, 12, 30, 45, 123456),
+        datetime(2026, 3, 1, 12, 30, 45),
+        datetime(2026, 1, 1),
+    ],
+)
+def test_cursor_round_trips(sort_value):
+    cursor = encode_cursor(sort_value, ROW_ID)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (sort_value, ROW_ID)
+
+
+def test_aware_cursor_decodes_to_naive_utc():
+    aware = datetime(2026, 3, 1, 18, 0, tzinfo=timezone(timedelta(hours=5, minutes=30)))
+
+    assert decode_cursor(encode_cursor(aware, ROW_ID)) == (datetime(2026, 3, 1, 12, 30), ROW_ID)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "",
+        "not a cursor",
+        "////",
+        encode_cursor(datetime(2026, 3, 1), ROW_ID)[:-4],
+        "MjAyNi0wMy0wMVQwMDowMDowMA",  # timestamp without an id
+        "bm90LWEtZGF0ZXw2ZjFjMmQzZS00YTViLTRjNmQtOGU5Zi0wYTFiMmMzZDRlNWY",  # bad timestamp
+        "gIGC",  # not UTF-8
+    ],
+)
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
+
+
+def test_naive_utc_leaves_naive_values_alone():
+    value = datetime(2026, 3, 1, 12, 30)
+
+    assert naive_utc(value) is value
+    assert naive_utc(value.replace(tzinfo=timezone.utc)) == value
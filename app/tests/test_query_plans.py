@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import pytest
+
+pytestmark = pytest.mark.db
+
+
+@pytest.fixture(scope="module")
+def hot_path_plans():
+    from scripts.check_query_plans import explain_hot_paths, sync_engine
+
+    engine = sync_engine()
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            yield explain_hot_paths(connection, rows=20_000, no_seqscan=True)
+        finally:
+            transaction.rollback()
+    engine.dispose()
+
+
+def test_hot_paths_have_a_usable_index(hot_path_plans):
+    from scripts.check_query_plans import seq_scans
+
+    scanned = {name: seq_scans(plan) for name, plan in hot_path_plans.items()}
+    assert {name: tables for name, tables in scanned.items() if tables} == {}
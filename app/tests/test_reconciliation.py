@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from collections import Counter
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+
+from app.api.payments.helpers import money
+from app.reconciliation.engine import (
+    SeenIds,
+    compare_payment,
+    compare_refund,
+    day_windows,
+    payment_missing_at_gateway,
+    refund_missing_at_gateway,
+)
+from app.reconciliation.feeds import FakeGatewayFeed, GatewayRecord
+
+
+def _txn(record: GatewayRecord, status: str = "SUCCESS", amount_paise: int | None = None):
+    paise = record.amount_paise if amount_paise is None else amount_paise
+    return SimpleNamespace(
+        transaction_id=f"txn_{record.gateway_id}",
+        gateway_order_id=record.order_id,
+        gateway_payment_id=record.gateway_id,
+        status=status,
+        amount=money(Decimal(paise) / 100),
+    )
+
+
+def _refund(record: GatewayRecord, status: str = "PROCESSED"):
+    return SimpleNamespace(
+        id=f"id_{record.gateway_id}",
+        refund_id=record.gateway_id,
+        status=status,
+        amount=money(Decimal(record.amount_paise) / 100),
+    )
+
+
+def _payment_record(status: str = "captured", amount_paise: int = 150_000) -> GatewayRecord:
+    return GatewayRecord("payment", "pay_1", "pay_1", "order_1", amount_paise, status, 0)
+
+
+def _refund_record(status: str = "processed") -> GatewayRecord:
+    return GatewayRecord("refund", "rfnd_1", "pay_1", None, 50_000, status, 0)
+
+
+def test_matching_payment_is_clean():
+    record = _payment_record()
+    assert compare_payment(record, _txn(record)) is None
+
+
+def test_captured_payment_without_our_row():
+    assert compare_payment(_payment_record(), None).kind == "MISSING_TRANSACTION"
+
+
+def test_captured_payment_not_marked_success():
+    record = _payment_record()
+    assert compare_payment(record, _txn(record, status="INITIATED")).kind == "MISSING_CAPTURE"
+
+
+def test_payment_amount_drift_is_in_paise():
+    record = _payment_record()
+    mismatch = compare_payment(record, _txn(record, amount_paise=149_999))
+    assert (mismatch.kind, mismatch.gateway_value, mismatch.our_value) == (
+        "AMOUNT_DRIFT", "150000", "149999",
+    )
+
+
+def test_uncaptured_payment_marked_success_drifts():
+    record = _payment_record(status="failed")
+    assert compare_payment(record, _txn(record)).kind == "STATUS_DRIFT"
+    assert compare_payment(record, None) is None
+
+
+def test_refund_states():
+    processed, failed = _refund_record(), _refund_record(status="failed")
+    assert compare_refund(processed, _refund(processed)) is None
+    assert compare_refund(processed, None).kind == "MISSING_REFUND"
+    assert compare_refund(processed, _refund(processed, "INITIATED")).kind == "REFUND_STATUS_DRIFT"
+    assert compare_refund(failed, _refund(failed)).kind == "REFUND_STATUS_DRIFT"
+    assert compare_refund(failed, None) is None
+
+
+def test_fake_feed_drift_is_found_against_matching_rows():
+    feed = FakeGatewayFeed(5_000, amount_drift_rate=0.01, failed_refund_rate=0.05)
+    records = list(feed.records())
+    # Our rows as the service would have written them, before any drift.
+    expected = {
+        record.gateway_id: 100_000 + (int(record.gateway_id[4:]) % 50) * 1_000
+        for record in records
+        if record.kind == "payment"
+    }
+    kinds = Counter()
+    for record in records:
+        if record.kind == "payment":
+            mismatch = compare_payment(
+                record, _txn(record, amount_paise=expected[record.gateway_id])
+            )
+        else:
+            ours = expected[record.payment_id] // 2
+            mismatch = compare_refund(
+                record, _refund(record._replace(amount_paise=ours, status="processed"))
+            )
+        if mismatch is not None:
+            kinds[mismatch.kind] += 1
+
+    drifted = sum(
+        1 for r in records if r.kind == "payment" and r.amount_paise != expected[r.gateway_id]
+    )
+    failed = sum(1 for r in records if r.kind == "refund" and r.status == "failed")
+    assert drifted and failed
+    # A drifted payment's refund is half the drifted amount, so it drifts too
+    # unless that refund failed (which wins).
+    assert kinds["AMOUNT_DRIFT"] >= drifted
+    assert kinds["REFUND_STATUS_DRIFT"] == failed
+
+
+def test_reverse_pass_reports_rows_the_feed_never_mentioned():
+    seen = SeenIds()
+    for record in FakeGatewayFeed(20, refund_every=5).records():
+        seen.add(record)
+
+    listed, unlisted = _payment_record(), _payment_record()._replace(order_id="order_999")
+    assert payment_missing_at_gateway(_txn(listed), seen) is None
+    assert payment_missing_at_gateway(_txn(unlisted), seen).kind == "MISSING_AT_GATEWAY"
+
+    known = _refund_record()._replace(gateway_id="rfnd_5")
+    unknown = _refund_record()._replace(gateway_id="rfnd_6")
+    assert refund_missing_at_gateway(_refund(known), seen) is None
+    assert refund_missing_at_gateway(_refund(unknown), seen).kind == "REFUND_MISSING_AT_GATEWAY"
+
+
+def test_day_windows_cover_the_range_without_overlap():
+    assert day_windows(date(2026, 3, 1), date(2026, 3, 4), 2) == [
+        (date(2026, 3, 1), date(2026, 3, 3)),
+        (date(2026, 3, 3), date(2026, 3, 4)),
+    ]
+    assert day_windows(date(2026, 3, 1), date(2026, 3, 1), 1) == []
+
+
+def test_next_windows_first_ids_also_count_for_the_previous_window():
+    previous = SeenIds()
+    seen = SeenIds(previous, carry_until=100)
+    early = GatewayRecord("refund", "rfnd_early", "pay_1", None, 50_000, "processed", 99)
+    late = GatewayRecord("refund", "rfnd_late", "pay_1", None, 50_000, "processed", 100)
+
+    seen.add(early)
+    seen.add(late)
+
+    assert seen.refund_ids == {"rfnd_early", "rfnd_late"}
+    assert previous.refund_ids == {"rfnd_early"}
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+from decimal import Decimal
+from types import SimpleNamespace
+import time
+
+from fastapi import HTTPException
+import pytest
+
+from app.api.payments.schemas import RefundRequest
+from app.api.payments.services import refund_service
+from app.api.payments.services.refund_service import (
+    RefundOutcome,
+    is_definite_rejection,
+    plan_refund_split,
+    stream_bulk_refunds,
+)
+from app.gateways.razorpay_client import RazorpayError
+from app.utils.rate_limiter import TokenBucket
+
+
+def _txn(gateway_payment_id: str | None) -> SimpleNamespace:
+    return SimpleNamespace(gateway_payment_id=gateway_payment_id)
+
+
+def test_split_fills_oldest_transactions_first():
+    first, second = _txn("pay_1"), _txn("pay_2")
+    split = plan_refund_split(
+        [(first, Decimal("100.00")), (second, Decimal("50.00"))], Decimal("120.50")
+    )
+    assert split == [(first, Decimal("100.00")), (second, Decimal("20.50"))]
+
+
+def test_split_skips_transactions_without_gateway_payment():
+    offline, online = _txn(None), _txn("pay_2")
+    split = plan_refund_split(
+        [(offline, Decimal("100.00")), (online, Decimal("50.00"))], Decimal("30")
+    )
+    assert split == [(online, Decimal("30.00"))]
+
+
+@pytest.mark.parametrize("amount", ["0", "-1", "150.01"])
+def test_split_rejects_amounts_outside_the_refundable_total(amount):
+    with pytest.raises(HTTPException) as exc:
+        plan_refund_split([(_txn("pay_1"), Decimal("150.00"))], Decimal(amount))
+    assert exc.value.status_code == 400
+
+
+def test_split_rejects_amounts_only_refundable_offline():
+    with pytest.raises(HTTPException) as exc:
+        plan_refund_split(
+            [(_txn(None), Decimal("100.00")), (_txn("pay_2"), Decimal("10.00"))],
+            Decimal("50.00"),
+        )
+    assert exc.value.detail == "Refund amount exceeds gateway-refundable transactions"
+
+
+def test_only_gateway_4xx_is_a_definite_rejection():
+    assert is_definite_rejection(RazorpayError("bad request", status_code=400))
+    assert not is_definite_rejection(RazorpayError("bad gateway", status_code=502))
+    assert not is_definite_rejection(RazorpayError("connection reset"))
+    assert not is_definite_rejection(TimeoutError())
+
+
+@pytest.mark.parametrize(
+    ("refunded", "pending", "rejected", "status"),
+    [
+        ("10", "0", "0", "INITIATED"),
+        ("0", "0", "10", "FAILED"),
+        ("0", "10", "0", "PENDING"),
+        ("5", "5", "0", "PENDING"),
+        ("5", "0", "5", "PARTIAL"),
+        ("0", "5", "5", "PARTIAL"),
+    ],
+)
+def test_refund_outcome_status(refunded, pending, rejected, status):
+    outcome = RefundOutcome(Decimal(refunded), Decimal(pending), Decimal(rejected), [])
+    assert outcome.status == status
+
+
+def test_token_bucket_allows_a_burst_then_paces():
+    bucket = TokenBucket(rate=20, capacity=3)
+
+    async def take(count: int) -> float:
+        started = time.monotonic()
+        for _ in range(count):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    # Three tokens are there up front; the next three arrive 50ms apart.
+    elapsed = asyncio.run(take(6))
+    assert 0.13 <= elapsed < 0.5
+
+
+def test_token_bucket_rejects_invalid_settings():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+    with pytest.raises(ValueError):
+        asyncio.run(TokenBucket(rate=1, capacity=2).acquire(3))
+
+
+def test_bulk_results_reach_on_complete_after_the_client_disconnects(monkeypatch):
+    async def run_item(index, item, semaphore):
+        await asyncio.sleep(0.01 * (3 - index))
+        return {
+            "index": index,
+            "bookingPublicId": item.booking_public_id,
+            "status": "INITIATED",
+            "refundedAmount": str(item.amount),
+        }
+
+    monkeypatch.setattr(refund_service, "_run_bulk_item", run_item)
+    items = [
+        RefundRequest(booking_public_id=f"BK{index}", amount=Decimal("10.00"))
+        for index in range(3)
+    ]
+
+    async def run():
+        completed = asyncio.Future()
+
+        async def on_complete(results):
+            completed.set_result(results)
+
+        stream = stream_bulk_refunds(items, on_complete=on_complete)
+        first = await stream.__anext__()
+        await stream.aclose()
+        return first, await asyncio.wait_for(completed, 1)
+
+    first, results = asyncio.run(run())
+    assert '"index": 2' in first
+    assert [result["index"] for result in results] == [0, 1, 2]
+    assert refund_service.bulk_summary(results)["refundedAmount"] == "30.00"
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+import uuid
+
+import pytest
+from pydantic import ValidationError
+
+from app.api.bookings.schedule_engine import (
+    ScheduleRequest,
+    compile_plan,
+    compute_schedules,
+    default_plan,
+    from_paise,
+    to_paise,
+)
+from app.api.bookings.schemas import CreateInstallmentsRequest, InstallmentPlanConfig
+
+
+def _plan(**values) -> InstallmentPlanConfig:
+    return InstallmentPlanConfig.model_validate(values)
+
+
+def test_paise_round_trip():
+    assert to_paise(Decimal("12345.675")) == 1234568
+    assert to_paise("0.01") == 1
+    assert from_paise(1234568) == Decimal("12345.68")
+
+
+def test_default_plan_takes_a_quarter_up_front():
+    assert compile_plan(default_plan(2)).split(10003) == [2501, 7502]
+
+
+def test_default_plan_last_installment_absorbs_rounding():
+    assert compile_plan(default_plan(4)).split(999999) == [250000, 250000, 250000, 249999]
+
+
+def test_spread_hands_leftover_paise_to_the_largest_losses():
+    plan = _plan(installments=3, values=["33.33", "33.33", "33.34"], remainderTo="spread")
+    assert compile_plan(plan).split(100) == [33, 33, 34]
+
+
+def test_fixed_split_remainder_goes_to_the_first_installment():
+    plan = _plan(installments=3, split="fixed", values=["5000", "2000"], remainderTo="first")
+    assert compile_plan(plan).split(to_paise("12345.67")) == [534567, 500000, 200000]
+
+
+@pytest.mark.parametrize("total", [2, 3, 101, 99999, 123456789])
+def test_shares_always_add_up_to_the_total(total):
+    for plan in (
+        default_plan(2),
+        default_plan(5),
+        _plan(installments=3, values=["10", "45", "45"], remainderTo="spread"),
+    ):
+        try:
+            shares = compile_plan(plan).split(total)
+        except ValueError:
+            continue  # too small for this many installments
+        assert sum(shares) == total
+        assert min(shares) > 0
+
+
+def test_split_rejects_totals_too_small_for_the_plan():
+    with pytest.raises(ValueError):
+        compile_plan(default_plan(4)).split(2)
+
+
+def test_due_dates_follow_interval_from_booking():
+    dates = compile_plan(default_plan(3)).due_dates(date(2026, 10, 1), None)
+    assert dates == [date(2026, 10, 1), date(2026, 10, 8), date(2026, 10, 15)]
+
+
+def test_departure_relative_dates_skip_weekends_but_not_the_booking_day():
+    plan = _plan(installments=2, daysBeforeDeparture=[None, 30], skipWeekends=True)
+    # Booked on a Saturday; 30 days before a 2026-12-07 departure is a Saturday too.
+    dates = compile_plan(plan).due_dates(date(2026, 10, 17), date(2026, 12, 7))
+    assert dates == [date(2026, 10, 17), date(2026, 11, 9)]
+
+
+def test_due_dates_never_precede_booking():
+    plan = _plan(installments=2, daysBeforeDeparture=[None, 60])
+    dates = compile_plan(plan).due_dates(date(2026, 10, 17), date(2026, 11, 1))
+    assert dates == [date(2026, 10, 17), date(2026, 10, 17)]
+
+
+def test_compute_schedules_records_errors_per_booking():
+    good, bad = uuid.uuid4(), uuid.uuid4()
+    errors: dict[uuid.UUID, str] = {}
+    lines = compute_schedules(
+        [
+            ScheduleRequest(good, "BK1", Decimal("100.03"), default_plan(2), date(2026, 10, 1)),
+            ScheduleRequest(bad, "BK2", Decimal("0"), default_plan(2), date(2026, 10, 1)),
+        ],
+        errors,
+    )
+    assert [line.due_amount for line in lines] == [Decimal("25.01"), Decimal("75.02")]
+    assert set(errors) == {bad}
+
+
+def _installments_request(**values) -> CreateInstallmentsRequest:
+    return CreateInstallmentsRequest.model_validate(
+        {"bookingId": str(uuid.uuid4()), "bookingPublicId": "BK1", "totalAmount": "1000", **values}
+    )
+
+
+def test_request_rejects_installment_count_that_contradicts_the_plan():
+    with pytest.raises(ValidationError, match="numberOfInstallments"):
+        _installments_request(numberOfInstallments=4, plan={"installments": 3})
+
+
+@pytest.mark.parametrize("values", [{}, {"numberOfInstallments": 3}])
+def test_request_accepts_plan_with_default_or_matching_count(values):
+    request = _installments_request(plan={"installments": 3}, **values)
+    assert request.plan.installments == 3
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from app.api.payments.webhook_registry import order_lock_key, refund_lock_key
+from app.gateways.razorpay_webhook import WebhookEnvelope
+
+
+def _payment_event(event: str) -> WebhookEnvelope:
+    return WebhookEnvelope(
+        {
+            "event": event,
+            "payload": {"payment": {"entity": {"id": "pay_1", "order_id": "order_1"}}},
+        }
+    )
+
+
+def _refund_event(event: str, with_payment: bool = True) -> WebhookEnvelope:
+    entities = {"refund": {"entity": {"id": "rfnd_1", "payment_id": "pay_1"}}}
+    if with_payment:
+        entities["payment"] = {"entity": {"id": "pay_1", "order_id": "order_1"}}
+    return WebhookEnvelope({"event": event, "payload": entities})
+
+
+def test_refund_events_share_the_payment_ordering_key():
+    keys = {
+        order_lock_key(_payment_event("payment.captured")),
+        order_lock_key(_payment_event("payment.failed")),
+        refund_lock_key(_refund_event("refund.processed")),
+        refund_lock_key(_refund_event("refund.failed")),
+    }
+
+    assert keys == {"order_1"}
+
+
+def test_refund_without_payment_entity_keys_on_the_refunded_payment():
+    assert refund_lock_key(_refund_event("refund.processed", with_payment=False)) == "pay_1"
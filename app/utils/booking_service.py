@@ -1,15 +1,171 @@
 from __future__ import annotations
 
+import asyncio
+from collections import OrderedDict
 from decimal import Decimal
+import time
 from uuid import UUID
 
 import httpx
 from fastapi import HTTPException, status
 
 from app.core.config import Config
+from app.core.metrics import BOOKING_SERVICE_SECONDS
 from app.core.middlewares import logger
+from app.core.redis import redis_client
 from app.utils.response import error_response
 
+BOOKING_INVALIDATION_CHANNEL = "payments:bookings:invalidate"
+
+_client: httpx.AsyncClient | None = None
+
+# (booking_id, user_id) -> (expires_at, booking)
+_cache: OrderedDict[tuple[str, str], tuple[float, dict]] = OrderedDict()
+_in_flight: dict[tuple[str, str], asyncio.Task] = {}
+# Bumped by every invalidation. A fetch that started before its booking's
+# last invalidation may hold the old booking and must not cache it.
+_invalidation_seq = 0
+# booking_id -> _invalidation_seq of its last invalidation, kept only while a
+# fetch that started before it is still running.
+_invalidated_at: dict[str, int] = {}
+# Running fetch -> _invalidation_seq when it started.
+_fetch_started: dict[asyncio.Task, int] = {}
+_stats = {
+    "cacheHits": 0,
+    "cacheMisses": 0,
+    "coalesced": 0,
+    "upstreamRequests": 0,
+    "upstreamErrors": 0,
+    "upstreamSecondsTotal": 0.0,
+    "upstreamSecondsMax": 0.0,
+}
+
+
+def _build_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=Config.BOOKING_SERVICE_URL,
+        timeout=httpx.Timeout(Config.BOOKING_SERVICE_TIMEOUT_SECONDS),
+        limits=httpx.Limits(
+            max_connections=Config.BOOKING_SERVICE_MAX_CONNECTIONS,
+            max_keepalive_connections=Config.BOOKING_SERVICE_MAX_CONNECTIONS,
+        ),
+    )
+
+
+async def start_booking_client() -> None:
+    global _client
+    if _client is None:
+        _client = _build_client()
+
+
+async def close_booking_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    # Workers that never run the app lifespan get the client on first use.
+    global _client
+    if _client is None:
+        _client = _build_client()
+    return _client
+
+
+def _cache_get(key: tuple[str, str]) -> dict | None:
+    entry = _cache.get(key)
+    if entry is None:
+        return None
+    expires_at, booking = entry
+    if expires_at < time.monotonic():
+        _cache.pop(key, None)
+        return None
+    return booking
+
+
+def _cache_set(key: tuple[str, str], booking: dict) -> None:
+    _cache[key] = (time.monotonic() + Config.BOOKING_CACHE_TTL_SECONDS, booking)
+    _cache.move_to_end(key)
+    while len(_cache) > Config.BOOKING_CACHE_MAX_ENTRIES:
+        _cache.popitem(last=False)
+
+
+def invalidate_booking_cache(booking_id: str | UUID) -> None:
+    """Evict a booking from this process's cache only.
+
+    Fetches already in flight for it are detached, so new callers fetch
+    afresh, and their results are not cached.
+    """
+    global _invalidation_seq
+    booking_id = str(booking_id)
+    for key in [key for key in _cache if key[0] == booking_id]:
+        _cache.pop(key, None)
+    for key in [key for key in _in_flight if key[0] == booking_id]:
+        _in_flight.pop(key, None)
+    if _fetch_started:
+        _invalidation_seq += 1
+        _invalidated_at[booking_id] = _invalidation_seq
+
+
+async def publish_booking_invalidation(booking_id: str | UUID) -> None:
+    """Evict a booking here and, over Redis pub/sub, in every API process.
+
+    Best effort: if Redis is down the other processes keep the entry until
+    BOOKING_CACHE_TTL_SECONDS runs out.
+    """
+    invalidate_booking_cache(booking_id)
+    try:
+        await redis_client.publish(BOOKING_INVALIDATION_CHANNEL, str(booking_id))
+    except Exception as exc:
+        logger.warning(f"Booking cache invalidation broadcast failed: {exc}")
+
+
+async def run_booking_invalidation_listener(stop: asyncio.Event) -> None:
+    """Apply invalidations published by other processes until ``stop`` is set."""
+    while not stop.is_set():
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(BOOKING_INVALIDATION_CHANNEL)
+            while not stop.is_set():
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is not None:
+                    invalidate_booking_cache(message["data"])
+        except Exception as exc:
+            logger.warning(f"Booking invalidation listener disconnected: {exc}")
+            # Evictions published while disconnected are lost; start cold.
+            _cache.clear()
+            try:
+                await asyncio.wait_for(
+                    stop.wait(), timeout=Config.BOOKING_INVALIDATION_RETRY_SECONDS
+                )
+            except asyncio.TimeoutError:
+                pass
+        finally:
+            await pubsub.aclose()
+
+
+def get_booking_client_stats() -> dict:
+    lookups = _stats["cacheHits"] + _stats["cacheMisses"] + _stats["coalesced"]
+    requests = _stats["upstreamRequests"]
+    return {
+        **_stats,
+        "hitRate": round((_stats["cacheHits"] + _stats["coalesced"]) / lookups, 4) if lookups else 0.0,
+        "upstreamSecondsAvg": round(_stats["upstreamSecondsTotal"] / requests, 6) if requests else 0.0,
+        "cacheEntries": len(_cache),
+    }
+
+
+def _record_upstream(started: float, failed: bool, operation: str) -> None:
+    elapsed = time.perf_counter() - started
+    BOOKING_SERVICE_SECONDS.labels(operation, "error" if failed else "ok").observe(elapsed)
+    _stats["upstreamRequests"] += 1
+    _stats["upstreamSecondsTotal"] += elapsed
+    if elapsed > _stats["upstreamSecondsMax"]:
+        _stats["upstreamSecondsMax"] = elapsed
+    if failed:
+        _stats["upstreamErrors"] += 1
+
 
 def extract_booking_public_id(booking: dict) -> str | None:
     return (
@@ -24,20 +180,70 @@ async def fetch_booking_details(
     booking_id: str,
     user_id: str
 ) -> dict:
-    url = f"{Config.BOOKING_SERVICE_URL}/api/v1/bookings/{booking_id}"
+    """Booking details, served from a short-TTL cache.
+
+    Concurrent calls for the same (booking, user) share one upstream request.
+    """
+    key = (str(booking_id), str(user_id))
+    cached = _cache_get(key)
+    if cached is not None:
+        _stats["cacheHits"] += 1
+        return cached
+
+    pending = _in_flight.get(key)
+    if pending is not None:
+        _stats["coalesced"] += 1
+        return await asyncio.shield(pending)
+
+    _stats["cacheMisses"] += 1
+    # The fetch runs as its own task so cancelling this caller does not cancel
+    # it for the callers coalesced onto it.
+    task = asyncio.create_task(_fetch_and_cache(key, _invalidation_seq))
+    _in_flight[key] = task
+    _fetch_started[task] = _invalidation_seq
+    task.add_done_callback(lambda done: _fetch_done(key, done))
+    return await asyncio.shield(task)
+
+
+async def _fetch_and_cache(key: tuple[str, str], started_seq: int) -> dict:
+    booking = await _fetch_booking_upstream(key[0], key[1])
+    if _invalidated_at.get(key[0], 0) <= started_seq:
+        _cache_set(key, booking)
+    return booking
+
+
+def _fetch_done(key: tuple[str, str], task: asyncio.Task) -> None:
+    if _in_flight.get(key) is task:
+        del _in_flight[key]
+    _fetch_started.pop(task, None)
+    oldest = min(_fetch_started.values(), default=_invalidation_seq)
+    for booking_id in [b for b, seq in _invalidated_at.items() if seq <= oldest]:
+        del _invalidated_at[booking_id]
+    if not task.cancelled():
+        task.exception()  # mark retrieved when every caller was cancelled
+
+
+async def _fetch_booking_upstream(booking_id: str, user_id: str) -> dict:
+    url = f"/api/v1/bookings/{booking_id}"
     headers: dict[str, str] = {}
     headers["AuthStatus"] = "AUTHENTICATED"
     headers["UserId"] = user_id
 
+    started = time.perf_counter()
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url, headers=headers)
+        response = await _get_client().get(url, headers=headers)
     except httpx.HTTPError as exc:
+        _record_upstream(started, failed=True, operation="booking.fetch")
         logger.error(f"Unexpected error booking service: {str(exc)}")
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail="Unable to reach booking service",
         ) from exc
+    _record_upstream(
+        started,
+        failed=response.status_code >= status.HTTP_500_INTERNAL_SERVER_ERROR,
+        operation="booking.fetch",
+    )
 
     if response.status_code == status.HTTP_404_NOT_FOUND:
         raise HTTPException(
@@ -76,14 +282,22 @@ async def update_booking_status_service(booking_id: UUID,
         "status": booking_status,
         "amount_paid": float(amount_paid),
     }
-    url = f"{Config.BOOKING_SERVICE_URL}/api/v1/bookings/{booking_id}/status"
-    # url = f"{Config.BOOKING_SERVICE_URL.rstrip('/api/v1/bookings/')}{booking_id}/status"
+    url = f"/api/v1/bookings/{booking_id}/status"
     headers = {
         "AuthStatus": "AUTHENTICATED",
         "UserId": str(user_id),
     }
 
-    timeout = httpx.Timeout(10.0)
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        response = await client.patch(url, json=payload, headers=headers)
-        response.raise_for_status()
\ No newline at end of file
+    started = time.perf_counter()
+    try:
+        response = await _get_client().patch(url, json=payload, headers=headers)
+    except httpx.HTTPError:
+        _record_upstream(started, failed=True, operation="booking.update_status")
+        raise
+    _record_upstream(
+        started,
+        failed=response.status_code >= status.HTTP_500_INTERNAL_SERVER_ERROR,
+        operation="booking.update_status",
+    )
+    await publish_booking_invalidation(booking_id)
+    response.raise_for_status()
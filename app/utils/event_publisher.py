@@ -1,11 +1,19 @@
 from __future__ import annotations
 
-import asyncio
 import json
+import time
 
 import boto3
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.payments.models import OutboxEvent
 from app.core.config import Config
+from app.core.metrics import SQS_MESSAGES, SQS_PUBLISH_SECONDS
+
+SQS_MAX_BATCH_SIZE = 10
+DEFAULT_MESSAGE_GROUP = "booking-events"
+
+_sqs_client = None
 
 
 def _build_sqs_client():
@@ -18,43 +26,81 @@ def _build_sqs_client():
     return boto3.client("sqs", **client_kwargs)
 
 
-def _send_event(event_data: dict, deduplication_id: str | None = None) -> None:
+def _get_sqs_client():
+    # boto3 clients are thread-safe; build once and reuse its connection pool.
+    global _sqs_client
+    if _sqs_client is None:
+        _sqs_client = _build_sqs_client()
+    return _sqs_client
+
+
+def _enqueue_event(
+    session: AsyncSession, event_data: dict, message_group_id: str | None
+) -> OutboxEvent:
+    """Stage an event in the outbox; it is published only if the caller commits."""
+    event = OutboxEvent(
+        event_type=str(event_data.get("event_type")),
+        message_group_id=message_group_id,
+        payload=event_data,
+    )
+    session.add(event)
+    return event
+
+
+def send_event_batch(events: list[OutboxEvent]) -> dict:
+    """Send up to 10 outbox events with one SendMessageBatch call.
+
+    Returns ``{event_id: error}`` for entries SQS rejected.
+    """
     if not Config.BOOKING_PAYMENT_QUEUE_URL:
         raise ValueError("BOOKING_PAYMENT_QUEUE_URL is not configured")
-
+    if len(events) > SQS_MAX_BATCH_SIZE:
+        raise ValueError(f"SQS batches are limited to {SQS_MAX_BATCH_SIZE} messages")
+
+    is_fifo = Config.BOOKING_PAYMENT_QUEUE_URL.endswith(".fifo")
+    entries = []
+    for index, event in enumerate(events):
+        entry = {"Id": str(index), "MessageBody": json.dumps(event.payload)}
+        if is_fifo:
+            # Each outbox row is one message: a FAILED then SUCCESS for the same
+            # transaction must not collapse inside SQS's deduplication window.
+            entry["MessageGroupId"] = event.message_group_id or DEFAULT_MESSAGE_GROUP
+            entry["MessageDeduplicationId"] = str(event.id)
+        entries.append(entry)
+
+    started = time.perf_counter()
     try:
-        sqs = _build_sqs_client()
-        message = {
-            "QueueUrl": Config.BOOKING_PAYMENT_QUEUE_URL,
-            "MessageBody": json.dumps(event_data),
-        }
-        print(f"[event_publisher] send_message")
-        if Config.BOOKING_PAYMENT_QUEUE_URL.endswith(".fifo"):
-            message["MessageGroupId"] = "booking-events"
-            message["MessageDeduplicationId"] = str(
-                deduplication_id or event_data.get("payment_transaction_id")
-            )
-        sqs.send_message(**message)
-    except Exception as exc:
-        print(f"[event_publisher] send_message failed: {exc}, event_data={event_data}")
+        response = _get_sqs_client().send_message_batch(
+            QueueUrl=Config.BOOKING_PAYMENT_QUEUE_URL, Entries=entries
+        )
+    except Exception:
+        SQS_PUBLISH_SECONDS.labels("error").observe(time.perf_counter() - started)
         raise
+    SQS_PUBLISH_SECONDS.labels("ok").observe(time.perf_counter() - started)
+    failures = {
+        events[int(failed["Id"])].id: failed.get("Message") or failed.get("Code")
+        for failed in response.get("Failed", [])
+    }
+    SQS_MESSAGES.labels("sent").inc(len(events) - len(failures))
+    SQS_MESSAGES.labels("failed").inc(len(failures))
+    return failures
 
 
-async def publish_payment_success_event(event_data: dict) -> None:
-    await asyncio.to_thread(
-        _send_event, event_data, str(event_data.get("payment_transaction_id"))
-    )
+def publish_payment_success_event(session: AsyncSession, event_data: dict) -> None:
+    _enqueue_event(session, event_data, str(event_data.get("payment_transaction_id")))
 
 
-async def publish_payment_failed_event(event_data: dict) -> None:
-    await asyncio.to_thread(
-        _send_event, event_data, str(event_data.get("payment_transaction_id"))
-    )
+def publish_payment_failed_event(session: AsyncSession, event_data: dict) -> None:
+    _enqueue_event(session, event_data, str(event_data.get("payment_transaction_id")))
 
 
-async def publish_refund_processed_event(event_data: dict) -> None:
-    await asyncio.to_thread(_send_event, event_data, str(event_data.get("refund_id")))
+def publish_refund_processed_event(
+    session: AsyncSession, event_data: dict, payment_transaction_id: str | None
+) -> None:
+    _enqueue_event(session, event_data, payment_transaction_id)
 
 
-async def publish_refund_failed_event(event_data: dict) -> None:
-    await asyncio.to_thread(_send_event, event_data, str(event_data.get("refund_id")))
+def publish_refund_failed_event(
+    session: AsyncSession, event_data: dict, payment_transaction_id: str | None
+) -> None:
+    _enqueue_event(session, event_data, payment_transaction_id)
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Async token bucket: ``rate`` tokens per second, bursting up to ``capacity``.
+
+    Waiters are served in arrival order, so a burst of callers is spread out
+    evenly instead of all retrying at the same instant.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        if tokens > self.capacity:
+            raise ValueError("tokens exceeds bucket capacity")
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
+
+    async def __aenter__(self) -> "TokenBucket":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        return None
@@ -14,8 +14,14 @@ class PaginationMeta(BaseModel):
     totalRecords: int
     totalPages: int
 
+class CursorMeta(BaseModel):
+    limit: int
+    nextCursor: Optional[str] = None
+    hasMore: bool
+
 class MetaData(BaseModel):
     pagination: Optional[PaginationMeta] = None
+    cursor: Optional[CursorMeta] = None
     filters: Optional[Dict] = None
     sort: Optional[Dict] = None
 
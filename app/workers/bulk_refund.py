@@ -0,0 +1,60 @@
+"""Issues refunds for many bookings from a CSV file.
+
+Run with ``python -m app.workers.bulk_refund refunds.csv [--reason TEXT]``.
+The file needs ``booking_public_id`` and ``amount`` columns and may carry a
+per-row ``reason``. One NDJSON result line per booking is written to stdout as
+each refund settles, followed by a summary line.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+import logging
+import sys
+
+from app.api.payments.schemas import RefundRequest
+from app.api.payments.services.refund_service import stream_bulk_refunds
+from app.core.logs import configure_logging
+from app.db.main import dispose_engines
+from app.gateways.razorpay_client import close_razorpay_client
+
+logger = logging.getLogger(__name__)
+
+
+def load_refund_requests(path: str, default_reason: str | None) -> list[RefundRequest]:
+    with open(path, newline="") as handle:
+        return [
+            RefundRequest(
+                booking_public_id=row["booking_public_id"].strip(),
+                amount=row["amount"].strip(),
+                reason=(row.get("reason") or "").strip() or default_reason,
+            )
+            for row in csv.DictReader(handle)
+            if (row.get("booking_public_id") or "").strip()
+        ]
+
+
+async def _main(path: str, reason: str | None) -> None:
+    items = load_refund_requests(path, reason)
+    logger.info(f"Submitting {len(items)} refunds from {path}")
+    try:
+        async for line in stream_bulk_refunds(items):
+            sys.stdout.write(line)
+            sys.stdout.flush()
+    finally:
+        await close_razorpay_client()
+        await dispose_engines()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path")
+    parser.add_argument("--reason", default=None)
+    args = parser.parse_args()
+    configure_logging(stream=sys.stderr)
+    asyncio.run(_main(args.path, args.reason))
+
+
+if __name__ == "__main__":
+    main()
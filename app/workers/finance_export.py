@@ -0,0 +1,99 @@
+"""Exports finance tables for a period to a file, stdout or S3.
+
+Run with ``python -m app.workers.finance_export --from 2026-09-01 --to 2026-10-01``.
+
+``--table`` picks any of transactions, refunds, invoices, credit_notes (all
+by default). Output is CSV (``--gzip`` to compress) or Parquet, written to
+``--out-dir``, stdout (``--out -`` with a single table) or S3 (``--s3``, under
+EXPORT_S3_PREFIX unless ``--s3-key`` is given) as a multipart upload.
+Per-table row and byte counts go to stderr.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import date, timedelta
+import json
+import os
+import sys
+
+from app.core.config import Config
+from app.core.logs import configure_logging
+from app.db.main import dispose_engines
+from app.exports.service import export_stream, export_to_s3
+from app.exports.sources import EXPORT_TABLES
+from app.exports.writers import export_filename, parquet_available
+
+
+async def export_table(args: argparse.Namespace, name: str) -> dict:
+    stats: dict = {"table": name}
+    if args.s3:
+        stats["location"] = await export_to_s3(
+            name, args.start, args.end, args.format, args.gzip,
+            key=args.s3_key, chunk_size=args.chunk_size, stats=stats,
+        )
+        return stats
+
+    if args.out == "-":
+        out, path = sys.stdout.buffer, "-"
+    else:
+        path = os.path.join(
+            args.out_dir, export_filename(name, args.start, args.end, args.format, args.gzip)
+        )
+        out = open(path, "wb")
+    try:
+        async for data in export_stream(
+            name, args.start, args.end, args.format, args.gzip, args.chunk_size, stats
+        ):
+            out.write(data)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+        else:
+            out.flush()
+    stats["location"] = path
+    return stats
+
+
+async def _main(args: argparse.Namespace) -> None:
+    try:
+        for name in args.tables:
+            stats = await export_table(args, name)
+            sys.stderr.write(json.dumps(stats) + "\n")
+    finally:
+        await dispose_engines()
+
+
+def main() -> None:
+    today = date.today()
+    month_start = today.replace(day=1)
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--from", dest="start", type=date.fromisoformat,
+        default=(month_start - timedelta(days=1)).replace(day=1),
+    )
+    parser.add_argument("--to", dest="end", type=date.fromisoformat, default=month_start)
+    parser.add_argument(
+        "--table", dest="tables", action="append", choices=sorted(EXPORT_TABLES), default=None
+    )
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--out-dir", default=".")
+    parser.add_argument("--out", default=None, help="'-' writes a single table to stdout")
+    parser.add_argument("--s3", action="store_true")
+    parser.add_argument("--s3-key", default=None)
+    parser.add_argument("--chunk-size", type=int, default=Config.EXPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+    args.tables = args.tables or list(EXPORT_TABLES)
+    if args.start >= args.end:
+        raise SystemExit("--from must be earlier than --to")
+    if args.format == "parquet" and not parquet_available():
+        raise SystemExit("Parquet exports need pyarrow installed")
+    if (args.out == "-" or args.s3_key) and len(args.tables) > 1:
+        raise SystemExit("--out - and --s3-key take a single --table")
+    configure_logging(stream=sys.stderr)
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Purges ``idempotency_records`` older than IDEMPOTENCY_TTL_SECONDS.
+
+Run with ``python -m app.workers.idempotency_cleanup [--loop]``; without
+``--loop`` it makes a single pass, which suits a cron job.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import signal
+
+from app.api.payments.idempotency import purge_expired_idempotency_records
+from app.core.logs import configure_logging
+from app.db.main import async_session_factory, dispose_engines
+
+logger = logging.getLogger(__name__)
+
+CLEANUP_INTERVAL_SECONDS = 3600
+
+
+async def cleanup_once() -> int:
+    async with async_session_factory() as session:
+        deleted = await purge_expired_idempotency_records(session)
+    logger.info(f"Purged {deleted} expired idempotency records")
+    return deleted
+
+
+async def run_idempotency_cleanup(stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        try:
+            await cleanup_once()
+        except Exception:
+            logger.exception("Idempotency cleanup failed")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=CLEANUP_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _main(loop_forever: bool) -> None:
+    try:
+        if not loop_forever:
+            await cleanup_once()
+            return
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        await run_idempotency_cleanup(stop)
+    finally:
+        await dispose_engines()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--loop", action="store_true")
+    args = parser.parse_args()
+    configure_logging()
+    asyncio.run(_main(args.loop))
+
+
+if __name__ == "__main__":
+    main()
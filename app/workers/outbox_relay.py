@@ -0,0 +1,170 @@
+"""Relays committed ``event_outbox`` rows to SQS.
+
+Run with ``python -m app.workers.outbox_relay``. Several relays can run side by
+side: rows are claimed with ``FOR UPDATE SKIP LOCKED`` and sent in
+``SendMessageBatch`` calls of up to 10 messages. A failed event is retried
+with exponential backoff on its attempts.
+
+On a FIFO queue, messages are grouped by payment transaction and deduplicated
+by outbox row id, and order is the contract: one relay sends at a time (a transaction-scoped advisory lock),
+chunks go out in ``created_at`` order, a batch stops at its first failure,
+and an event waiting out its backoff holds back everything newer.
+"""
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+import logging
+import signal
+
+from sqlalchemy import func, or_, update
+from sqlmodel import select
+
+from app.api.payments.models import OutboxEvent
+from app.core.config import Config
+from app.core.logs import configure_logging
+from app.core.metrics import serve_worker_metrics
+from app.db.main import async_session_factory, dispose_engines
+from app.utils.event_publisher import SQS_MAX_BATCH_SIZE, send_event_batch
+
+logger = logging.getLogger(__name__)
+
+_FIFO_RELAY_LOCK = 0x6F7574626F78  # "outbox"
+
+
+def _is_fifo_queue() -> bool:
+    return bool(Config.BOOKING_PAYMENT_QUEUE_URL) and Config.BOOKING_PAYMENT_QUEUE_URL.endswith(".fifo")
+
+
+def backoff_seconds(attempts: int) -> float:
+    return min(
+        Config.OUTBOX_RELAY_BACKOFF_BASE_SECONDS * 2 ** attempts,
+        Config.OUTBOX_RELAY_BACKOFF_MAX_SECONDS,
+    )
+
+
+async def _send_chunk(chunk: list[OutboxEvent]) -> dict:
+    try:
+        return await asyncio.to_thread(send_event_batch, chunk)
+    except Exception as exc:
+        logger.error(f"SQS batch send failed: {exc}")
+        return {event.id: str(exc) for event in chunk}
+
+
+async def relay_once(batch_size: int) -> int:
+    """Deliver one batch of pending events. Returns the number of rows claimed."""
+    fifo = _is_fifo_queue()
+    async with async_session_factory() as session:
+        async with session.begin():
+            if fifo:
+                acquired = await session.scalar(
+                    select(func.pg_try_advisory_xact_lock(_FIFO_RELAY_LOCK))
+                )
+                if not acquired:
+                    return 0
+
+            ready = or_(
+                OutboxEvent.next_attempt_at.is_(None),
+                OutboxEvent.next_attempt_at <= func.now(),
+            )
+            stmt = (
+                select(OutboxEvent, ready.label("ready"))
+                .where(
+                    OutboxEvent.delivered_at.is_(None),
+                    OutboxEvent.attempts < Config.OUTBOX_RELAY_MAX_ATTEMPTS,
+                )
+                .order_by(OutboxEvent.created_at, OutboxEvent.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True, of=OutboxEvent)
+            )
+            if not fifo:
+                stmt = stmt.where(ready)
+            events = []
+            for event, is_ready in (await session.execute(stmt)).all():
+                if not is_ready:
+                    # FIFO only: nothing may overtake an event still backing off.
+                    break
+                events.append(event)
+            if not events:
+                return 0
+
+            chunks = [
+                events[i:i + SQS_MAX_BATCH_SIZE]
+                for i in range(0, len(events), SQS_MAX_BATCH_SIZE)
+            ]
+            failed: dict = {}
+            attempted: list[OutboxEvent] = []
+            if fifo:
+                for chunk in chunks:
+                    attempted.extend(chunk)
+                    result = await _send_chunk(chunk)
+                    failed.update(result)
+                    if result:
+                        break
+            else:
+                attempted = events
+                for result in await asyncio.gather(*(_send_chunk(chunk) for chunk in chunks)):
+                    failed.update(result)
+
+            delivered_ids = [event.id for event in attempted if event.id not in failed]
+            if delivered_ids:
+                await session.execute(
+                    update(OutboxEvent)
+                    .where(OutboxEvent.id.in_(delivered_ids))
+                    .values(delivered_at=func.now())
+                )
+            for event in attempted:
+                if event.id not in failed:
+                    continue
+                await session.execute(
+                    update(OutboxEvent)
+                    .where(OutboxEvent.id == event.id)
+                    .values(
+                        attempts=OutboxEvent.attempts + 1,
+                        last_error=str(failed[event.id])[:2000],
+                        next_attempt_at=func.now()
+                        + timedelta(seconds=backoff_seconds(event.attempts)),
+                    )
+                )
+            if failed:
+                logger.warning(f"{len(failed)} outbox events failed to publish")
+    return len(events)
+
+
+async def run_outbox_relay(stop: asyncio.Event) -> None:
+    batch_size = Config.OUTBOX_RELAY_BATCH_SIZE
+    while not stop.is_set():
+        try:
+            claimed = await relay_once(batch_size)
+        except Exception:
+            logger.exception("Outbox relay iteration failed")
+            claimed = 0
+        if claimed >= batch_size:
+            continue
+        try:
+            await asyncio.wait_for(
+                stop.wait(), timeout=Config.OUTBOX_RELAY_POLL_INTERVAL_SECONDS
+            )
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _main() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await run_outbox_relay(stop)
+    finally:
+        await dispose_engines()
+
+
+def main() -> None:
+    configure_logging()
+    serve_worker_metrics()
+    asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    main()
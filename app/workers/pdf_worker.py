@@ -0,0 +1,65 @@
+"""Renders pending invoice and credit-note PDFs.
+
+Run with ``python -m app.workers.pdf_worker [--backend lambda|local|offline]``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import signal
+
+from app.core.config import Config
+from app.core.logs import configure_logging
+from app.core.metrics import serve_worker_metrics
+from app.db.main import dispose_engines
+from app.invoices.pdf_pipeline import run_pdf_batch
+from app.invoices.pdf_renderers import build_pdf_renderer
+
+logger = logging.getLogger(__name__)
+
+
+async def run_pdf_worker(stop: asyncio.Event, renderer) -> None:
+    batch_size = Config.PDF_PIPELINE_BATCH_SIZE
+    while not stop.is_set():
+        try:
+            claimed, rendered = await run_pdf_batch(
+                renderer, batch_size, Config.PDF_PIPELINE_CONCURRENCY
+            )
+        except Exception:
+            logger.exception("PDF pipeline batch failed")
+            claimed, rendered = 0, 0
+        if claimed >= batch_size and rendered:
+            continue
+        try:
+            await asyncio.wait_for(
+                stop.wait(), timeout=Config.PDF_PIPELINE_POLL_INTERVAL_SECONDS
+            )
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _main(backend: str | None) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    renderer = build_pdf_renderer(backend)
+    try:
+        await run_pdf_worker(stop, renderer)
+    finally:
+        await renderer.aclose()
+        await dispose_engines()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", default=None)
+    args = parser.parse_args()
+    configure_logging()
+    serve_worker_metrics()
+    asyncio.run(_main(args.backend))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Reconciles Razorpay against payment_transactions / refund_transactions.
+
+Run with ``python -m app.workers.reconciliation --from 2026-10-01 --to 2026-10-02``.
+
+Feeds: ``payments`` (Razorpay payments and refunds API, the default),
+``settlements`` (settlement recon API), ``csv`` (an exported settlement CSV
+via ``--csv``) and ``fake`` (a deterministic local feed). Mismatches go to
+``--out`` (stdout by default) as they are found; a summary goes to stderr.
+
+The API feeds are read ``--window-days`` at a time, and the reverse pass (our
+SUCCESS/PROCESSED rows missing from the feed) runs per window, so memory
+stays bounded however long the range; a CSV or fake feed is one window. The
+reverse pass runs for the ``payments`` and ``fake`` feeds. Settlement feeds
+list entities by settlement date, which lags creation by days, so a window
+of them cannot say what is missing; pass ``--reverse`` to run it anyway.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import date, timedelta
+from functools import partial
+import logging
+import sys
+
+from app.core.config import Config
+from app.core.logs import configure_logging
+from app.db.main import batch_read_session_factory, dispose_engines
+from app.gateways.razorpay_client import close_razorpay_client, get_razorpay_client
+from app.reconciliation.engine import day_windows, find_stuck_rows, reconcile_windows
+from app.reconciliation.feeds import (
+    FakeGatewayFeed,
+    razorpay_feed,
+    razorpay_settlement_feed,
+    settlement_csv_feed,
+)
+from app.reconciliation.report import ReconciliationReport
+
+logger = logging.getLogger(__name__)
+
+
+def build_feed(args: argparse.Namespace, start: date, end: date):
+    if args.feed == "payments":
+        return razorpay_feed(get_razorpay_client(), start, end)
+    if args.feed == "settlements":
+        return razorpay_settlement_feed(get_razorpay_client(), start, end)
+    if args.feed == "csv":
+        if not args.csv:
+            raise SystemExit("--csv is required with --feed csv")
+        return settlement_csv_feed(args.csv)
+    if args.feed == "fake":
+        return FakeGatewayFeed(args.fake_count, start=args.start)
+    raise SystemExit(f"Unknown feed: {args.feed}")
+
+
+def feed_windows(args: argparse.Namespace) -> list[tuple[date, date]]:
+    # A CSV export or the fake feed cannot be cut by date: one window.
+    if args.feed in ("payments", "settlements"):
+        return day_windows(args.start, args.end, args.window_days)
+    return [(args.start, args.end)]
+
+
+async def run_reconciliation(args: argparse.Namespace, report: ReconciliationReport) -> dict:
+    stats: dict = {}
+    async for mismatch in reconcile_windows(
+        partial(build_feed, args),
+        feed_windows(args),
+        batch_read_session_factory,
+        args.chunk_size,
+        stats,
+        reverse=args.reverse,
+    ):
+        report.add(mismatch)
+    if args.stuck_after_minutes > 0:
+        async for mismatch in find_stuck_rows(
+            batch_read_session_factory,
+            args.start,
+            args.end,
+            timedelta(minutes=args.stuck_after_minutes),
+        ):
+            report.add(mismatch)
+    return stats
+
+
+async def _main(args: argparse.Namespace) -> None:
+    out = open(args.out, "w", newline="") if args.out else sys.stdout
+    report = ReconciliationReport(out, args.format)
+    try:
+        stats = await run_reconciliation(args, report)
+        report.print_summary({"from": args.start.isoformat(), "to": args.end.isoformat(), **stats})
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        await close_razorpay_client()
+        await dispose_engines()
+
+
+def main() -> None:
+    today = date.today()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--from", dest="start", type=date.fromisoformat, default=today - timedelta(days=1))
+    parser.add_argument("--to", dest="end", type=date.fromisoformat, default=today)
+    parser.add_argument("--feed", choices=["payments", "settlements", "csv", "fake"], default="payments")
+    parser.add_argument("--csv", default=None)
+    parser.add_argument("--fake-count", type=int, default=10_000)
+    parser.add_argument("--write-fake-csv", default=None, help="write the fake feed as a CSV and exit")
+    parser.add_argument("--out", default=None)
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    parser.add_argument("--chunk-size", type=int, default=Config.RECONCILIATION_CHUNK_SIZE)
+    parser.add_argument("--window-days", type=int, default=Config.RECONCILIATION_WINDOW_DAYS)
+    parser.add_argument(
+        "--stuck-after-minutes", type=int, default=Config.RECONCILIATION_STUCK_AFTER_MINUTES
+    )
+    parser.add_argument(
+        "--reverse",
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help="report our SUCCESS/PROCESSED rows missing from the feed",
+    )
+    args = parser.parse_args()
+    if args.reverse is None:
+        args.reverse = args.feed in ("payments", "fake")
+    configure_logging(stream=sys.stderr)
+    if args.write_fake_csv:
+        FakeGatewayFeed(args.fake_count, start=args.start).write_csv(args.write_fake_csv)
+        return
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
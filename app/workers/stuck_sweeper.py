@@ -0,0 +1,89 @@
+"""Polls Razorpay for payments and refunds stuck without a webhook.
+
+Run with ``python -m app.workers.stuck_sweeper [--once]``. With
+SWEEPER_IN_PROCESS enabled the API process runs the same loop from its
+lifespan; either way a Redis leader lease keeps to one sweeper at a time.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import signal
+
+from app.api.payments.services.sweeper_service import sweep_once
+from app.core.config import Config
+from app.core.leader import LeaderLease
+from app.core.logs import configure_logging
+from app.core.metrics import serve_worker_metrics
+from app.db.main import dispose_engines
+from app.gateways.razorpay_client import close_razorpay_client
+
+logger = logging.getLogger(__name__)
+
+LEASE_NAME = "stuck-sweeper"
+
+
+def build_lease() -> LeaderLease:
+    return LeaderLease(LEASE_NAME, Config.SWEEPER_LEADER_TTL_SECONDS)
+
+
+async def run_sweep(lease: LeaderLease) -> dict | None:
+    """One sweep if this process holds (or wins) the lease."""
+    if not await lease.acquire():
+        return None
+    keep_alive = asyncio.create_task(lease.keep_alive())
+    try:
+        stats = await sweep_once()
+    finally:
+        keep_alive.cancel()
+    logger.info(f"Sweep finished: {stats}")
+    return stats
+
+
+async def run_sweeper(stop: asyncio.Event, lease: LeaderLease) -> None:
+    try:
+        while not stop.is_set():
+            try:
+                await run_sweep(lease)
+            except Exception:
+                logger.exception("Sweep failed")
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=Config.SWEEPER_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        await lease.release()
+
+
+async def _main(once: bool) -> None:
+    lease = build_lease()
+    try:
+        if once:
+            try:
+                if await run_sweep(lease) is None:
+                    logger.info("Another replica holds the sweeper lease; skipping")
+            finally:
+                await lease.release()
+            return
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        await run_sweeper(stop, lease)
+    finally:
+        await close_razorpay_client()
+        await dispose_engines()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--once", action="store_true")
+    args = parser.parse_args()
+    configure_logging()
+    serve_worker_metrics()
+    asyncio.run(_main(args.once))
+
+
+if __name__ == "__main__":
+    main()
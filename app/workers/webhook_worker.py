@@ -0,0 +1,317 @@
+"""Drains persisted Razorpay webhooks off the request path.
+
+Run with ``python -m app.workers.webhook_worker``. Rows in ``payment_webhooks``
+are the durable queue; Redis pub/sub only shortens the wait between polls.
+Events sharing an ``ordering_key`` are applied one at a time, oldest first;
+per-type concurrency and batching come from the handler registry.
+"""
+from __future__ import annotations
+
+import asyncio
+from contextlib import nullcontext
+import logging
+import signal
+from datetime import timedelta
+
+from sqlalchemy import func, or_, update
+from sqlmodel import select
+
+from app.api.payments.models import PaymentWebhook
+from app.api.payments.services.webhook_service import (
+    WEBHOOK_WAKEUP_CHANNEL,
+    process_webhook_event,
+)
+from app.api.payments.webhook_registry import get_webhook_handler
+from app.core.config import Config
+from app.core.logs import configure_logging
+from app.core.metrics import serve_worker_metrics
+from app.core.redis import redis_client
+from app.db.main import async_session_factory, dispose_engines
+
+logger = logging.getLogger(__name__)
+
+# Serializes the claim step across worker processes so two workers never lease
+# events for the same ordering key at once.
+CLAIM_LOCK_ID = 72_391_004
+MAX_RETRY_BACKOFF_SECONDS = 300
+
+
+async def claim_webhooks(limit: int) -> list[PaymentWebhook]:
+    async with async_session_factory() as session:
+        async with session.begin():
+            locked = (
+                await session.execute(select(func.pg_try_advisory_xact_lock(CLAIM_LOCK_ID)))
+            ).scalar()
+            if not locked:
+                return []
+
+            leased_keys = select(PaymentWebhook.ordering_key).where(
+                PaymentWebhook.processed.is_(False),
+                PaymentWebhook.locked_until > func.now(),
+                PaymentWebhook.ordering_key.is_not(None),
+            )
+            stmt = (
+                select(PaymentWebhook)
+                .where(
+                    PaymentWebhook.processed.is_(False),
+                    PaymentWebhook.attempts < Config.WEBHOOK_WORKER_MAX_ATTEMPTS,
+                    or_(
+                        PaymentWebhook.locked_until.is_(None),
+                        PaymentWebhook.locked_until <= func.now(),
+                    ),
+                    or_(
+                        PaymentWebhook.ordering_key.is_(None),
+                        PaymentWebhook.ordering_key.not_in(leased_keys),
+                    ),
+                )
+                .order_by(PaymentWebhook.created_at)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+            webhooks = list((await session.execute(stmt)).scalars().all())
+            if webhooks:
+                await session.execute(
+                    update(PaymentWebhook)
+                    .where(PaymentWebhook.id.in_([webhook.id for webhook in webhooks]))
+                    .values(
+                        locked_until=func.now()
+                        + timedelta(seconds=Config.WEBHOOK_WORKER_LEASE_SECONDS)
+                    )
+                )
+    return webhooks
+
+
+def _group_by_ordering_key(webhooks: list[PaymentWebhook]) -> list[list[PaymentWebhook]]:
+    groups: dict[str, list[PaymentWebhook]] = {}
+    for webhook in webhooks:
+        groups.setdefault(webhook.ordering_key or str(webhook.id), []).append(webhook)
+    return list(groups.values())
+
+
+def plan_work(
+    webhooks: list[PaymentWebhook],
+) -> tuple[list[list[PaymentWebhook]], list[list[PaymentWebhook]]]:
+    """Split claimed events into (ordered groups, batches).
+
+    Events that are alone under their ordering key and whose handler is
+    batchable are pooled per event type; everything else runs as an ordered
+    group per key.
+    """
+    groups: list[list[PaymentWebhook]] = []
+    batches: dict[str, list[PaymentWebhook]] = {}
+    for group in _group_by_ordering_key(webhooks):
+        handler = get_webhook_handler(group[0].event_type)
+        if len(group) == 1 and handler is not None and handler.batchable:
+            batches.setdefault(handler.event_type, []).append(group[0])
+        else:
+            groups.append(group)
+    for event_type, batch in list(batches.items()):
+        if len(batch) == 1:
+            groups.append(batch)
+            del batches[event_type]
+    return groups, list(batches.values())
+
+
+def _handler_slot(event_type: str | None):
+    handler = get_webhook_handler(event_type)
+    return handler.semaphore if handler is not None else nullcontext()
+
+
+async def _run_after_commit(hooks: list) -> None:
+    for hook in hooks:
+        try:
+            await hook()
+        except Exception:
+            logger.exception("Webhook post-commit hook failed")
+
+
+async def _apply(webhook: PaymentWebhook, session, hooks: list) -> None:
+    hook = await process_webhook_event(webhook, session)
+    if hook is not None:
+        hooks.append(hook)
+    webhook.processed = True
+    webhook.processed_at = func.now()
+    webhook.locked_until = None
+    webhook.last_error = None
+    session.add(webhook)
+
+
+async def _process_one(claimed: PaymentWebhook) -> bool:
+    async with _handler_slot(claimed.event_type):
+        async with async_session_factory() as session:
+            webhook = await session.get(PaymentWebhook, claimed.id)
+            if webhook is None or webhook.processed:
+                return True
+            hooks: list = []
+            try:
+                await _apply(webhook, session, hooks)
+                await session.commit()
+            except Exception as exc:
+                await session.rollback()
+                logger.exception(f"Webhook processing failed for event={claimed.event_id}")
+                await _record_failure(claimed, exc)
+                return False
+    await _run_after_commit(hooks)
+    return True
+
+
+async def process_batch(batch: list[PaymentWebhook]) -> None:
+    """Apply events of one batchable type in a single transaction.
+
+    If any event fails the batch is rolled back and retried one by one, so
+    only the failing event is charged an attempt.
+    """
+    try:
+        async with _handler_slot(batch[0].event_type):
+            async with async_session_factory() as session:
+                hooks: list = []
+                try:
+                    webhooks = (
+                        await session.execute(
+                            select(PaymentWebhook)
+                            .where(PaymentWebhook.id.in_([webhook.id for webhook in batch]))
+                            .order_by(PaymentWebhook.created_at)
+                        )
+                    ).scalars().all()
+                    for webhook in webhooks:
+                        if not webhook.processed:
+                            await _apply(webhook, session, hooks)
+                    await session.commit()
+                except Exception:
+                    await session.rollback()
+                    logger.warning(
+                        f"Webhook batch of {len(batch)} {batch[0].event_type} failed, retrying singly"
+                    )
+                    hooks = None
+        if hooks is not None:
+            await _run_after_commit(hooks)
+            return
+        for webhook in batch:
+            await _process_one(webhook)
+    except Exception:
+        logger.exception("Webhook batch processing crashed")
+
+
+async def _record_failure(webhook: PaymentWebhook, exc: Exception) -> None:
+    attempts = (webhook.attempts or 0) + 1
+    backoff = min(2 ** attempts, MAX_RETRY_BACKOFF_SECONDS)
+    locked_until = (
+        None
+        if attempts >= Config.WEBHOOK_WORKER_MAX_ATTEMPTS
+        else func.now() + timedelta(seconds=backoff)
+    )
+    async with async_session_factory() as session:
+        await session.execute(
+            update(PaymentWebhook)
+            .where(PaymentWebhook.id == webhook.id)
+            .values(attempts=attempts, last_error=str(exc)[:2000], locked_until=locked_until)
+        )
+        await session.commit()
+
+
+async def _release(webhooks: list[PaymentWebhook]) -> None:
+    if not webhooks:
+        return
+    async with async_session_factory() as session:
+        await session.execute(
+            update(PaymentWebhook)
+            .where(PaymentWebhook.id.in_([webhook.id for webhook in webhooks]))
+            .values(locked_until=None)
+        )
+        await session.commit()
+
+
+async def process_group(group: list[PaymentWebhook]) -> None:
+    try:
+        for index, webhook in enumerate(group):
+            if not await _process_one(webhook):
+                # Later events for this key wait behind the failed one's retry.
+                await _release(group[index + 1:])
+                return
+    except Exception:
+        logger.exception("Webhook group processing crashed")
+
+
+async def _subscribe():
+    try:
+        pubsub = redis_client.pubsub()
+        await pubsub.subscribe(WEBHOOK_WAKEUP_CHANNEL)
+        return pubsub
+    except Exception as exc:
+        logger.warning(f"Webhook wakeup subscription unavailable, polling only: {exc}")
+        return None
+
+
+async def _wait_for_wakeup(pubsub) -> None:
+    timeout = Config.WEBHOOK_WORKER_POLL_INTERVAL_SECONDS
+    if pubsub is None:
+        await asyncio.sleep(timeout)
+        return
+    try:
+        await pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+    except Exception:
+        await asyncio.sleep(timeout)
+
+
+async def run_webhook_worker(stop: asyncio.Event) -> None:
+    concurrency = Config.WEBHOOK_WORKER_CONCURRENCY
+    in_flight: set[asyncio.Task] = set()
+    pubsub = await _subscribe()
+    stop_task = asyncio.create_task(stop.wait())
+    wakeup_task: asyncio.Task | None = None
+    try:
+        while not stop.is_set():
+            free = concurrency - len(in_flight)
+            claimed: list[PaymentWebhook] = []
+            if free > 0:
+                try:
+                    claimed = await claim_webhooks(min(Config.WEBHOOK_WORKER_BATCH_SIZE, free))
+                except Exception:
+                    logger.exception("Claiming webhooks failed")
+                groups, batches = plan_work(claimed)
+                for group in groups:
+                    in_flight.add(asyncio.create_task(process_group(group)))
+                for batch in batches:
+                    in_flight.add(asyncio.create_task(process_batch(batch)))
+            if claimed and len(in_flight) < concurrency:
+                continue
+
+            if wakeup_task is None:
+                wakeup_task = asyncio.create_task(_wait_for_wakeup(pubsub))
+            done, _ = await asyncio.wait(
+                {*in_flight, wakeup_task, stop_task},
+                timeout=Config.WEBHOOK_WORKER_POLL_INTERVAL_SECONDS,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            in_flight -= done
+            if wakeup_task in done:
+                wakeup_task = None
+    finally:
+        if in_flight:
+            await asyncio.gather(*in_flight, return_exceptions=True)
+        for task in (wakeup_task, stop_task):
+            if task is not None:
+                task.cancel()
+        if pubsub is not None:
+            await pubsub.aclose()
+
+
+async def _main() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await run_webhook_worker(stop)
+    finally:
+        await dispose_engines()
+
+
+def main() -> None:
+    configure_logging()
+    serve_worker_metrics()
+    asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    main()
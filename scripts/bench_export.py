@@ -0,0 +1,127 @@
+"""Finance export throughput and peak memory: streamed chunks vs one big list.
+
+    python -m scripts.bench_export --rows 10000000 --format csv --gzip
+
+Each run happens in a child process that reports its own peak RSS. "stream"
+feeds synthetic payment_transactions rows through app.exports.service
+.encode_export chunk by chunk, as the server-side cursor delivers them, at
+--rows/10 and --rows: the peaks should match, i.e. memory does not grow with
+the export. "materialized" builds every row first and then encodes it, as a
+fetchall() export would (capped at --materialized-rows). Output bytes are
+counted and discarded, so no database or S3 is involved.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+from decimal import Decimal
+import json
+import resource
+import subprocess
+import sys
+import time
+import uuid
+
+from app.exports.service import encode_export
+from app.exports.sources import EXPORT_TABLES
+
+COLUMNS = EXPORT_TABLES["transactions"].columns
+EPOCH = datetime(2026, 9, 1)
+
+
+def sample_value(column, n: int):
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        python_type = str
+    if python_type is uuid.UUID:
+        return uuid.UUID(int=n)
+    if python_type is Decimal:
+        return Decimal(n % 100_000) / 100
+    if python_type is datetime:
+        return EPOCH + timedelta(seconds=n)
+    if python_type is int:
+        return n % 12
+    return f"{column.name}_{n}"
+
+
+def make_row(n: int) -> tuple:
+    return tuple(sample_value(column, n) for column in COLUMNS)
+
+
+async def synthetic_chunks(rows: int, chunk_size: int):
+    for offset in range(0, rows, chunk_size):
+        yield [make_row(n) for n in range(offset, min(offset + chunk_size, rows))]
+
+
+async def drain(chunks, fmt: str, compress: bool) -> int:
+    size = 0
+    async for data in encode_export(chunks, COLUMNS, fmt, compress):
+        size += len(data)
+    return size
+
+
+def run_child(mode: str, rows: int, args: argparse.Namespace) -> dict:
+    start = time.perf_counter()
+    if mode == "stream":
+        chunks = synthetic_chunks(rows, args.chunk_size)
+    else:
+        everything = [make_row(n) for n in range(rows)]
+
+        async def one_chunk():
+            yield everything
+
+        chunks = one_chunk()
+    size = asyncio.run(drain(chunks, args.format, args.gzip))
+    seconds = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "rows": rows,
+        "seconds": round(seconds, 2),
+        "rowsPerSecond": round(rows / seconds),
+        "megabytes": round(size / 1e6, 1),
+        # ru_maxrss is KiB on Linux.
+        "peakRssMb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def spawn(mode: str, rows: int, args: argparse.Namespace) -> dict:
+    command = [
+        sys.executable, "-m", "scripts.bench_export", "--child", mode, "--rows", str(rows),
+        "--format", args.format, "--chunk-size", str(args.chunk_size),
+    ]
+    if args.gzip:
+        command.append("--gzip")
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    result = json.loads(output)
+    print(
+        f"{result['mode']:<13} {result['rows']:>11,} rows {result['rowsPerSecond']:>10,}/s "
+        f"{result['megabytes']:>9,.1f} MB out  peak RSS {result['peakRssMb']:>8,.1f} MB"
+    )
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--materialized-rows", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--child", choices=["stream", "materialized"], default=None)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.rows, args)))
+        return
+
+    small = spawn("stream", max(args.rows // 10, args.chunk_size), args)
+    large = spawn("stream", args.rows, args)
+    spawn("materialized", args.materialized_rows, args)
+    growth = large["peakRssMb"] - small["peakRssMb"]
+    print(f"stream peak RSS grew {growth:+.1f} MB for {large['rows'] / small['rows']:.0f}x the rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Invoice number allocation throughput under 50 concurrent coroutines.
+
+    python -m scripts.bench_invoice_numbering            # simulated 2 ms DB round-trip
+    python -m scripts.bench_invoice_numbering --db       # real counter table (DATABASE_URL)
+
+Block size 1 approximates the old one-query-per-invoice path. With --db the
+runs use throwaway series names that are deleted from document_number_counters
+afterwards.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import delete
+
+from app.api.payments.models import DocumentNumberCounter
+from app.db.main import async_engine, dispose_engines
+from app.invoices.numbering import BlockNumberAllocator, reserve_block_from_db
+
+
+def simulated_reserve(latency: float):
+    counters: dict[tuple[str, int], int] = {}
+
+    async def reserve(series: str, year: int, size: int) -> int:
+        await asyncio.sleep(latency)
+        start = counters.get((series, year), 1)
+        counters[(series, year)] = start + size
+        return start
+
+    return reserve
+
+
+async def run(allocator: BlockNumberAllocator, series: str, coroutines: int, per_coroutine: int):
+    results: list[int] = []
+
+    async def worker() -> None:
+        for _ in range(per_coroutine):
+            results.append(await allocator.allocate(series, 2026))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(coroutines)))
+    elapsed = time.perf_counter() - started
+
+    assert len(set(results)) == len(results), "duplicate numbers allocated"
+    return len(results) / elapsed, max(results) - min(results) + 1 - len(results)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", action="store_true")
+    parser.add_argument("--coroutines", type=int, default=50)
+    parser.add_argument("--per-coroutine", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    # Fits the 10-character series column, and never collides with INV/CN.
+    scratch = f"Z{uuid.uuid4().hex[:5]}"
+    series_used = []
+    try:
+        for block_size in (1, 20, 100):
+            reserve = reserve_block_from_db if args.db else simulated_reserve(args.latency_ms / 1000)
+            allocator = BlockNumberAllocator(reserve, block_size)
+            series = f"{scratch}{block_size}"
+            series_used.append(series)
+            rate, gaps = await run(allocator, series, args.coroutines, args.per_coroutine)
+            print(f"block_size={block_size:<4} {rate:>12,.0f} numbers/s  gaps={gaps}")
+    finally:
+        if args.db:
+            async with async_engine.begin() as conn:
+                await conn.execute(
+                    delete(DocumentNumberCounter).where(
+                        DocumentNumberCounter.series.in_(series_used)
+                    )
+                )
+            await dispose_engines()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+"""Request throughput with request logging off, written inline, or queued.
+
+    python -m scripts.bench_logging --requests 20000 [--output /tmp/bench.log]
+
+Drives a one-route app carrying the service's middleware stack in-process
+through httpx's ASGI transport, so the numbers isolate the middleware and
+logging cost. "inline" formats and writes on the event loop, as the old
+``print()`` / ``basicConfig`` setup did; "queued" is app.core.logs.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import time
+
+from fastapi import FastAPI
+import httpx
+
+from app.core.config import Config
+from app.core.logs import ContextFilter, JsonFormatter, configure_logging, shutdown_logging
+from app.core.middlewares import register_middleware
+
+HEADERS = {"AuthStatus": "ANONYMOUS", "Authorization": "Bearer bench"}
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping() -> dict:
+        return {"ok": True}
+
+    register_middleware(app)
+    return app
+
+
+async def drive(app: FastAPI, requests: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+        remaining = iter(range(requests))
+
+        async def worker() -> None:
+            for _ in remaining:
+                response = await client.get("/ping", headers=HEADERS)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - start
+
+
+def use_inline(stream) -> None:
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter())
+    handler.addFilter(ContextFilter(Config.LOG_DEBUG_SAMPLE_RATE))
+    root.addHandler(handler)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--output", default="/tmp/bench_logging.log")
+    args = parser.parse_args()
+
+    with open(args.output, "w") as stream:
+        configure_logging(stream=stream)
+        app = build_app()
+        results = {}
+        for mode in ("off", "inline", "queued"):
+            Config.LOG_REQUESTS = mode != "off"
+            if mode == "inline":
+                use_inline(stream)
+            elif mode == "queued":
+                shutdown_logging()
+                configure_logging(stream=stream)
+            asyncio.run(drive(app, min(1000, args.requests), args.concurrency))  # warm up
+            elapsed = asyncio.run(drive(app, args.requests, args.concurrency))
+            results[mode] = args.requests / elapsed
+        shutdown_logging()
+
+    for mode, rate in results.items():
+        print(f"{mode:<7} {rate:>10,.0f} req/s  ({rate / results['off']:.2f}x of off)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Requests/sec through the old BaseHTTPMiddleware stack vs the pure-ASGI one.
+
+    python -m scripts.bench_middleware --requests 20000 --concurrency 50
+
+Both apps mount the same stub handlers at ``/api/v1/health/`` and
+``/api/v1/payments/verify`` (no database or Razorpay), so the difference is
+the middleware cost alone. "before" rebuilds the previous stack: a
+BaseHTTPMiddleware building a Pydantic ``UserContext`` plus an
+``@app.middleware("http")`` timer. Both log through app.core.logs into
+--output, so logging cost is the same on each side.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import Optional
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.trustedhost import TrustedHostMiddleware
+from fastapi.responses import JSONResponse
+import httpx
+from pydantic import BaseModel
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.core.logs import configure_logging, logger, shutdown_logging
+from app.core.middlewares import register_middleware
+from app.core.request_context import AuthStatus
+
+HEADERS = {
+    "AuthStatus": "AUTHENTICATED",
+    "UserId": "8d0f3c1e-6a39-4a52-9b7e-1f2d3c4b5a69",
+    "UserType": "USER",
+    "X-Session-Id": "bench-session",
+}
+VERIFY_BODY = {
+    "razorpay_order_id": "order_BENCH00000001",
+    "razorpay_payment_id": "pay_BENCH000000001",
+    "razorpay_signature": "0" * 64,
+}
+ALLOWED_HOSTS = ["localhost", "127.0.0.1", "0.0.0.0", "payment-service"]
+
+
+class LegacyUserContext(BaseModel):
+    auth_status: AuthStatus
+    user_id: Optional[str] = None
+    type: Optional[str] = None
+    session_id: Optional[str] = None
+
+
+class LegacyGatewayMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        auth_status = request.headers.get("AuthStatus")
+        if not auth_status or auth_status not in AuthStatus.__members__:
+            return JSONResponse({"success": False}, status_code=401)
+        request.state.user_context = LegacyUserContext(
+            auth_status=AuthStatus[auth_status],
+            user_id=request.headers.get("UserId"),
+            type=request.headers.get("UserType"),
+            session_id=request.headers.get("X-Session-Id"),
+        )
+        return await call_next(request)
+
+
+def add_routes(app: FastAPI) -> None:
+    @app.get("/api/v1/health/")
+    async def health(request: Request) -> dict:
+        return {"status": "ok"}
+
+    @app.post("/api/v1/payments/verify")
+    async def verify(request: Request) -> dict:
+        body = await request.json()
+        return {"status": "SUCCESS", "order": body["razorpay_order_id"]}
+
+
+def legacy_app() -> FastAPI:
+    app = FastAPI()
+    add_routes(app)
+
+    @app.middleware("http")
+    async def custom_logging(request: Request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        logger.info(
+            f"{request.client.host}:{request.client.port} - {request.method} - "
+            f"{request.url.path} - {response.status_code} completed after "
+            f"{time.time() - start_time}s"
+        )
+        return response
+
+    app.add_middleware(TrustedHostMiddleware, allowed_hosts=ALLOWED_HOSTS)
+    app.add_middleware(LegacyGatewayMiddleware)
+    return app
+
+
+def current_app() -> FastAPI:
+    app = FastAPI()
+    add_routes(app)
+    register_middleware(app)
+    return app
+
+
+async def drive(app: FastAPI, method: str, path: str, requests: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app, client=("127.0.0.1", 50000))
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+        remaining = iter(range(requests))
+        body = VERIFY_BODY if method == "POST" else None
+
+        async def worker() -> None:
+            for _ in remaining:
+                response = await client.request(method, path, headers=HEADERS, json=body)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--output", default="/tmp/bench_middleware.log")
+    args = parser.parse_args()
+
+    targets = [("GET", "/api/v1/health/"), ("POST", "/api/v1/payments/verify")]
+    with open(args.output, "w") as stream:
+        configure_logging(stream=stream)
+        apps = {"before": legacy_app(), "after": current_app()}
+        for method, path in targets:
+            rates = {}
+            for name, app in apps.items():
+                asyncio.run(drive(app, method, path, min(1000, args.requests), args.concurrency))
+                elapsed = asyncio.run(drive(app, method, path, args.requests, args.concurrency))
+                rates[name] = args.requests / elapsed
+            print(
+                f"{method} {path}: before {rates['before']:,.0f} req/s, "
+                f"after {rates['after']:,.0f} req/s ({rates['after'] / rates['before']:.2f}x)"
+            )
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
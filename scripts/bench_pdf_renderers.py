@@ -0,0 +1,74 @@
+"""Per-invoice latency (p50/p99) of the Lambda and local PDF backends.
+
+    python -m scripts.bench_pdf_renderers --backends lambda,local --count 200
+
+Both backends need AWS credentials (Lambda invoke / S3 upload) from .env.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.invoices.lambda_pdf import build_invoice_lambda_payload
+from app.invoices.pdf_renderers import build_pdf_renderer
+
+
+def sample_payload(index: int) -> dict:
+    number = f"INV-BENCH-{index:06d}"
+    return build_invoice_lambda_payload(
+        invoice_number=number,
+        date="2026-10-17",
+        booking_id=f"BK{index:08d}",
+        customer_name="Customer",
+        package_name="Travel Package",
+        total_amount="12500.00",
+        file_name=number,
+    )
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def bench(backend: str, count: int, concurrency: int) -> None:
+    renderer = build_pdf_renderer(backend)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one(index: int) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await renderer.render(sample_payload(index))
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    try:
+        await one(0)  # warm-up: Lambda cold start / process pool spin-up
+        latencies.clear()
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(1, count + 1)))
+        elapsed = time.perf_counter() - started
+    finally:
+        await renderer.aclose()
+
+    print(
+        f"{backend:<8} n={count} p50={percentile(latencies, 50):8.1f}ms "
+        f"p99={percentile(latencies, 99):8.1f}ms mean={statistics.mean(latencies):8.1f}ms "
+        f"throughput={count / elapsed:7.1f}/s"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", default="lambda,local")
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    for backend in args.backends.split(","):
+        await bench(backend.strip(), args.count, args.concurrency)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,109 @@
+"""Payment schedules/sec: one create_installments call per booking vs the bulk upsert.
+
+    python -m scripts.bench_schedule_bulk --bookings 5000 --installments 4
+
+"per booking" mirrors what POST /bookings/payment-schedule costs per booking
+(two SELECTs, inserts, commit) in a fresh session each time; "bulk" sends
+the same number of new bookings through bulk_create_installments in
+--batch sized requests. Rows are written to the DATABASE_URL database under
+random booking ids and deleted afterwards; point it at a scratch Postgres
+with the migrations applied.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from decimal import Decimal
+import time
+import uuid
+
+from sqlalchemy import delete
+
+from app.api.bookings.models import BookingPaymentPlan, BookingPaymentSchedule
+from app.api.bookings.schedule_engine import default_plan
+from app.api.bookings.schemas import CreateInstallmentsRequest
+from app.api.bookings.service import bulk_create_installments, create_installments
+from app.db.main import async_session_factory, dispose_engines
+
+
+def make_items(count: int, installments: int) -> list[CreateInstallmentsRequest]:
+    return [
+        CreateInstallmentsRequest(
+            bookingId=uuid.uuid4(),
+            bookingPublicId=f"BN{n:08d}",
+            totalAmount=Decimal(10_000 + n) + Decimal("0.37"),
+            numberOfInstallments=installments,
+        )
+        for n in range(count)
+    ]
+
+
+async def per_booking(items: list[CreateInstallmentsRequest]) -> None:
+    for item in items:
+        async with async_session_factory() as session:
+            await create_installments(
+                session,
+                item.booking_id,
+                item.booking_public_id,
+                item.total_amount,
+                item.number_of_installments,
+            )
+
+
+async def bulk(items: list[CreateInstallmentsRequest], batch: int) -> None:
+    plan = default_plan(items[0].number_of_installments)
+    for offset in range(0, len(items), batch):
+        async with async_session_factory() as session:
+            _, created, errors = await bulk_create_installments(
+                session, items[offset : offset + batch], plan
+            )
+            if errors or len(created) != len(items[offset : offset + batch]):
+                raise SystemExit(f"bulk run failed: {len(errors)} errors")
+
+
+async def cleanup(items: list[CreateInstallmentsRequest]) -> None:
+    booking_ids = [item.booking_id for item in items]
+    async with async_session_factory() as session:
+        for offset in range(0, len(booking_ids), 5000):
+            chunk = booking_ids[offset : offset + 5000]
+            await session.execute(
+                delete(BookingPaymentSchedule).where(BookingPaymentSchedule.booking_id.in_(chunk))
+            )
+            await session.execute(
+                delete(BookingPaymentPlan).where(BookingPaymentPlan.booking_id.in_(chunk))
+            )
+        await session.commit()
+
+
+async def timed(label: str, count: int, run) -> float:
+    start = time.perf_counter()
+    await run
+    per_second = count / (time.perf_counter() - start)
+    print(f"{label:<12} {per_second:>10,.0f} bookings/s")
+    return per_second
+
+
+async def _main(args: argparse.Namespace) -> None:
+    single_items = make_items(min(args.bookings, args.per_booking_limit), args.installments)
+    bulk_items = make_items(args.bookings, args.installments)
+    try:
+        before = await timed("per booking", len(single_items), per_booking(single_items))
+        after = await timed("bulk", len(bulk_items), bulk(bulk_items, args.batch))
+        print(f"bulk {after / before:.1f}x per booking")
+    finally:
+        await cleanup(single_items + bulk_items)
+        await dispose_engines()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=5000)
+    parser.add_argument("--per-booking-limit", type=int, default=1000)
+    parser.add_argument("--installments", type=int, default=2)
+    parser.add_argument("--batch", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
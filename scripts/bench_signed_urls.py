@@ -0,0 +1,95 @@
+"""Presigned invoice URLs/sec: boto3 client per call vs the cached SigV4 signer.
+
+    python -m scripts.bench_signed_urls --count 20000
+
+"before" mirrors the old path (parse the S3 URL, build a boto3 S3 client,
+generate_presigned_url) per call; "shared client" reuses one boto3 client;
+"signer" is app.invoices.signer.S3UrlSigner; "memoized" is sign_invoice_url
+over a working set of --distinct invoices, as repeated fetches see it. Uses
+dummy static credentials, so nothing leaves the machine.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import boto3
+
+from app.invoices import signer as signer_module
+from app.invoices.signer import (
+    S3UrlSigner,
+    SigningCredentials,
+    cached_invoice_url,
+    sign_invoice_url,
+)
+from app.invoices.storage import extract_bucket_key_from_url
+
+REGION = "ap-south-1"
+BUCKET = "bench-invoices"
+CREDENTIALS = SigningCredentials("AKIDBENCHEXAMPLE", "benchsecretkeyexample", None)
+
+
+def pdf_url(n: int) -> str:
+    return f"https://{BUCKET}.s3.amazonaws.com/invoices/INV-{n:08d}.pdf"
+
+
+def boto_client():
+    return boto3.client(
+        "s3",
+        region_name=REGION,
+        aws_access_key_id=CREDENTIALS.access_key,
+        aws_secret_access_key=CREDENTIALS.secret_key,
+    )
+
+
+def rate(label: str, count: int, fn) -> float:
+    start = time.perf_counter()
+    for n in range(count):
+        fn(n)
+    per_second = count / (time.perf_counter() - start)
+    print(f"{label:<14} {per_second:>12,.0f} urls/s")
+    return per_second
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=20_000)
+    parser.add_argument("--distinct", type=int, default=1_000)
+    args = parser.parse_args()
+
+    def per_call_client(n: int) -> None:
+        bucket, key = extract_bucket_key_from_url.__wrapped__(pdf_url(n))
+        boto_client().generate_presigned_url(
+            "get_object", Params={"Bucket": bucket, "Key": key}, ExpiresIn=3600
+        )
+
+    shared = boto_client()
+
+    def shared_client(n: int) -> None:
+        bucket, key = extract_bucket_key_from_url(pdf_url(n))
+        shared.generate_presigned_url(
+            "get_object", Params={"Bucket": bucket, "Key": key}, ExpiresIn=3600
+        )
+
+    signer = S3UrlSigner(REGION, CREDENTIALS)
+    signer_module._signer = signer
+
+    def direct(n: int) -> None:
+        bucket, key = extract_bucket_key_from_url(pdf_url(n))
+        signer.presign_get(bucket, key, 3600)
+
+    def memoized(n: int) -> None:
+        invoice_no = f"INV-{n % args.distinct:08d}"
+        if cached_invoice_url(invoice_no, 3600) is None:
+            bucket, key = extract_bucket_key_from_url(pdf_url(n % args.distinct))
+            sign_invoice_url(invoice_no, bucket, key, 3600)
+
+    before = rate("before", max(args.count // 20, 100), per_call_client)
+    rate("shared client", args.count, shared_client)
+    after = rate("signer", args.count, direct)
+    cached = rate("memoized", args.count, memoized)
+    print(f"signer {after / before:.1f}x, memoized {cached / before:.1f}x vs before")
+
+
+if __name__ == "__main__":
+    main()
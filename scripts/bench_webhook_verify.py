@@ -0,0 +1,98 @@
+"""Webhooks/sec per core for signature verification plus parsing.
+
+    python -m scripts.bench_webhook_verify --count 200000
+
+"before" mirrors the SDK path (decode to str, fresh HMAC, json.loads of the
+str); "after" is app.gateways.razorpay_webhook on the raw bytes.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import hmac
+import json
+import time
+
+from app.gateways.razorpay_webhook import WebhookEnvelope, get_webhook_verifier, orjson
+
+SECRET = "bench_webhook_secret"
+
+
+def sample_body() -> bytes:
+    payload = {
+        "entity": "event",
+        "account_id": "acc_BENCH000000001",
+        "event": "payment.captured",
+        "id": "evt_BENCH000000001",
+        "contains": ["payment"],
+        "payload": {
+            "payment": {
+                "entity": {
+                    "id": "pay_BENCH000000001",
+                    "entity": "payment",
+                    "amount": 1250000,
+                    "currency": "INR",
+                    "status": "captured",
+                    "order_id": "order_BENCH00000001",
+                    "method": "upi",
+                    "captured": True,
+                    "email": "customer@example.com",
+                    "contact": "+919999999999",
+                    "notes": {"booking": "BK00000001"},
+                    "fee": 29500,
+                    "tax": 4500,
+                    "acquirer_data": {"rrn": "123456789012"},
+                    "created_at": 1760000000,
+                }
+            }
+        },
+        "created_at": 1760000000,
+    }
+    return json.dumps(payload).encode()
+
+
+def before(body: bytes, signature: str) -> dict:
+    body_str = body.decode("utf-8")
+    expected = hmac.new(SECRET.encode(), body_str.encode("utf-8"), hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(expected, signature):
+        raise ValueError("bad signature")
+    payload = json.loads(body_str)
+    return {
+        "event_id": payload.get("id"),
+        "event_type": payload.get("event"),
+        "order_id": payload["payload"]["payment"]["entity"].get("order_id"),
+    }
+
+
+def after(body: bytes, signature: str) -> WebhookEnvelope:
+    if not get_webhook_verifier(SECRET).verify(body, signature):
+        raise ValueError("bad signature")
+    return WebhookEnvelope.from_bytes(body)
+
+
+def bench(name: str, fn, body: bytes, signature: str, count: int) -> float:
+    for _ in range(1000):
+        fn(body, signature)
+    started = time.perf_counter()
+    for _ in range(count):
+        fn(body, signature)
+    rate = count / (time.perf_counter() - started)
+    print(f"{name:<7} {rate:12,.0f} webhooks/s")
+    return rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--count", type=int, default=200_000)
+    args = parser.parse_args()
+
+    body = sample_body()
+    signature = hmac.new(SECRET.encode(), body, hashlib.sha256).hexdigest()
+    print(f"body={len(body)} bytes json={'orjson' if orjson else 'stdlib'}")
+    base = bench("before", before, body, signature, args.count)
+    fast = bench("after", after, body, signature, args.count)
+    print(f"speedup {fast / base:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""Fails if a hot-path query plans a sequential scan.
+
+    python -m scripts.check_query_plans [--rows 20000] [--no-seqscan]
+
+Seeds synthetic rows into the tables from DATABASE_URL inside a transaction,
+runs ANALYZE, EXPLAINs each statement the services issue and rolls
+everything back, so the database is left as it was. Point it at a local
+Postgres with the migrations applied. ``--no-seqscan`` disables sequential
+scans in the planner, which turns a remaining Seq Scan into proof that no
+usable index exists for that query.
+
+The same check runs in the test suite as ``app/tests/test_query_plans.py``
+when ``RUN_DB_TESTS=1`` is set.
+"""
+from __future__ import annotations
+
+import argparse
+from datetime import datetime, timedelta
+import hashlib
+import sys
+import uuid
+
+from psycopg2.extras import register_uuid
+from sqlalchemy import create_engine, func, or_, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import make_url
+from sqlmodel import select
+
+from app.api.bookings.models import BookingPaymentSchedule
+from app.api.payments.models import (
+    CreditNote,
+    IdempotencyRecord,
+    Invoice,
+    OutboxEvent,
+    PaymentTransaction,
+    PaymentWebhook,
+    RefundTransaction,
+)
+from app.core.config import Config
+from app.db.pagination import keyset_query
+
+SEED_SQL = [
+    """
+    INSERT INTO payment_transactions (
+        id, transaction_id, booking_id, booking_public_id, user_id, amount, currency,
+        payment_type, gateway, gateway_order_id, gateway_payment_id, status,
+        refund_amount, refund_status, idempotency_key
+    )
+    SELECT md5('txn' || i)::uuid, 'qp_txn_' || i, md5('bk' || i / 2)::uuid,
+           'QP' || (i / 2), md5('usr' || i % 500)::uuid, 1000, 'INR', 'FULL', 'RAZORPAY',
+           'qp_order_' || i, 'qp_pay_' || i,
+           CASE WHEN i % 10 = 0 THEN 'FAILED' ELSE 'SUCCESS' END,
+           0, 'NONE', 'qp_idem_' || i
+    FROM generate_series(1, :rows) AS i
+    """,
+    """
+    INSERT INTO refund_transactions (id, payment_transaction_id, refund_id, amount, status)
+    SELECT md5('rfnd' || i)::uuid, md5('txn' || i)::uuid, 'qp_rfnd_' || i, 100, 'PROCESSED'
+    FROM generate_series(1, :rows, 4) AS i
+    """,
+    """
+    INSERT INTO invoices (
+        id, invoice_no, booking_id, booking_public_id, transaction_id,
+        transaction_public_id, amount, pdf_url
+    )
+    SELECT md5('inv' || i)::uuid, 'QP-INV-' || i, md5('bk' || i / 2)::uuid, 'QP' || (i / 2),
+           md5('txn' || i)::uuid, 'qp_txn_' || i, 1000,
+           CASE WHEN i % 200 = 0 THEN NULL ELSE 's3://bucket/invoices/QP-INV-' || i || '.pdf' END
+    FROM generate_series(1, :rows) AS i
+    """,
+    """
+    INSERT INTO credit_notes (
+        id, credit_note_number, invoice_id, refund_transaction_id, amount, pdf_url
+    )
+    SELECT md5('cn' || i)::uuid, 'QP-CN-' || i, md5('inv' || i)::uuid, md5('rfnd' || i)::uuid,
+           100,
+           CASE WHEN i % 201 = 0 THEN NULL ELSE 's3://bucket/credit_notes/QP-CN-' || i || '.pdf' END
+    FROM generate_series(1, :rows, 4) AS i
+    """,
+    """
+    INSERT INTO payment_webhooks (
+        id, gateway, event_id, event_type, payload, processed, ordering_key
+    )
+    SELECT md5('wh' || i)::uuid, 'RAZORPAY', 'qp_evt_' || i, 'payment.captured', '{}'::jsonb,
+           i % 500 <> 0, 'qp_order_' || i
+    FROM generate_series(1, :rows) AS i
+    """,
+    """
+    INSERT INTO event_outbox (id, event_type, payload, delivered_at)
+    SELECT md5('ob' || i)::uuid, 'PAYMENT_SUCCESS', '{}'::jsonb,
+           CASE WHEN i % 500 = 0 THEN NULL ELSE now() END
+    FROM generate_series(1, :rows) AS i
+    """,
+    """
+    INSERT INTO idempotency_records (key, request_hash, response, created_at)
+    SELECT 'qp_idem_' || i, md5(i::text), '{}'::jsonb, now() - (i || ' minutes')::interval
+    FROM generate_series(1, :rows) AS i
+    """,
+    """
+    INSERT INTO booking_payment_schedule (
+        id, booking_id, booking_public_id, installment_no, due_amount, status
+    )
+    SELECT md5('sch' || i)::uuid, md5('bk' || i / 2)::uuid, 'QP' || (i / 2), i % 2 + 1, 500,
+           'PENDING'
+    FROM generate_series(1, :rows) AS i
+    """,
+]
+
+SEEDED_TABLES = [
+    "payment_transactions",
+    "refund_transactions",
+    "invoices",
+    "credit_notes",
+    "payment_webhooks",
+    "event_outbox",
+    "idempotency_records",
+    "booking_payment_schedule",
+]
+
+
+def _seed_uuid(value: str) -> uuid.UUID:
+    # Same value as md5(value)::uuid in the seed SQL.
+    return uuid.UUID(hashlib.md5(value.encode()).hexdigest())
+
+
+def hot_path_queries(rows: int) -> dict[str, object]:
+    sample = rows // 2 + 1
+    txn_id = _seed_uuid(f"txn{sample}")
+    return {
+        "verify: txn by gateway order": select(PaymentTransaction).where(
+            PaymentTransaction.gateway_order_id == f"qp_order_{sample}"
+        ),
+        "webhook: lock txn by gateway order": select(PaymentTransaction)
+        .where(PaymentTransaction.gateway_order_id == f"qp_order_{sample}")
+        .with_for_update(),
+        "refund: lock booking's successful txns": select(PaymentTransaction)
+        .where(
+            PaymentTransaction.booking_public_id == f"QP{sample // 2}",
+            PaymentTransaction.status == "SUCCESS",
+        )
+        .order_by(PaymentTransaction.created_at)
+        .with_for_update(),
+        "refund webhook: refund by gateway id": select(RefundTransaction)
+        .where(RefundTransaction.refund_id == f"qp_rfnd_{sample}")
+        .with_for_update(),
+        "refunds of a txn": select(RefundTransaction).where(
+            RefundTransaction.payment_transaction_id == txn_id
+        ),
+        "invoice: by transaction": select(Invoice).where(Invoice.transaction_id == txn_id),
+        "invoice: by number": select(Invoice).where(Invoice.invoice_no == f"QP-INV-{sample}"),
+        "credit note: by refund": select(CreditNote).where(
+            CreditNote.refund_transaction_id == _seed_uuid(f"rfnd{sample}")
+        ),
+        "webhook ingest: dedupe key": select(PaymentWebhook).where(
+            PaymentWebhook.event_id == f"qp_evt_{sample}",
+            PaymentWebhook.event_type == "payment.captured",
+        ),
+        "webhook worker: claim": select(PaymentWebhook)
+        .where(
+            PaymentWebhook.processed.is_(False),
+            or_(PaymentWebhook.locked_until.is_(None), PaymentWebhook.locked_until <= func.now()),
+        )
+        .order_by(PaymentWebhook.created_at)
+        .limit(100)
+        .with_for_update(skip_locked=True),
+        "pdf pipeline: pending invoices": select(Invoice)
+        .where(
+            Invoice.pdf_url.is_(None),
+            Invoice.pdf_attempts < 8,
+            or_(Invoice.pdf_next_attempt_at.is_(None), Invoice.pdf_next_attempt_at <= func.now()),
+        )
+        .order_by(Invoice.pdf_attempts, Invoice.issued_at)
+        .limit(50)
+        .with_for_update(skip_locked=True),
+        "pdf pipeline: pending credit notes": select(CreditNote, Invoice)
+        .join(Invoice, CreditNote.invoice_id == Invoice.id)
+        .where(
+            CreditNote.pdf_url.is_(None),
+            CreditNote.pdf_attempts < 8,
+            or_(
+                CreditNote.pdf_next_attempt_at.is_(None),
+                CreditNote.pdf_next_attempt_at <= func.now(),
+            ),
+        )
+        .order_by(CreditNote.pdf_attempts, CreditNote.created_at)
+        .limit(50)
+        .with_for_update(skip_locked=True, of=CreditNote),
+        "outbox relay: pending events": select(OutboxEvent)
+        .where(OutboxEvent.delivered_at.is_(None))
+        .order_by(OutboxEvent.created_at)
+        .limit(100)
+        .with_for_update(skip_locked=True),
+        "idempotency cleanup: expired": select(IdempotencyRecord.key)
+        .where(IdempotencyRecord.created_at < func.now() - timedelta(days=1))
+        .limit(5000),
+        "installment lookup": select(BookingPaymentSchedule).where(
+            BookingPaymentSchedule.booking_id == _seed_uuid(f"bk{sample // 2}"),
+            BookingPaymentSchedule.installment_no == 1,
+        ),
+        "history: user's transactions": keyset_query(
+            PaymentTransaction,
+            [PaymentTransaction.user_id == _seed_uuid(f"usr{sample % 500}")],
+            51,
+        ),
+        "history: user's transactions, next page": keyset_query(
+            PaymentTransaction,
+            [PaymentTransaction.user_id == _seed_uuid(f"usr{sample % 500}")],
+            51,
+            after=(datetime(2026, 1, 1), txn_id),
+        ),
+        "history: booking's transactions": keyset_query(
+            PaymentTransaction,
+            [PaymentTransaction.booking_id == _seed_uuid(f"bk{sample // 2}")],
+            51,
+        ),
+        "history: user's invoices": keyset_query(
+            Invoice,
+            [PaymentTransaction.user_id == _seed_uuid(f"usr{sample % 500}")],
+            51,
+            sort_column=Invoice.issued_at,
+            join=(PaymentTransaction, Invoice.transaction_id == PaymentTransaction.id),
+        ),
+    }
+
+
+def seq_scans(plan: dict) -> list[str]:
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan.get("Relation Name", "?"))
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+def explain_hot_paths(connection, rows: int, no_seqscan: bool = False) -> dict[str, dict]:
+    """Seed, ANALYZE and EXPLAIN every hot path; returns the top plan node by query.
+
+    Runs on the caller's open transaction, which the caller rolls back.
+    """
+    for statement in SEED_SQL:
+        connection.execute(text(statement), {"rows": rows})
+    for table in SEEDED_TABLES:
+        connection.exec_driver_sql(f"ANALYZE {table}")
+    if no_seqscan:
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+
+    dialect = postgresql.dialect()
+    plans = {}
+    for name, stmt in hot_path_queries(rows).items():
+        compiled = stmt.compile(dialect=dialect, compile_kwargs={"render_postcompile": True})
+        plans[name] = connection.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compiled.string}", compiled.params
+        ).scalar()[0]["Plan"]
+    return plans
+
+
+def sync_engine():
+    register_uuid()
+    return create_engine(make_url(Config.DATABASE_URL).set(drivername="postgresql+psycopg2"))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--no-seqscan", action="store_true")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    engine = sync_engine()
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            plans = explain_hot_paths(connection, args.rows, args.no_seqscan)
+        finally:
+            transaction.rollback()
+    engine.dispose()
+
+    failures = 0
+    for name, plan in plans.items():
+        scanned = seq_scans(plan)
+        status = "FAIL" if scanned else "ok"
+        detail = f" seq scan on {', '.join(scanned)}" if scanned else ""
+        print(f"{status:<4} {name}{detail}")
+        if args.verbose:
+            print(f"     {plan.get('Node Type')} cost={plan.get('Total Cost')}")
+        failures += bool(scanned)
+    print(f"{failures} hot path(s) with sequential scans")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())